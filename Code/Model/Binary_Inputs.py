@@ -0,0 +1,325 @@
+import numpy as np, pandas as pd
+import os, sys
+from Input_Cache import cached_array, file_hash
+
+#%% Binary (.npy) storage of the time-series inputs, used as fast path by Initialize.py
+
+current_directory = os.path.dirname(os.path.abspath(__file__))
+inputs_directory = os.path.join(current_directory, '..', 'Inputs')
+
+# Time-series inputs: name -> (text file, index column of the text file)
+TIME_SERIES_INPUTS = {'Demand':            ('Demand.csv', 0),
+                      'RES_Time_Series':   ('RES_Time_Series.csv', 0),
+                      'Grid Availability': ('Grid Availability.csv', None)}
+
+GRID_AVAILABILITY_PACKED = 'Grid Availability.npz'   # bit-packed grid availability (1 bit per period)
+GRID_OUTAGES = 'Grid Outages.csv'                    # run-length list of the grid outages
+
+archetypes_directory = os.path.join(current_directory, '..', 'Demand_archetypes')
+ARCHETYPES_BUNDLE = 'Demand_archetypes.npz'
+
+
+def read_input_csv(file_path, index_col=0, label=None):
+    """
+    Reads a time-series input from a .csv (or .xls/.xlsx) file, trying the supported
+    delimiter/decimal combinations until the file is parsed consistently.
+
+    Parameters:
+    file_path (str): Path of the input file.
+    index_col (int or None): Column to use as index (None if the file has no index column).
+    label (str): Name of the data used in the printed messages.
+
+    Returns:
+    DataFrame: The parsed data.
+    """
+    label = label or os.path.basename(file_path)
+    if os.path.splitext(file_path)[1].lower() in ('.xls', '.xlsx'):
+        data = pd.read_excel(file_path, header=0, index_col=index_col)
+        print(f"{label} data loaded from Excel file")
+        return data
+    delimiters = [(',', '.'), (';', ','), (';', '.')]
+    for delimiter, decimal in delimiters:
+        try:
+            data = pd.read_csv(file_path, delimiter=delimiter, decimal=decimal, header=0, index_col=index_col, encoding='utf-8-sig')
+        except pd.errors.ParserError:
+            print(f"Failed to load with delimiter '{delimiter}' and decimal '{decimal}'. Trying next combination...")
+            continue
+        except FileNotFoundError:
+            print(f"File not found: {file_path}. Please check the file path and try again.")
+            raise
+        except Exception as e:
+            print(f"An unexpected error occurred: {e}. Trying next combination...")
+            continue
+        # A wrong delimiter can silently produce a single column holding the whole line
+        labels = [str(c) for c in data.columns] + [str(data.index.name)]
+        if data.shape[1] == 0 or any(sep in c for c in labels for sep in (',', ';')):
+            print(f"Failed to load with delimiter '{delimiter}' and decimal '{decimal}'. Trying next combination...")
+            continue
+        print(f"{label} data loaded exogenously using delimiter '{delimiter}' and decimal '{decimal}'")
+        return data
+    print(f"Error during import of {os.path.basename(file_path)}: unable to automatically detect delimiter and decimal. Please try again using delimiter ';' or ',' and decimal ',' or '.'.")
+    raise ValueError(f"Failed to load {label} data with all provided delimiter and decimal combinations.")
+
+
+def parse_time_series(file_path, index_col=0):
+    """
+    Parses a time-series input file into a float array (rows = periods, columns = data columns).
+    """
+    return read_input_csv(file_path, index_col=index_col).apply(pd.to_numeric).to_numpy(dtype=float)
+
+
+def npy_path(name, directory=inputs_directory):
+    """
+    Returns the path of the binary file associated to a time-series input.
+    """
+    return os.path.join(directory, name + '.npy')
+
+
+def source_hash_path(binary_path):
+    """
+    Returns the path of the file storing the content hash of the source of a binary .npy file.
+    """
+    return binary_path + '.sha256'
+
+
+def stored_source_hash(binary_path):
+    """
+    Returns the content hash of the source file stored beside a binary .npy file ('' if missing).
+    """
+    try:
+        with open(source_hash_path(binary_path)) as f:
+            return f.read().strip()
+    except OSError:
+        return ''
+
+
+def csv_to_npy(source_path, target_path, index_col=0):
+    """
+    Converts a time-series input file (.csv, .xls or .xlsx) into a binary .npy array
+    (rows = periods, columns = data columns of the source file), storing beside it
+    the content hash of the source file.
+
+    Parameters:
+    source_path (str): Path of the text/Excel input file.
+    target_path (str): Path of the .npy file to be written.
+    index_col (int or None): Index column of the source file.
+
+    Returns:
+    ndarray: The converted array.
+    """
+    array = np.ascontiguousarray(parse_time_series(source_path, index_col=index_col))
+    np.save(target_path, array)
+    with open(source_hash_path(target_path), 'w') as f:
+        f.write(file_hash(source_path))
+    return array
+
+
+def convert_inputs(directory=inputs_directory):
+    """
+    One-time conversion of Demand, RES_Time_Series and Grid Availability .csv files
+    found in the inputs folder into their binary .npy counterparts.
+    """
+    for name, (file_name, index_col) in TIME_SERIES_INPUTS.items():
+        source_path = os.path.join(directory, file_name)
+        if not os.path.exists(source_path):
+            continue
+        if name == 'Grid Availability':
+            availability = save_packed_availability(os.path.join(directory, GRID_AVAILABILITY_PACKED), parse_time_series(source_path, index_col), source_path)
+            print(f"{file_name} converted to {GRID_AVAILABILITY_PACKED} {availability.shape}")
+            continue
+        array = csv_to_npy(source_path, npy_path(name, directory), index_col)
+        print(f"{file_name} converted to {name}.npy {array.shape}")
+
+
+def load_time_series(name, directory=inputs_directory, use_cache=True):
+    """
+    Loads a time-series input, memory-mapping the binary .npy file when it is up to date
+    (i.e. converted from the current content of the .csv file) and parsing the .csv file otherwise.
+    An out-of-date .npy file is converted again; without .npy file, parsed .csv files are stored
+    in the input cache, so that an unchanged file is parsed only once.
+    Columns are labelled '1', '2', ... as in the .csv inputs.
+
+    Parameters:
+    name (str): Key of TIME_SERIES_INPUTS ('Demand', 'RES_Time_Series' or 'Grid Availability').
+    directory (str): Inputs folder.
+    use_cache (bool): False to bypass the input cache.
+
+    Returns:
+    DataFrame: The time series, one column per year (and scenario or renewable source).
+    """
+    file_name, index_col = TIME_SERIES_INPUTS[name]
+    source_path = os.path.join(directory, file_name)
+    binary_path = npy_path(name, directory)
+    if os.path.exists(binary_path) and (not os.path.exists(source_path) or
+                                        stored_source_hash(binary_path) == file_hash(source_path)):
+        array = np.load(binary_path, mmap_mode='r')
+        print(f"{name} data loaded from binary file {name}.npy")
+    elif os.path.exists(binary_path):
+        array = csv_to_npy(source_path, binary_path, index_col)
+        print(f"{file_name} changed since its conversion: {name}.npy converted again")
+    else:
+        array = cached_array(source_path, parse_time_series, enabled=use_cache, index_col=index_col)
+    return pd.DataFrame(array, columns=[str(i) for i in range(1, array.shape[1] + 1)], copy=False)
+
+
+#%% Compact storage of the grid availability (0/1 matrix): bit-packed binary file and run-length outage lists
+
+def binary_availability(array, label='Grid Availability'):
+    """
+    Converts a 0/1 availability array into uint8, raising an error if it contains other values.
+    """
+    array = np.asarray(array)
+    availability = array.astype(np.uint8)
+    if not np.array_equal(availability, array):
+        raise ValueError(f"{label} data must contain only 0 (grid not available) and 1 (grid available)")
+    return availability
+
+
+def save_packed_availability(file_path, availability, source_path=None):
+    """
+    Stores the (periods x columns) availability matrix with one bit per period, together with
+    the content hash of the .csv file it was converted from (source_path), if any.
+
+    Returns:
+    ndarray: The availability matrix as uint8.
+    """
+    availability = binary_availability(availability)
+    source_hash = file_hash(source_path) if source_path else ''
+    np.savez_compressed(file_path, bits=np.packbits(availability, axis=0), periods=availability.shape[0], source_hash=source_hash)
+    return availability
+
+
+def load_packed_availability(file_path, source_path=None):
+    """
+    Loads the bit-packed availability matrix as a (periods x columns) uint8 array.
+    If source_path exists, returns None unless the matrix was stored from the current content of that file.
+    """
+    with np.load(file_path) as packed:
+        if source_path and os.path.exists(source_path):
+            if 'source_hash' not in packed or str(packed['source_hash']) != file_hash(source_path):
+                return None
+        return np.unpackbits(packed['bits'], axis=0, count=int(packed['periods']))
+
+
+def outage_runs(availability):
+    """
+    Converts the (periods x columns) availability matrix into the list of its outages.
+
+    Returns:
+    DataFrame: One row per outage with its column, first period and duration [periods] (column and period counted from 1).
+    """
+    availability = binary_availability(availability)
+    padded = np.zeros((availability.shape[0] + 2, availability.shape[1]), dtype=np.int8)
+    padded[1:-1] = 1 - availability
+    changes = np.diff(padded, axis=0).T                      # +1 where an outage starts, -1 where it ends (column-major order)
+    columns, starts = np.nonzero(changes == 1)
+    ends = np.nonzero(changes == -1)[1]
+    return pd.DataFrame({'Column': columns + 1, 'Start': starts + 1, 'Duration': ends - starts})
+
+
+def availability_from_runs(runs, periods, columns):
+    """
+    Builds the (periods x columns) uint8 availability matrix from a list of outages (see outage_runs).
+    """
+    changes = np.zeros((columns, periods + 1), dtype=np.int32)
+    column = runs['Column'].to_numpy(dtype=int) - 1
+    start = runs['Start'].to_numpy(dtype=int) - 1
+    np.add.at(changes, (column, start), 1)
+    np.add.at(changes, (column, np.minimum(start + runs['Duration'].to_numpy(dtype=int), periods)), -1)
+    return (np.cumsum(changes[:, :periods], axis=1) == 0).astype(np.uint8).T
+
+
+def save_outage_runs(file_path, availability):
+    """
+    Writes the list of outages of the availability matrix (see outage_runs) to a ';'-separated file.
+    """
+    outage_runs(availability).to_csv(file_path, index=False, sep=';')
+
+
+def load_grid_availability(periods, columns, directory=inputs_directory, use_cache=True):
+    """
+    Loads the grid availability as a (periods x columns) uint8 array, reading in order of preference
+    the bit-packed file (when stored from the current content of the .csv file), the .csv file and the list of outages.
+
+    Parameters:
+    periods (int): Number of periods per year.
+    columns (int): Number of columns (years x scenarios), used to build the matrix from the list of outages.
+    directory (str): Inputs folder.
+    use_cache (bool): False to bypass the input cache.
+
+    Returns:
+    ndarray: The grid availability, one column per year and scenario.
+    """
+    file_name, index_col = TIME_SERIES_INPUTS['Grid Availability']
+    source_path = os.path.join(directory, file_name)
+    packed_path = os.path.join(directory, GRID_AVAILABILITY_PACKED)
+    outages_path = os.path.join(directory, GRID_OUTAGES)
+    availability = load_packed_availability(packed_path, source_path) if os.path.exists(packed_path) else None
+    if availability is not None:
+        print(f"Grid Availability data loaded from binary file {GRID_AVAILABILITY_PACKED}")
+        return availability
+    if not os.path.exists(source_path) and os.path.exists(outages_path):
+        print(f"Grid Availability data built from the list of outages {GRID_OUTAGES}")
+        return availability_from_runs(read_input_csv(outages_path, index_col=None), periods, columns)
+    return binary_availability(cached_array(source_path, parse_time_series, enabled=use_cache, index_col=index_col))
+
+
+#%% Binary bundle of the demand archetypes (one .npz file with the hourly profile of every archetype)
+
+def read_archetype_excel(file_path):
+    """
+    Reads the hourly load profile (column B) of a demand archetype .xlsx file.
+    """
+    return pd.read_excel(file_path, skiprows=0, usecols="B").iloc[:, 0].to_numpy(dtype=float)
+
+
+def compile_archetypes(directory=archetypes_directory):
+    """
+    One-time compilation of the demand archetype .xlsx files into a single binary bundle,
+    storing each profile under the archetype name (e.g. 'AY_F3_Tier-1', 'HOSPITAL_Tier-2', 'SCHOOL')
+    together with the hash of its .xlsx file, used to detect out-of-date entries.
+    """
+    names = sorted(os.path.splitext(f)[0] for f in os.listdir(directory) if f.endswith('.xlsx') and not f.startswith('~$'))
+    profiles = {name: read_archetype_excel(os.path.join(directory, name + '.xlsx')) for name in names}
+    hashes = [file_hash(os.path.join(directory, name + '.xlsx')) for name in names]
+    np.savez(os.path.join(directory, ARCHETYPES_BUNDLE), names=np.array(names), hashes=np.array(hashes), **profiles)
+    print(f"{len(names)} demand archetypes compiled into {ARCHETYPES_BUNDLE}")
+
+
+def load_archetypes(names, directory=archetypes_directory):
+    """
+    Loads the hourly profiles of the given demand archetypes, reading only the needed entries of the
+    binary bundle. Archetypes missing from the bundle, or whose .xlsx file changed after the bundle
+    was compiled, are read from the .xlsx file.
+
+    Parameters:
+    names (list): Archetype names (file names without extension).
+    directory (str): Demand archetypes folder.
+
+    Returns:
+    dict: Archetype name -> hourly load profile (ndarray).
+    """
+    bundle_path = os.path.join(directory, ARCHETYPES_BUNDLE)
+    profiles = {}
+    stale = []
+    bundle = np.load(bundle_path) if os.path.exists(bundle_path) else None
+    try:
+        compiled = dict(zip(bundle['names'].tolist(), bundle['hashes'].tolist())) if bundle is not None else {}
+        for name in names:
+            file_path = os.path.join(directory, name + '.xlsx')
+            if name in compiled and (not os.path.exists(file_path) or compiled[name] == file_hash(file_path)):
+                profiles[name] = bundle[name]
+            else:
+                profiles[name] = read_archetype_excel(file_path)
+                stale.append(name)
+    finally:
+        if bundle is not None:
+            bundle.close()
+    if stale and bundle is not None:
+        print(f"Demand archetypes {', '.join(stale)} read from Excel: {ARCHETYPES_BUNDLE} is out of date, run Binary_Inputs.py to compile it again")
+    return profiles
+
+
+if __name__ == "__main__":
+    convert_inputs(sys.argv[1] if len(sys.argv) > 1 else inputs_directory)
+    compile_archetypes()
@@ -1,5 +1,8 @@
 import re, time, pandas as pd, numpy as np
 import os
+from functools import lru_cache
+from Input_Cache import generation_up_to_date, record_generation
+from Binary_Inputs import load_archetypes
 
 def data_import(data_demand):
     for value in data_demand:
@@ -50,6 +53,17 @@ def data_import(data_demand):
     
     return F, cooling_period, [h_tier1, h_tier2, h_tier3, h_tier4, h_tier5], [num_hosp_1, num_hosp_2, num_hosp_3, num_hosp_4, num_hosp_5,num_schools], demand_growth, years, periods
 
+def scenario_import(data_demand):
+    demand_scenario_generation = 0
+    n_scenarios = 1
+    for value in data_demand:
+        if "param: Scenarios" in value:
+            n_scenarios = int(value[value.index('=')+1:value.index(';')].replace(' ','').replace("'",""))
+        if "param: Demand_Scenario_Generation" in value:
+            demand_scenario_generation = int(value[value.index('=')+1:value.index(';')].replace(' ','').replace("'",""))
+    
+    return demand_scenario_generation, n_scenarios
+
 #%% Calculates the load demand given as input the latitude, cooling period and number of households for each wealth tier and number of services (schools and hospitals)
 
 def aggregate_load(load_data, periods):
@@ -59,87 +73,96 @@ def aggregate_load(load_data, periods):
     # Calculate aggregation factor
     agg_factor = total_hours // periods
 
-    # Aggregate data
-    aggregated_load = load_data.groupby(load_data.index // agg_factor).sum()
+    # Aggregate data (sum of each block of agg_factor consecutive hours)
+    aggregated_load = np.bincount(np.arange(total_hours) // agg_factor, weights=load_data)
 
     return aggregated_load
 
-def demand_calculation():
+# Archetypes of the community: 5 household wealth tiers of the climate zone and cooling period, 5 hospital tiers and the school
+def archetype_names(F, cooling_period):
+    return [cooling_period + '_' + F + '_Tier-' + str(ii) for ii in range(1, 6)] + ["HOSPITAL_Tier-" + str(ii) for ii in range(1, 6)] + ["SCHOOL"]
+
+@lru_cache(maxsize=16)
+def archetype_matrix(F, cooling_period, periods):
+    """
+    Returns the (periods x 11) matrix of the archetype load profiles aggregated to the number of periods,
+    columns ordered as archetype_names. The matrix is cached, so changing only the number of households
+    or services does not read the archetypes again.
+    """
+    names = archetype_names(F, cooling_period)
+    archetypes = load_archetypes(names)
+    matrix = np.column_stack([aggregate_load(archetypes[name], periods) for name in names])
+    matrix.setflags(write=False)
+    return matrix
+
+#%% Stochastic load demand scenarios
+
+DEMAND_UNITS_CV = 0.1                   # Coefficient of variation of the number of households and services of each tier across scenarios
+DEMAND_GROWTH_STD = 1.0                 # Standard deviation of the yearly demand growth across scenarios [percentage points]
+DEMAND_NOISE_CV = 0.05                  # Coefficient of variation of the hourly noise
+DEMAND_NOISE_AUTOCORRELATION = 0.8      # Correlation of the noise between consecutive periods
+
+def demand_scenarios(matrix, units, demand_growth, years, n_scenarios, rng):
+    """
+    Draws load demand scenarios from the archetype profiles, varying the tier mix (lognormal factors with mean 1
+    on the number of units of each archetype), the yearly demand growth (normal) and adding autocorrelated hourly noise.
+
+    Parameters:
+    matrix (ndarray): Archetype profiles (periods x archetypes).
+    units (ndarray): Number of units of each archetype (households in hundreds).
+    demand_growth (float): Average yearly demand growth [%].
+    years (int): Number of years.
+    n_scenarios (int): Number of scenarios.
+    rng (Generator): NumPy random generator.
+
+    Returns:
+    ndarray: Load demand (scenarios x years x periods).
+    """
+    sigma = np.sqrt(np.log(1 + DEMAND_UNITS_CV**2))
+    scenario_units = units * rng.lognormal(-sigma**2/2, sigma, size=(n_scenarios, len(units)))
+    load_first_year = scenario_units @ matrix.T                                                               #scenarios x periods
+    scenario_growth = 1 + (demand_growth + DEMAND_GROWTH_STD*rng.standard_normal(n_scenarios))/100
+    growth = np.cumprod(np.column_stack([np.ones(n_scenarios)] + [scenario_growth]*(years-1)), axis=1)         #scenarios x years
+    
+    # AR(1) noise along the periods, vectorized over scenarios and years
+    noise = rng.standard_normal((n_scenarios, years, matrix.shape[0]))
+    innovation = np.sqrt(1 - DEMAND_NOISE_AUTOCORRELATION**2)
+    for t in range(1, matrix.shape[0]):
+        noise[:, :, t] = DEMAND_NOISE_AUTOCORRELATION*noise[:, :, t-1] + innovation*noise[:, :, t]
+    noise = np.maximum(1 + DEMAND_NOISE_CV*noise, 0, out=noise)
+    
+    return noise * load_first_year[:, None, :] * growth[:, :, None]
+
+def demand_calculation(n_scenarios=1, stochastic=False, rng=None):
     
     current_directory = os.path.dirname(os.path.abspath(__file__))
     inputs_directory = os.path.join(current_directory, '..', 'Inputs')
     data_file_path = os.path.join(inputs_directory, 'Parameters.dat')
     data_demand = open(data_file_path).readlines()
     
-    num_h_tier = []
-    
     F, cooling_period, num_h_tier, num_services, demand_growth, years, periods = data_import(data_demand)
+    matrix = archetype_matrix(F, cooling_period, periods)
     
-    class household:
-      def __init__(self, zone, wealth, cooling, number):
-        self.zone = zone
-        self.wealth = wealth
-        self.cooling = cooling
-        self.number = number
-    
-      def load_demand(self, h_load):
-          load = self.number/100 * h_load
-          return load
-      
-    class service:
-        def __init__(self, structure, number):
-            self.structure = structure
-            self.number = number
-        
-        def load_demand(self, h_load):
-            load = self.number * h_load
-            return load
-        
-    households = []
-    load_households = []  
-    demand_archetypes_path = "../Demand_archetypes/"
-
-    for ii in range(1, len(num_h_tier) + 1):
-        households.append(household(F, ii, cooling_period, num_h_tier[ii - 1]))
-        h_load_name = households[ii - 1].cooling + '_' + F + '_Tier-' + str(ii)
-        file_path = os.path.join(demand_archetypes_path, h_load_name + ".xlsx")
-        h_load = pd.DataFrame(pd.read_excel(file_path, skiprows=0, usecols="B"))
-        h_load = aggregate_load(h_load, periods)
-        load_households.append(household.load_demand(households[ii - 1], h_load))
+    # Community load: archetype profiles weighted by the number of households (given in hundreds) and services
+    units = np.concatenate([np.array(num_h_tier)/100, num_services])
+    if stochastic:
+        load = demand_scenarios(matrix, units, demand_growth, years, n_scenarios, rng)
+    else:
+        load_first_year = matrix @ units
         
-    load_households = pd.concat([sum(load_households)]*years, axis = 1, ignore_index = True)       
-            
-    #%% Load demand of services    
-    services = []
-    load_tot_services = []
-    for ii in range(1, len(num_services) + 1):
-        services.append(service(ii, num_services[ii-1]))
-        if ii < 6:
-            service_load_name = "HOSPITAL_Tier-" + str(ii)
-        else: 
-            service_load_name = "SCHOOL"
-        file_path = os.path.join(demand_archetypes_path, service_load_name + ".xlsx")
-        service_load = pd.DataFrame(pd.read_excel(file_path, skiprows=0, usecols="B"))
-        service_load = aggregate_load(service_load, periods)  # Aggregate service load data
-        load_tot_services.append(services[ii-1].load_demand(service_load))
+        # Yearly demand growth applied as cumulative product, same profile in every scenario
+        growth = np.cumprod(np.concatenate([[1], np.full(years-1, 1+demand_growth/100)]))
+        load = np.broadcast_to(np.outer(growth, load_first_year), (n_scenarios, years, periods))
     
-    load_tot_services = pd.concat([sum(load_tot_services)]*years, axis = 1, ignore_index = True) 
-    
-    # Total load demand (households + services)   
-    
-    load_total = load_tot_services + load_households
-    for column in load_total:
-        if column == 0:
-            continue
-        else: 
-            load_total[column] = load_total[column-1]*(1+demand_growth/100)    # yearly demand growth 
+    # columns ordered by scenario and year, as read by Initialize
+    load_total = pd.DataFrame(load.reshape(n_scenarios*years, -1).T)
 
     return load_total, years
     
     #%% Export results to excel
-def excel_export(load,years):
-    # Setting new column names based on the number of years
-    load = load.set_axis(np.arange(1, years+1), axis=1)
+def excel_export(load):
+    # Setting new column names based on the number of scenarios and years
+    load = load.set_axis(np.arange(1, load.shape[1]+1), axis=1)
     
     current_directory = os.path.dirname(os.path.abspath(__file__))
     inputs_directory = os.path.join(current_directory, '..', 'Inputs')
@@ -150,17 +173,42 @@ def excel_export(load,years):
 
 #%% Calculates and export the load demand  time series of households and services for 20 years to Demand.xlsx
 
-def demand_generation():
+def demand_generation(seed=None):
     start = time.time()
+    
+    current_directory = os.path.dirname(os.path.abspath(__file__))
+    inputs_directory = os.path.join(current_directory, '..', 'Inputs')
+    demand_file_path = os.path.join(inputs_directory, 'Demand.csv')
+    data_demand = open(os.path.join(inputs_directory, 'Parameters.dat')).readlines()
+    F, cooling_period, num_h_tier, num_services, demand_growth, years, periods = data_import(data_demand)
+    demand_scenario_generation, n_scenarios = scenario_import(data_demand)
+    stochastic = demand_scenario_generation == 1
+    parameters = {'zone': F, 'cooling_period': cooling_period, 'households': num_h_tier, 'services': num_services,
+                  'demand_growth': demand_growth, 'years': years, 'periods': periods,
+                  'scenarios': n_scenarios, 'Demand_Scenario_Generation': demand_scenario_generation, 'seed': seed if stochastic else None}
+    scenario_weight = [1/n_scenarios]*n_scenarios                                                                #stochastic scenarios are equally likely
+    
+    # Reuse Demand.csv if it was generated with the same parameters (and the same given seed, stochastic scenarios being drawn again without seed)
+    if (seed is not None or not stochastic) and generation_up_to_date(demand_file_path, parameters):
+        load_tot = pd.read_csv(demand_file_path, sep=';', decimal=',', index_col=0)
+        print("Load demand parameters unchanged: Demand.csv reused without regeneration\n")
+        load_tot = load_tot.set_axis(np.arange(1,load_tot.shape[1]+1), axis=1)
+        if demand_scenario_generation:
+            load_tot.attrs['Scenario_Weight'] = scenario_weight
+        return load_tot
         
     print("Load demand calculation started, please remember to close Demand.xlsx... \n")
-    load_tot, years = demand_calculation()
-    excel_export(load_tot,years)
-    
+    if seed is None:
+        seed = np.random.SeedSequence().entropy                                                                  #random seed, recorded to allow reproducing the scenarios
+    load_tot, years = demand_calculation(n_scenarios, stochastic, np.random.default_rng(seed))
+    excel_export(load_tot)
+    record_generation(demand_file_path, parameters, seed=seed)
     
     end = time.time()
     elapsed = end - start
-    load_tot = load_tot.set_axis(np.arange(1,years+1), axis=1)
+    load_tot = load_tot.set_axis(np.arange(1,load_tot.shape[1]+1), axis=1)
+    if demand_scenario_generation:
+        load_tot.attrs['Scenario_Weight'] = scenario_weight
     print('\n\nLoad demand calculation completed (overall time: ',round(elapsed,0),'s,', round(elapsed/60,1),' m)\n')
     return load_tot
 
@@ -1,180 +1,177 @@
 import math, numpy as np, pandas as pd
 import matplotlib.pyplot as plt
 from openpyxl import load_workbook
-import os
+import os, concurrent.futures
+from Input_Cache import generation_up_to_date, record_generation
+from Binary_Inputs import GRID_AVAILABILITY_PACKED, GRID_OUTAGES, save_packed_availability, save_outage_runs, load_grid_availability
 
 #%% Function returning as output a logical matrix (0 and 1) representing the availability of the grid, at hourly resolution
 
+lambda_TBO = 1620/60                                                                                    #Weibull scale factor for Time Between Outages distrib. (would need to be found from fitting with historical data, here taken from Kebede et al.)
+k_TBO = 0.77                                                                                            #Weibull shape factor for TBO distrib. (would need to be found from fitting with historical data, here taken from Kebede et al.)
+lambda_OD = 36/60                                                                                       #Weibull scale factor for Outage Duration distrib. (would need to be found from fitting with historical data, here taken from Kebede et al.)
+k_OD = 0.56                                                                                             #Weibull shape factor for OD distrib. (would need to be found from fitting with historical data, here taken from Kebede et al.)
+
 def Weibull_CDF(x,a,b):
     
-    y = 1-math.exp(-(x/a)**b)
+    y = 1-np.exp(-(np.asarray(x)/a)**b)
     return y
 
 def Weibull_distrib(x,a,b):
-    y = (b/(a**b)) * x**(b-1) * math.exp(-(x/a)**b)
+    x = np.asarray(x)
+    y = (b/(a**b)) * x**(b-1) * np.exp(-(x/a)**b)
     return y
 
-     
+def weibull_samples(rng, scale, shape, total):
+    """
+    Draws Weibull samples in batches until their sum reaches total, the last sample being cut to the remaining amount (rounded up).
+    """
+    batch = int(total/(scale*math.gamma(1 + 1/shape))) + 16                  #expected number of samples needed to reach total
+    samples = scale * rng.weibull(shape, size=batch)
+    while samples.sum() < total:
+        samples = np.concatenate([samples, scale * rng.weibull(shape, size=batch)])
+    cumulative = np.cumsum(samples)
+    n_samples = int(np.searchsorted(cumulative, total)) + 1
+    samples = samples[:n_samples]
+    samples[-1] = math.ceil(total - (cumulative[n_samples-2] if n_samples > 1 else 0))
+    return samples
 
-def grid_availability(average_n_outages, average_outage_duration, project_lifetime, year_grid_connection, scenarios, periods):  
+def availability_matrix(samples_TBO, samples_OD, periods, years):
+    """
+    Builds the (periods x years) availability matrix alternating periods available (TBO) and not available (OD),
+    cut at the lifetime length (periods not reached by the samples are available).
+    """
+    durations = np.column_stack([np.rint(samples_TBO), np.rint(samples_OD)]).astype(int).ravel()
+    grid = np.repeat(np.tile(np.array([1, 0], dtype=np.uint8), len(samples_TBO)), durations)[:periods*years]
+    grid = np.concatenate([grid, np.ones(periods*years - len(grid), dtype=np.uint8)])
+    return grid.reshape(years, periods).T
 
-    grid_lifetime = project_lifetime - year_grid_connection + 1                                   
-    lambda_TBO = 1620/60                                                                                    #Weibull scale factor for Time Between Outages distrib. (would need to be found from fitting with historical data, here taken from Kebede et al.)
-    k_TBO = 0.77                                                                                            #Weibull shape factor for TBO distrib. (would need to be found from fitting with historical data, here taken from Kebede et al.)
-    lambda_OD = 36/60                                                                                       #Weibull scale factor for Outage Duration distrib. (would need to be found from fitting with historical data, here taken from Kebede et al.)
-    k_OD = 0.56                                                                                             #Weibull shape factor for OD distrib. (would need to be found from fitting with historical data, here taken from Kebede et al.)
-    times1 = np.linspace(0.00001,math.ceil(lambda_TBO*((-math.log(1-0.9999))**(1/k_TBO))),num = 5*10**3)    #creates a vector of times between 0 and the time at which CDF= 0.9999
-    times2 = np.linspace(0.0001,math.ceil(lambda_OD*((-math.log(1-0.9999))**(1/k_OD))),num = 2*10**4)
-    CDF_TBO = [Weibull_CDF(x,lambda_TBO,k_TBO) for x in times1]                                     
-    CDF_OD = [Weibull_CDF(x,lambda_OD,k_OD) for x in times2]
-    distrib_TBO = [Weibull_distrib(x,lambda_TBO,k_TBO) for x in times1]
-    distrib_OD = [Weibull_distrib(x,lambda_OD,k_OD) for x in times2]
-    
-    PlotFormat = 'png'                  
-    PlotResolution = 400  
-    
-    '''
-    fig1 = plt.figure(dpi = 1000)
-    plt.plot(times1, CDF_TBO , 'r-', markersize=1)
-    x1,x2,y1,y2 = plt.axis()  
-    plt.axis((0,500, 0, max(CDF_TBO)))
-    plt.grid(axis='y', alpha=0.75)
-    plt.xlabel('Time Between Outages [h]',fontsize=10)
-    plt.title('Weibull Cumulative Distribution Function (TBO)',fontsize=10)
-    plt.autoscale()
-    fig1.savefig('Results/Plots/Weibull Cumulative Distribution Function (TBO).'+PlotFormat, dpi=PlotResolution, bbox_inches='tight')
-    
-    fig2 = plt.figure(dpi = 1000)
-    plt.plot(times2, CDF_OD , 'r-', markersize=1)
-    x1,x2,y1,y2 = plt.axis()  
-    plt.axis((0,20, y1,y2))
-    plt.grid(axis='y', alpha=0.75)
-    plt.xlabel('Outage Duration [h]',fontsize=10)
-    plt.title('Weibull Cumulative Distribution Function (OD)',fontsize=10)
-    plt.autoscale()
-    fig2.savefig('Results/Plots/Weibull Cumulative Distribution Function (OD).'+PlotFormat, dpi=PlotResolution, bbox_inches='tight')
-    
-    fig3 = plt.figure(dpi = 1000)
-    plt.plot(times1, distrib_TBO , 'r-', markersize=1)
-    plt.grid(axis='y', alpha=0.75)
-    plt.xlabel('Time Between Outages [h]',fontsize=10)
-    plt.title('Weibull Distribution (TBO)',fontsize=10)
+def sample_outages(rng, average_n_outages, average_outage_duration, grid_lifetime, periods):
+    """
+    Samples the times between outages and the outage durations [h] of one realization over the years of grid connection.
+    Returns the TBO samples, the OD samples and the factor k used to scale the TBO samples.
+    """
+    OD_tot = grid_lifetime * average_n_outages * average_outage_duration/60 
+    TBO_tot =  grid_lifetime*periods - OD_tot
+    samples_OD = weibull_samples(rng, lambda_OD, k_OD, OD_tot)           #samples from OD distribution until the sum is equal to OD_tot
+    samples_TBO = lambda_TBO * rng.weibull(k_TBO, size=len(samples_OD))   #same number of samples from TBO distribution, scaled so that the sum is equal to TBO_tot
+    k = abs(TBO_tot/(samples_TBO.sum()))
+    return samples_TBO*k, samples_OD, k
+
+def sample_availability(rng, average_n_outages, average_outage_duration, grid_lifetime, periods):
+    """
+    Samples one realization of the outages over the years of grid connection and returns the (periods x grid_lifetime) availability matrix.
+    """
+    samples_TBO, samples_OD, k = sample_outages(rng, average_n_outages, average_outage_duration, grid_lifetime, periods)
+    return availability_matrix(samples_TBO, samples_OD, periods, grid_lifetime)
+
+def scenario_availability(average_n_outages, average_outage_duration, grid_lifetime, scenarios, periods, seed):
+    """
+    Samples an independent realization for each scenario, in parallel, from random streams spawned from the seed.
+    The stream of scenario s depends only on the seed and s, so its realization does not change with the number of scenarios.
+    Returns the list of (periods x grid_lifetime) availability matrices.
+    """
+    streams = np.random.SeedSequence(seed).spawn(scenarios)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(scenarios, os.cpu_count() or 1)) as executor:
+        return list(executor.map(lambda stream: sample_availability(np.random.default_rng(stream), average_n_outages, average_outage_duration, grid_lifetime, periods), streams))
+
+def grid_availability(average_n_outages, average_outage_duration, project_lifetime, year_grid_connection, scenarios, periods, seed=None, outages_list=False):  
+    """
+    Samples the grid availability (0/1) of every scenario and writes it to Grid Availability.csv and,
+    bit-packed, to Grid Availability.npz (read by Initialize.py). With outages_list=True the outages
+    are also written as a run-length list (column, first period, duration) to Grid Outages.csv.
+    """
+
+    current_directory = os.path.dirname(os.path.abspath(__file__))
+    inputs_directory = os.path.join(current_directory, '..', 'Inputs')
+    filename = os.path.join(inputs_directory, 'Grid Availability.csv')
     
-    fig3.savefig('Results/Plots/Weibull Distribution (TBO).'+PlotFormat, dpi=PlotResolution, bbox_inches='tight')
+    # Reuse Grid Availability.csv if it was generated with the same parameters and the same given seed (without seed the outages are sampled again)
+    stochastic = not (average_n_outages == 0 and average_outage_duration == 0)
+    parameters = {'average_n_outages': average_n_outages, 'average_outage_duration': average_outage_duration, 'project_lifetime': project_lifetime,
+                  'year_grid_connection': year_grid_connection, 'scenarios': scenarios, 'periods': periods, 'seed': seed if stochastic else None}
+    if (seed is not None or not stochastic) and generation_up_to_date(filename, parameters):
+        print("Grid availability parameters unchanged: Grid Availability.csv reused without new sampling")
+        if outages_list:
+            save_outage_runs(os.path.join(inputs_directory, GRID_OUTAGES), load_grid_availability(periods, project_lifetime*scenarios, inputs_directory))
+        return
+    if seed is None:
+        seed = np.random.SeedSequence().entropy                                                              #random seed, recorded to allow reproducing the realization
+
+    grid_lifetime = project_lifetime - year_grid_connection + 1                                   
     
-    fig4 = plt.figure(dpi = 1000)
-    plt.plot(times2, distrib_OD , 'r-', markersize=1)
-    x1,x2,y1,y2 = plt.axis()  
-    plt.axis((0,max(times2), y1,y2))
-    plt.grid(axis='y', alpha=0.75)
-    plt.xlabel('Outage Duration [h]',fontsize=10)
-    plt.title('Weibull Distribution (OD)',fontsize=10)
-    fig4.savefig('Results/Plots/Weibull Distribution (OD).'+PlotFormat, dpi=PlotResolution, bbox_inches='tight')
-    '''
     #%% Make random sampling based on the obtained Weibull distributions and construct grid availability matrix
     if average_n_outages == 0 and average_outage_duration == 0:
-        grid_availability_lifetime = pd.concat([pd.DataFrame(np.zeros((periods, project_lifetime - grid_lifetime))),
-                                                pd.DataFrame(np.ones((periods, grid_lifetime)))], axis=1)
-        grid_availability_lifetime = grid_availability_lifetime.set_axis(range(1, project_lifetime + 1), axis=1)
+        scenario_matrices = [np.ones((periods, grid_lifetime), dtype=np.uint8)]*scenarios
     else:
-        rng = np.random.default_rng()
-        OD_tot = grid_lifetime * average_n_outages * average_outage_duration/60 
-        TBO_tot =  grid_lifetime*periods - OD_tot
-        samples_OD = []
-        while sum(samples_OD) < OD_tot:                     #construct samples from OD distribution until the sum is equal to OD_tot
-            spl = lambda_OD * rng.weibull(k_OD,size = 1)[0]
-            samples_OD.append(spl)                       
-            if sum(samples_OD) > OD_tot:
-                samples_OD[-1] = math.ceil(samples_OD[-1] - (sum(samples_OD)-OD_tot))
-        samples_TBO = []
-        while len(samples_TBO) < len(samples_OD):                    #construct samples from TBO distribution until the sum is equal to TBO_tot
-            spl = lambda_TBO * rng.weibull(k_TBO,size = 1)[0]
-            samples_TBO.append(spl)                            
-        k = abs(TBO_tot/(sum(samples_TBO)))
-        samples_TBO = np.multiply(samples_TBO,k).tolist()
-        n_samples = len(samples_OD)       
-        
-        
-        grid = []
-        for ii in range(0,n_samples):                               #populate the grid availability list [length 8760*20]
-                TBO = int(round(samples_TBO[ii]))
-                OD = int(round(samples_OD[ii]))
-                grid.extend([ii for ii in np.ones(TBO)])
-                grid.extend([ii for ii in np.zeros(OD)])
-                if len(grid) >= grid_lifetime * periods:
-                    for ii in range(len(grid)-grid_lifetime * periods):
-                        grid.pop(-ii)
-                    break
-           
-    
-        '''
-        density_TBO, bins_TBO = np.histogram(samples_TBO, bins = 500, density = True)    
-        distrib_TBO_scaled = [Weibull_distrib(x,lambda_TBO*k,k_TBO) for x in times1]
-        fig5 = plt.figure(dpi = 1000) 
-        plt.bar(bins_TBO[:-1],density_TBO,  width = (bins_TBO[1] - bins_TBO[0]), label='Samples', edgecolor = 'w')
-        plt.grid(axis='y', alpha=0.5)
-        plt.xlim([min(bins_TBO), 100])
-        plt.ylim(0,max(density_TBO))
-        plt.xlabel('Time Between Outages [h]',fontsize=10)
-        plt.title('Samples Distribution vs. Weibull distribution (TBO)',fontsize=10) 
-        plt.plot(times1, distrib_TBO_scaled , 'r--', linewidth=1, label='Weibull distrib.')
-        plt.legend(loc = 'upper right')
-        fig5.savefig('Results/Plots/Samples Distribution (TBO).'+PlotFormat, dpi=PlotResolution, bbox_inches='tight')
-        
-        
-        density_OD, bins_OD = np.histogram(samples_OD, bins = 500, density = True)
-        fig6 = plt.figure(dpi = 1000)
-        plt.bar(bins_OD[:-1],density_OD,  width = (bins_OD[1] - bins_OD[0]), label='Samples',edgecolor = 'w')
-        plt.grid(axis='y', alpha=0.75)
-        plt.xlim([min(bins_OD), 2])
-        plt.ylim(0,max(density_OD))
-        plt.xlabel('Outage Duration [h]',fontsize=10)
-        plt.title('Samples distribution vs. Weibull distribution (OD)',fontsize=10)
-        plt.plot(times2, distrib_OD, 'r--', linewidth = 1, label='Weibull distrib.')
-        plt.legend(loc = 'upper right')
-        fig6.savefig('Results/Plots/Samples distribution (OD).'+PlotFormat, dpi=PlotResolution, bbox_inches='tight')
-        '''
-                
-        grid_matrix = np.ones((periods, grid_lifetime))
-        year_count = 0
-        ff = 0
-        for ii in range(len(grid)):
-            if year_count == grid_lifetime:
-                break
-            grid_matrix[ff,year_count] = grid[ii]
-            ff = ff + 1
-            if ff == (periods - 1):
-                year_count = year_count +1
-                ff = 0
-        
-        grid_availability_lifetime = pd.concat([pd.DataFrame(np.zeros((periods,project_lifetime-grid_lifetime))), pd.DataFrame(grid_matrix)], axis = 1)
-        grid_availability_lifetime = grid_availability_lifetime.set_axis(range(1, project_lifetime + 1), axis=1)
-    
+        scenario_matrices = scenario_availability(average_n_outages, average_outage_duration, grid_lifetime, scenarios, periods, seed)
+
     print("Calculation of Grid Availability Matrix for " + str(grid_lifetime) + " years of grid connection completed" )
     
-    current_directory = os.path.dirname(os.path.abspath(__file__))
-    inputs_directory = os.path.join(current_directory, '..', 'Inputs')
-    filename = os.path.join(inputs_directory, 'Grid Availability.csv')
+    # No grid before the year of grid connection
+    all_scenarios_grid_availability = np.hstack([np.hstack([np.zeros((periods, project_lifetime - grid_lifetime), dtype=np.uint8), matrix]) for matrix in scenario_matrices])
 
-    # Repeat the grid availability matrix for each scenario
-    all_scenarios_grid_availability = grid_availability_lifetime
-    for scenario in range(1, scenarios):
-        # Adjust the column index to start from last column index + 1
-        scenario_grid_availability = grid_availability_lifetime.copy()
-        scenario_grid_availability.columns = range(grid_availability_lifetime.shape[1] * scenario + 1, grid_availability_lifetime.shape[1] * (scenario + 1) + 1)
+    # Save the concatenated grid availability matrix (0/1 integers) and its bit-packed copy
+    pd.DataFrame(all_scenarios_grid_availability, columns=range(1, project_lifetime*scenarios + 1), copy=False).to_csv(filename, index=False, sep=';')
+    save_packed_availability(os.path.join(inputs_directory, GRID_AVAILABILITY_PACKED), all_scenarios_grid_availability, filename)
+    if outages_list:
+        save_outage_runs(os.path.join(inputs_directory, GRID_OUTAGES), all_scenarios_grid_availability)
+    record_generation(filename, parameters, seed=seed, scenario_streams='SeedSequence(seed).spawn(scenarios)')
+    return
     
-        # Concatenate the scenario grid to the main grid
-        all_scenarios_grid_availability = pd.concat([all_scenarios_grid_availability, scenario_grid_availability], axis=1)
 
-    # Save the concatenated grid availability matrix
-    all_scenarios_grid_availability.to_csv(filename, index=False, sep=';')
-    return 
+#%% Diagnostics of the outage sampling (Weibull distributions and sampled TBO/OD), computed only when requested
+
+def grid_availability_diagnostics(average_n_outages, average_outage_duration, project_lifetime, year_grid_connection, periods, seed=None, plot_directory=None):
+    """
+    Plots the Weibull CDF and probability density of the time between outages (TBO) and outage duration (OD),
+    and the distribution of the samples of one realization against the fitted Weibull distribution.
+
+    Parameters:
+    average_n_outages (float): Average number of outages per year.
+    average_outage_duration (float): Average outage duration [min].
+    project_lifetime (int): Number of years of the project.
+    year_grid_connection (int): Year of grid connection.
+    periods (int): Number of periods per year.
+    seed (int): Seed of the realization (e.g. the one recorded in Grid Availability_parameters.json); the stream of scenario 1 is used.
+    plot_directory (str): Folder of the plots (default: Results/Plots).
+    """
+    current_directory = os.path.dirname(os.path.abspath(__file__))
+    plot_directory = plot_directory or os.path.join(current_directory, '..', 'Results', 'Plots')
+    PlotFormat = 'png'                  
+    PlotResolution = 400  
     
+    grid_lifetime = project_lifetime - year_grid_connection + 1
+    times1 = np.linspace(0.00001,math.ceil(lambda_TBO*((-math.log(1-0.9999))**(1/k_TBO))),num = 5*10**3)    #creates a vector of times between 0 and the time at which CDF= 0.9999
+    times2 = np.linspace(0.0001,math.ceil(lambda_OD*((-math.log(1-0.9999))**(1/k_OD))),num = 2*10**4)
+    stream = np.random.SeedSequence(seed).spawn(1)[0]
+    samples_TBO, samples_OD, k = sample_outages(np.random.default_rng(stream), average_n_outages, average_outage_duration, grid_lifetime, periods)
     
+    curves = [(times1, Weibull_CDF(times1,lambda_TBO,k_TBO), 'Time Between Outages [h]', 'Weibull Cumulative Distribution Function (TBO)'),
+              (times2, Weibull_CDF(times2,lambda_OD,k_OD), 'Outage Duration [h]', 'Weibull Cumulative Distribution Function (OD)'),
+              (times1, Weibull_distrib(times1,lambda_TBO,k_TBO), 'Time Between Outages [h]', 'Weibull Distribution (TBO)'),
+              (times2, Weibull_distrib(times2,lambda_OD,k_OD), 'Outage Duration [h]', 'Weibull Distribution (OD)')]
+    for times, values, xlabel, title in curves:
+        fig = plt.figure()
+        plt.plot(times, values, 'r-', markersize=1)
+        plt.grid(axis='y', alpha=0.75)
+        plt.xlabel(xlabel,fontsize=10)
+        plt.title(title,fontsize=10)
+        fig.savefig(os.path.join(plot_directory, title + '.' + PlotFormat), dpi=PlotResolution, bbox_inches='tight')
+        plt.close(fig)
     
-
-
-
-
-
-
+    fits = [(samples_TBO, times1, Weibull_distrib(times1,lambda_TBO*k,k_TBO), 100, 'Time Between Outages [h]', 'Samples Distribution (TBO)'),
+            (samples_OD, times2, Weibull_distrib(times2,lambda_OD,k_OD), 2, 'Outage Duration [h]', 'Samples Distribution (OD)')]
+    for samples, times, distrib, xmax, xlabel, title in fits:
+        density, bins = np.histogram(samples, bins = 500, density = True)
+        fig = plt.figure()
+        plt.bar(bins[:-1],density,  width = (bins[1] - bins[0]), label='Samples', edgecolor = 'w')
+        plt.grid(axis='y', alpha=0.5)
+        plt.xlim([min(bins), xmax])
+        plt.ylim(0,max(density))
+        plt.xlabel(xlabel,fontsize=10)
+        plt.title(title + ' vs. Weibull distribution',fontsize=10) 
+        plt.plot(times, distrib , 'r--', linewidth=1, label='Weibull distrib.')
+        plt.legend(loc = 'upper right')
+        fig.savefig(os.path.join(plot_directory, title + '.' + PlotFormat), dpi=PlotResolution, bbox_inches='tight')
+        plt.close(fig)
@@ -19,11 +19,15 @@ Based on the original model by:
 
 
 import pandas as pd
+import numpy as np
 import re
 import os
 from RE_calculation import RE_supply
 from Demand import demand_generation
 from Grid_Availability import grid_availability as grid_avail
+from Input_Preprocessing import run_generators, add_scenario_weights, load_model_data
+from Binary_Inputs import load_time_series, read_input_csv, load_grid_availability
+from Input_Cache import cached_array, cache_statistics
 
 
 #%% This section extracts the values of Scenarios, Periods, Years from data.dat and creates ranges for them
@@ -43,6 +47,10 @@ Data_import = open(data_file_path).readlines()
 
 Fuel_Specific_Start_Cost = []
 Fuel_Specific_Cost_Rate = []
+Input_Cache = 1
+RES_Scenario_Generation = 0
+Demand_Scenario_Generation = 0
+Random_Seed = 0
 
 for i in range(len(Data_import)):
     if "param: Scenarios" in Data_import[i]:
@@ -107,6 +115,14 @@ for i in range(len(Data_import)):
         debt_share = float((re.findall("\d+\.\d+|\d+",Data_import[i])[0]))
     if "param: Real_Discount_Rate" in Data_import[i]:      
         Discount_Rate_default = float((re.findall("\d+\.\d+|\d+|\d+",Data_import[i])[0]))
+    if "param: Input_Cache" in Data_import[i]:      
+        Input_Cache = int((re.findall('\d+',Data_import[i])[0]))
+    if "param: RES_Scenario_Generation" in Data_import[i]:      
+        RES_Scenario_Generation = int((re.findall('\d+',Data_import[i])[0]))
+    if "param: Demand_Scenario_Generation" in Data_import[i]:      
+        Demand_Scenario_Generation = int((re.findall('\d+',Data_import[i])[0]))
+    if "param: Random_Seed" in Data_import[i]:      
+        Random_Seed = int((re.findall('\d+',Data_import[i])[0]))
     if "param: Fuel_Specific_Start_Cost" in Data_import[i]:
         for j in range(n_generators):
             Fuel_Specific_Start_Cost.append(float((re.findall("\d+\s+(\d+\.\d+|\d+)",Data_import[i+1+j])[0])))
@@ -120,43 +136,55 @@ year = [i for i in range(1,n_years+1)]
 period = [i for i in range(1,n_periods+1)]
 generator = [i for i in range(1,n_generators+1)]
 
+#%% This section runs the endogenous input generators (independent of each other) concurrently
+
+# Random_Seed = 0 draws a new seed in each generator (recorded with its output), any other value reproduces the scenarios
+seed = Random_Seed or None
+generation_stages = {}
+if Demand_Profile_Generation:
+    generation_stages['Load demand'] = (demand_generation, (seed,))
+if RE_Supply_Calculation:
+    generation_stages['RES time series'] = (RE_supply, (seed,))
+if Grid_Connection == 1 and Grid_Availability_Simulation:
+    generation_stages['Grid availability'] = (grid_avail, (average_n_outages, average_outage_duration, n_years, year_grid_connection, n_scenarios, n_periods, seed))
+generated_inputs = run_generators(generation_stages)
+
+# Scenario weights of the generated scenarios, replacing the ones of Parameters.dat when the instance is created
+Generated_Scenario_Weight = {}
+
+def Load_Model_Data(model, datapath=data_file_path):
+    """
+    Loads the parameters of the data file, replacing Scenario_Weight with the weights of the generated scenarios (if any).
+
+    Parameters:
+    model (object): The abstract model.
+    datapath (str): Path of the .dat file.
+
+    Returns:
+    DataPortal: The data used to create the model instance.
+    """
+    return load_model_data(model, datapath, Generated_Scenario_Weight)
+
 #%% This section imports, generates and plots the different types of demands
 
 if Demand_Profile_Generation:
-    Demand = demand_generation()
+    Demand = generated_inputs['Load demand']
+    if Demand_Scenario_Generation:
+        add_scenario_weights(Generated_Scenario_Weight, Demand.attrs['Scenario_Weight'], 'Load demand generation')
     Demand.columns = Demand.columns.map(str)
     print("Electric demand data generated endogenously using archetypes")
 else:
-    delimiters = [(',', '.'), (';', ','), (';', '.')]
-    loaded_successfully = False
-    for delimiter, decimal in delimiters:
-        try:
-            # Set index_col to 0 if the first column is the index
-            Demand = pd.read_csv(demand_file_path, delimiter=delimiter, decimal=decimal, header=0, index_col=0)
-            print(f"Demand data loaded exogenously using delimiter '{delimiter}' and decimal '{decimal}'")
-            loaded_successfully = True
-            break
-        except pd.errors.ParserError:
-            print(f"Failed to load with delimiter '{delimiter}' and decimal '{decimal}'. Trying next combination...")
-        except FileNotFoundError:
-            print(f"File not found: {demand_file_path}. Please check the file path and try again.")
-            raise
-        except Exception as e:
-            print(f"An unexpected error occurred: {e}. Trying next combination...")
-    
-    if not loaded_successfully:
-        print("Error during import of Demand.csv: unable to automatically detect delimiter and decimal. Please try again using delimiter ';' or ',' and decimal ',' or '.'.")
-        raise ValueError("Failed to load demand data with all provided delimiter and decimal combinations.")
+    Demand = load_time_series('Demand', use_cache=Input_Cache)
 
 # Validate DataFrame dimensions against expected years and periods
-expected_columns = len(year)  # Expected number of data columns, excluding the index
+expected_columns = len(scenario)*len(year)  # Expected number of data columns (one per scenario and year), excluding the index
 expected_rows = len(period)
 
 # Validate columns
 if Demand.shape[1] < expected_columns:
-    raise ValueError(f"Number of columns in the file ({Demand.shape[1]}) is less than the expected number of years ({expected_columns}): unable to proceed. Please check the Demand.csv file.")
+    raise ValueError(f"Number of columns in the file ({Demand.shape[1]}) is less than the expected number of scenarios x years ({expected_columns}): unable to proceed. Please check the Demand.csv file.")
 elif Demand.shape[1] > expected_columns:
-    print(f"Warning: Number of columns in the file ({Demand.shape[1]}) exceeds the expected number of years ({expected_columns}). Considering only the first {expected_columns} columns.")
+    print(f"Warning: Number of columns in the file ({Demand.shape[1]}) exceeds the expected number of scenarios x years ({expected_columns}). Considering only the first {expected_columns} columns.")
     Demand = Demand.iloc[:, :expected_columns]
 
 # Validate rows
@@ -212,31 +240,13 @@ def Initialize_Demand(model, s, y, t):
 #%% This section imports or generates the renewables and temperature time series data 
 
 if RE_Supply_Calculation == 0: 
-    delimiters = [(',', '.'), (';', ','), (';', '.')]
-    loaded_successfully = False
-    for delimiter, decimal in delimiters:
-        try:
-            # Set index_col to 0 if the first column is the index
-            Renewable_Energy = pd.read_csv(res_file_path, delimiter=delimiter, decimal=decimal, header=0, index_col=0)
-            print(f"Renewables Time Series data loaded exogenously using delimiter '{delimiter}' and decimal '{decimal}'")
-            loaded_successfully = True
-            break
-        except pd.errors.ParserError:
-            print(f"Failed to load with delimiter '{delimiter}' and decimal '{decimal}'. Trying next combination...")
-        except FileNotFoundError:
-            print(f"File not found: {res_file_path}. Please check the file path and try again.")
-            raise
-        except Exception as e:
-            print(f"An unexpected error occurred: {e}. Trying next combination...")
-    
-    if not loaded_successfully:
-        print("Error during import of RES_Time_Series.csv: unable to automatically detect delimiter and decimal. Please try again using delimiter ';' or ',' and decimal ',' or '.'.")
-        raise ValueError("Failed to load renewables data with all provided delimiter and decimal combinations.")
-    
+    Renewable_Energy = load_time_series('RES_Time_Series', use_cache=Input_Cache)
     plot_path = os.path.join(results_directory, 'Renewables Availability.png')
 else:
-    Renewable_Energy = RE_supply()
-    Renewable_Energy = Renewable_Energy.set_index(pd.Index(range(1, n_periods+1)), inplace=False)
+    Renewable_Energy = generated_inputs['RES time series']
+    if RES_Scenario_Generation:
+        add_scenario_weights(Generated_Scenario_Weight, Renewable_Energy.attrs['Scenario_Weight'], 'RES time series generation')
+    Renewable_Energy = Renewable_Energy.iloc[:, 1:].set_index(pd.Index(range(1, n_periods+1)), inplace=False)     #first column is the period counter
     print("Renewables Time Series data generated endogenously using NASA POWER")
 
 def Initialize_RES_Energy(model, s, r, t):
@@ -399,10 +409,25 @@ def Initialize_Battery_Minimum_Capacity(model,ut):
 
 #%% This section initializes parameters related to generators and fuels
 
+# Fuel specific cost table (generator type x year), loaded or computed once
+if Fuel_Specific_Cost_Calculation == 1 and Fuel_Specific_Cost_Import == 1:
+    fuel_cost_data = cached_array(fuel_file_path, lambda f, index_col: read_input_csv(f, index_col, 'Diesel Fuel prices').apply(pd.to_numeric).to_numpy(dtype=float),
+                                  enabled=Input_Cache, index_col=0)
+    if fuel_cost_data.shape[1] < n_generators:
+        raise ValueError(f"Number of columns in the file ({fuel_cost_data.shape[1]}) is less than the number of generator types ({n_generators}): unable to proceed. Please check the Fuel Specific Cost.csv file.")
+    if fuel_cost_data.shape[0] < n_years:
+        raise ValueError(f"Number of rows in the file ({fuel_cost_data.shape[0]}) is less than the expected number of years ({n_years}): unable to proceed. Please check the Fuel Specific Cost.csv file.")
+
+    Fuel_Specific_Cost_Table = np.array(fuel_cost_data[:n_years, :n_generators]).T
+elif Fuel_Specific_Cost_Calculation == 1 and Fuel_Specific_Cost_Import == 0:
+    # Constant yearly escalation: cost(y) = start cost * (1 + rate)^(y-1)
+    Fuel_Specific_Cost_Table = np.array(Fuel_Specific_Start_Cost)[:, None] * (1 + np.array(Fuel_Specific_Cost_Rate)[:, None])**np.arange(n_years)[None, :]
+
 def Initialize_Fuel_Specific_Cost(model, g, y):
     """
-    Initializes the specific cost of fuel for a generator type and a specific year. The function supports
-    importing data from a file or calculating the cost based on a rate of increase.
+    Initializes the specific cost of fuel for a generator type and a specific year. The values are
+    looked up in Fuel_Specific_Cost_Table, which is either imported from Fuel Specific Cost.csv or
+    calculated from a constant rate of increase when this module is loaded.
 
     Parameters:
     model (object): The model for which the fuel cost is being initialized.
@@ -412,45 +437,8 @@ def Initialize_Fuel_Specific_Cost(model, g, y):
     Returns:
     float: The specific fuel cost for the given generator type and year.
     """
-    if Fuel_Specific_Cost_Calculation == 1 and Fuel_Specific_Cost_Import == 1:
-        delimiters = [(',', '.'), (';', ','), (';', '.')]
-        loaded_successfully = False
-        for delimiter, decimal in delimiters:
-            try:
-                # Set index_col to 0 if the first column is the index
-                fuel_cost_data = pd.read_csv(res_file_path, delimiter=delimiter, decimal=decimal, header=0)
-                print(f"Diesel Fuel prices loaded exogenously using delimiter '{delimiter}' and decimal '{decimal}'")
-                loaded_successfully = True
-                break
-            except pd.errors.ParserError:
-                print(f"Failed to load with delimiter '{delimiter}' and decimal '{decimal}'. Trying next combination...")
-            except FileNotFoundError:
-                print(f"File not found: {res_file_path}. Please check the file path and try again.")
-                raise
-            except Exception as e:
-                print(f"An unexpected error occurred: {e}. Trying next combination...")
-    
-        if not loaded_successfully:
-            print("Error during import of Fuel_Costs.csv: unable to automatically detect delimiter and decimal. Please try again using delimiter ';' or ',' and decimal ',' or '.'.")
-            raise ValueError("Failed to load fuel cost data with all provided delimiter and decimal combinations.")
-
-        # Create a dictionary for fuel costs
-        fuel_cost_dict = {(int(gen_type), int(year)): fuel_cost_data.at[year, gen_type]
-                      for gen_type in fuel_cost_data.columns
-                      for year in fuel_cost_data.index}
-        return fuel_cost_dict[(g, y)]
-    elif Fuel_Specific_Cost_Calculation == 1 and Fuel_Specific_Cost_Import == 0:
-        years = range(1, n_years+1)
-        fuel_cost_dict = {}
-        for gen_type in range(n_generators):
-            previous_cost = Fuel_Specific_Start_Cost[gen_type]
-            for year in years:
-                if year == 1: 
-                    cost = previous_cost
-                else: cost = previous_cost * (1 + Fuel_Specific_Cost_Rate[gen_type])
-                fuel_cost_dict[(gen_type + 1, year)] = cost
-                previous_cost = cost
-        return fuel_cost_dict[(g, y)]
+    if Fuel_Specific_Cost_Calculation == 1:
+        return float(Fuel_Specific_Cost_Table[g-1, y-1])
         
 def Initialize_Fuel_Specific_Cost_1(model, g):
     """
@@ -569,65 +557,35 @@ def Initialize_Generator_Marginal_Cost_milp_1(model,g):
 
 # Reading grid availability data
 if Grid_Connection == 1:
-    if Grid_Availability_Simulation: 
-        grid_avail(average_n_outages, average_outage_duration, n_years, year_grid_connection, n_scenarios, n_periods)
-        availability = pd.read_csv(grid_file_path, delimiter=';', header=0)
-    else:
-        availability = pd.read_csv(grid_file_path, delimiter=';', header=0)
+    availability = load_grid_availability(n_periods, n_years * n_scenarios, use_cache=Input_Cache)
+    if availability.shape[0] < n_periods or availability.shape[1] < n_years * n_scenarios:
+        raise ValueError(f"Grid Availability data has {availability.shape[1]} columns of {availability.shape[0]} periods: "
+                         f"{n_years * n_scenarios} columns (years x scenarios) of {n_periods} periods are required")
 
-    # Create grid_availability Series
-    grid_availability_Series = pd.Series()
-    for i in range(1, n_years * n_scenarios + 1):
-        dum = availability[str(i)]
-        grid_availability_Series = pd.concat([s for s in [grid_availability_Series, dum] if not s.empty])
+    # (scenarios x years x periods) uint8 array, column (s-1)*n_years + y of the input being scenario s and year y
+    grid_availability = availability[:n_periods, :n_years * n_scenarios].T.reshape(n_scenarios, n_years, n_periods)
 
-    grid_availability = pd.DataFrame(grid_availability_Series)
+# All the input files are loaded at this point
+if Input_Cache:
+    input_cache_stats = cache_statistics()
+    print(f"Input cache: {input_cache_stats['hits']} hits, {input_cache_stats['misses']} misses, {input_cache_stats['evicted']} evicted "
+          f"({input_cache_stats['entries']} entries, {round(input_cache_stats['size_MB'], 1)} MB)\n")
 
-    # Create a MultiIndex
-    frame = [scenario, year, period]
-    index = pd.MultiIndex.from_product(frame, names=['scenario', 'year', 'period'])
-    grid_availability.index = index
-
-    # Normalize the column name to 0 for consistency
-    if grid_availability.columns[0] != 0:
-        grid_availability.columns = [0]
-
-    # Create grid_availability_2 DataFrame
-    grid_availability_2 = pd.DataFrame()
-    for s in scenario:
-        grid_availability_Series_2 = pd.Series()
-        for y in year:
-            if Grid_Connection: 
-                dum_2 = availability[str((s - 1) * n_years + y)]
-            else: 
-                dum_2 = availability[(s - 1) * n_years + y]
-            grid_availability_Series_2 = pd.concat([s for s in [grid_availability_Series_2, dum_2] if not s.empty])
-        grid_availability_2[s] = grid_availability_Series_2
-
-    # Create a RangeIndex
-    index_2 = pd.RangeIndex(1, n_years * n_periods + 1)
-    grid_availability_2.index = index_2
-
-def Initialize_Grid_Availability(model, s, y, t): 
+def Initialize_Grid_Availability(model): 
     """
-    Initializes the grid availability based on the specified scenario, year, and time period.
+    Initializes the grid availability, listing only the periods in which the grid is not available 
+    (all the other periods take the default value of the parameter, 1 if the grid is connected).
 
     Parameters:
     model (object): The model for which the grid availability is being initialized.
-    s (int): The scenario number.
-    y (int): The year.
-    t (int): The time period.
 
     Returns:
-    float: The grid availability for the specified scenario, year, and time period.
+    dict: (scenario, year, period) -> 0 for every period without grid availability.
     """
-    if Grid_Connection: 
-        try:
-            return float(grid_availability[list(grid_availability.columns)[0]][(s, y, t)])
-        except KeyError:
-            return 0
-    else:
-        return 0
+    if not Grid_Connection:
+        return {}
+    outages = np.argwhere(grid_availability == 0) + 1
+    return dict.fromkeys(map(tuple, outages.tolist()), 0)
 
 def Initialize_National_Grid_Inv_Cost(model):
     """
@@ -0,0 +1,140 @@
+import numpy as np
+import hashlib, json, os, time
+
+#%% Content-addressed cache of parsed input files (validated NumPy arrays keyed by file hash and parser settings)
+
+current_directory = os.path.dirname(os.path.abspath(__file__))
+cache_directory = os.path.join(current_directory, '..', 'tmp', 'Input_Cache')
+
+CACHE_MAX_SIZE_MB = 500        # Total size above which the least recently used entries are evicted
+CACHE_MAX_AGE_DAYS = 30        # Entries not used for longer than this are evicted
+PARSER_VERSION = 1             # Increase when the parsing of the input files changes, to invalidate old entries
+
+cache_stats = {'hits': 0, 'misses': 0, 'evicted': 0}
+
+
+def file_hash(file_path):
+    """
+    Returns the SHA-256 digest of the content of a file.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(file_path, **settings):
+    """
+    Builds the cache key of a file from its content hash and the parser settings used to read it.
+    """
+    settings_str = ';'.join(f'{k}={settings[k]}' for k in sorted(settings))
+    digest = hashlib.sha256((file_hash(file_path) + '|' + settings_str + f'|v{PARSER_VERSION}').encode())
+    return digest.hexdigest()
+
+
+def cached_array(file_path, parser, enabled=True, directory=cache_directory, **settings):
+    """
+    Returns the array parsed from file_path, reading it from the cache when the same file content
+    has already been parsed with the same settings, and calling parser(file_path, **settings) otherwise.
+
+    Parameters:
+    file_path (str): Path of the input file.
+    parser (function): Function returning the validated array of the file.
+    enabled (bool): False to bypass the cache (the file is always parsed and nothing is stored).
+    directory (str): Cache folder.
+    settings: Parser settings, passed to parser and included in the cache key.
+
+    Returns:
+    ndarray: The parsed array.
+    """
+    if not enabled or not os.path.exists(file_path):
+        return parser(file_path, **settings)
+    os.makedirs(directory, exist_ok=True)
+    entry = os.path.join(directory, cache_key(file_path, **settings) + '.npy')
+    if os.path.exists(entry):
+        cache_stats['hits'] += 1
+        os.utime(entry)                          # refresh last use for age/size eviction
+        return np.load(entry, mmap_mode='r')
+    cache_stats['misses'] += 1
+    array = np.ascontiguousarray(parser(file_path, **settings), dtype=float)
+    np.save(entry, array)
+    evict(directory=directory)
+    return array
+
+
+def evict(max_size_mb=CACHE_MAX_SIZE_MB, max_age_days=CACHE_MAX_AGE_DAYS, directory=cache_directory, extension='.npy'):
+    """
+    Removes cache entries (files ending with extension) older than max_age_days, then the least
+    recently used entries until the total size of the cache is below max_size_mb.
+    """
+    if not os.path.isdir(directory):
+        return
+    entries = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(extension)]
+    entries = sorted(((os.path.getmtime(e), os.path.getsize(e), e) for e in entries), reverse=True)
+    now = time.time()
+    total_size = 0
+    for last_use, size, entry in entries:
+        total_size += size
+        if now - last_use > max_age_days*86400 or total_size > max_size_mb*2**20:
+            os.remove(entry)
+            cache_stats['evicted'] += 1
+            total_size -= size
+
+
+def clear_cache(directory=cache_directory):
+    """
+    Removes all the entries of the cache.
+    """
+    evict(max_size_mb=0, directory=directory)
+
+
+def cache_statistics(directory=cache_directory):
+    """
+    Returns hits, misses and evictions of the current session together with
+    the number of entries and the total size [MB] of the cache folder.
+    """
+    entries = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith('.npy')] if os.path.isdir(directory) else []
+    return dict(cache_stats, entries=len(entries), size_MB=sum(os.path.getsize(e) for e in entries)/2**20)
+
+
+#%% Memoization of the generated inputs (Demand.csv, RES_Time_Series.csv, Grid Availability.csv)
+
+def generation_record_path(output_path):
+    """
+    Returns the path of the file recording the parameters used to generate output_path.
+    """
+    return os.path.splitext(output_path)[0] + '_parameters.json'
+
+
+def generation_up_to_date(output_path, parameters):
+    """
+    Checks whether output_path was generated with exactly the given parameters and has not been modified since.
+
+    Parameters:
+    output_path (str): Path of the generated input file.
+    parameters (dict): Input parameters (JSON serializable) of the generator.
+
+    Returns:
+    dict or None: The generation record if the previous output can be reused, None otherwise.
+    """
+    record_path = generation_record_path(output_path)
+    if not (os.path.exists(output_path) and os.path.exists(record_path)):
+        return None
+    try:
+        with open(record_path) as f:
+            record = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if record.get('parameters') != json.loads(json.dumps(parameters, default=str)) or record.get('output_hash') != file_hash(output_path):
+        return None
+    return record
+
+
+def record_generation(output_path, parameters, **extra):
+    """
+    Records the parameters (and any extra information, e.g. the RNG seed) used to generate output_path.
+    """
+    record = dict(extra, parameters=parameters, output_hash=file_hash(output_path))
+    with open(generation_record_path(output_path), 'w') as f:
+        json.dump(record, f, indent=4, default=str)
@@ -0,0 +1,75 @@
+import concurrent.futures, math, time
+from pyomo.environ import DataPortal
+
+#%% Concurrent execution of the independent input generators (RES time series, load demand, grid availability)
+
+def timed_stage(function, args):
+    """
+    Runs function(*args) and returns its output together with the elapsed time [s].
+    """
+    start = time.time()
+    output = function(*args)
+    return output, time.time() - start
+
+
+def run_generators(stages):
+    """
+    Runs the input generation stages concurrently in a thread pool and joins their outputs.
+    The stages do not depend on each other, so the overall preparation time is the one of the slowest stage.
+
+    Parameters:
+    stages (dict): Stage name -> (function, tuple of arguments).
+
+    Returns:
+    dict: Stage name -> output of the stage.
+    """
+    if not stages:
+        return {}
+    start = time.time()
+    outputs = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(stages)) as executor:
+        futures = {name: executor.submit(timed_stage, function, args) for name, (function, args) in stages.items()}
+        for name, future in futures.items():
+            outputs[name], elapsed = future.result()
+            print(f"{name} generation time: {round(elapsed, 1)} s")
+    print(f"Input preparation completed (overall time: {round(time.time() - start, 1)} s)\n")
+    return outputs
+
+
+def add_scenario_weights(scenario_weights, weights, source):
+    """
+    Adds the weights of the scenarios generated by source to scenario_weights, checking that they match
+    the weights of the scenarios already generated by the other generators (e.g. load demand and RES time series).
+
+    Parameters:
+    scenario_weights (dict): Scenario (from 1) -> weight of the scenarios generated so far, updated in place.
+    weights (list): Weight of each scenario generated by source.
+    source (str): Name of the generator, used in the error messages.
+    """
+    if scenario_weights:
+        if len(weights) != len(scenario_weights):
+            raise ValueError(f"{source} generated {len(weights)} scenarios, but the other generated inputs have {len(scenario_weights)} scenarios: "
+                             "the stochastic scenarios of the generators must be the same number")
+        if not all(math.isclose(weight, scenario_weights[s]) for s, weight in enumerate(weights, 1)):
+            raise ValueError(f"The scenario weights of {source} ({list(weights)}) differ from the ones of the other generated inputs "
+                             f"({list(scenario_weights.values())}): the stochastic scenarios of the generators must have the same weights")
+    scenario_weights.update(enumerate(weights, 1))
+
+
+def load_model_data(model, datapath, scenario_weights):
+    """
+    Loads the parameters of the data file, replacing Scenario_Weight with the weights of the generated scenarios (if any).
+
+    Parameters:
+    model (object): The abstract model.
+    datapath (str): Path of the .dat file.
+    scenario_weights (dict): Scenario (from 1) -> weight of the generated scenarios, empty if no scenarios were generated.
+
+    Returns:
+    DataPortal: The data used to create the model instance.
+    """
+    data = DataPortal(model=model)
+    data.load(filename=datapath)
+    if scenario_weights:
+        data.data()['Scenario_Weight'] = dict(scenario_weights)
+    return data
@@ -21,6 +21,7 @@ instance = Model_Resolution(model)
 Time_Series       = TimeSeries(instance)
 Optimization_Goal = instance.Optimization_Goal.extract_values()[None]
 Results           = ResultsSummary(instance, Optimization_Goal,Time_Series) 
+Results.export()
 
 #%% Plot and print-out
 PlotScenario = 1                     # Plot scenario
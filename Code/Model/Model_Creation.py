@@ -2,6 +2,7 @@
 
 from pyomo.environ import Param, RangeSet, Any, NonNegativeReals, NonNegativeIntegers, Var, Set, Reals, Binary 
 from Initialize import * # Import library with initialitation functions for the parameters
+from Results import TIME_SERIES_FORMATS
 
 def Model_Creation(model):
 
@@ -36,6 +37,7 @@ def Model_Creation(model):
     model.turbine_type = Param(within=Any)							
     model.turbine_model = Param(within=Any)				 	
     model.drivetrain_efficiency = Param(within=Any)             			
+    model.RES_Scenario_Generation = Param(within=NonNegativeIntegers, default=0)         # 0 typical year in every scenario, 1 one RES scenario per historical year, 2 RES scenarios bootstrapped from monthly blocks of the historical years
         
     "Demand Estimation parameters"
     model.demand_growth = Param(within=Any) 							
@@ -51,6 +53,7 @@ def Model_Creation(model):
     model.hospital_3 = Param(within=Any)  							
     model.hospital_4 = Param(within=Any)  						
     model.hospital_5 = Param(within=Any)					
+    model.Demand_Scenario_Generation = Param(within=Binary, default=0)        # 0 same load demand in every scenario, 1 stochastic load demand scenarios drawn from the archetypes
       
     "Project parameters"
     model.Periods                           = Param(within=NonNegativeIntegers)                          # Number of periods of analysis of the energy variables
@@ -97,10 +100,14 @@ def Model_Creation(model):
     model.Plot_Max_Cost                     = Param(within=Binary)                                    # 1 if the Pareto curve has to include the point at maxNPC/maxOperationCost, 0 otherwise
     model.Model_Components                  = Param(within=NonNegativeIntegers)                       # 0 for batteries and generators, 1 for batteries only, 2 for generators only
     model.WACC_Calculation                  = Param(within=Binary)                                    # 1 to select Weighted Average Cost of Capital calculation, 0 otherwise
+    model.Input_Cache                       = Param(within=Binary, default=1)                         # 1 to reuse input files already parsed (content-addressed cache in tmp/Input_Cache), 0 to always parse them
+    model.Random_Seed                       = Param(within=NonNegativeIntegers, default=0)            # Seed of the demand, RES and grid availability scenario generators, 0 for a new random seed at each run
     model.Fuel_Specific_Cost_Import         = Param(within=Binary)                                    # 1 to import variable fuel specific cost from csv file (only if Fuel_Specific_Cost_Calculation activated)
     model.Fuel_Specific_Cost_Calculation    = Param(within=Binary)                                    # 1 to allows variable fuel specific cost across the years, 0 otherwise
     model.Land_Use                          = Param(within=Binary)                                    # 1 to activate the constraint on the total land use, 0 otherwise
     model.Solver                            = Param(within=NonNegativeIntegers)                       # 0 for Gurobi, 1 for GLPK and 2 for HiGHS (currently NOT available)
+    model.Time_Series_Format                = Param(within=Set(initialize=sorted(TIME_SERIES_FORMATS)),
+                                                    default = 1)                                      # Time series export: 0 for Excel, 1 for compressed csv (default), 2 for Parquet, 3 for HDF5
     
     "Sets"
     model.periods                           = RangeSet(1, model.Periods)                                  # Creation of a set from 1 to the number of periods in each year
@@ -254,7 +261,8 @@ def Model_Creation(model):
     model.Grid_Availability                    = Param(model.scenarios,
                                                        model.years,
                                                        model.periods,
-                                                       within=Any,
+                                                       within=Binary,
+                                                       default = Grid_Connection,                 # only the periods without grid are stored
                                                        initialize = Initialize_Grid_Availability)
     model.Grid_Average_Number_Outages          = Param(within=NonNegativeReals) 
     model.Grid_Average_Outage_Duration         = Param(within=NonNegativeReals)                
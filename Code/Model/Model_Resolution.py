@@ -13,6 +13,7 @@ import matplotlib
 from matplotlib import pyplot as plt
 import re
 import os
+from Initialize import Load_Model_Data
 
 matplotlib.use('Agg')  # Switch to 'Agg' backend to prevent GUI operations
 
@@ -340,7 +341,7 @@ def Model_Resolution(model, datapath=data_file_path, options_string="mipgap=0.05
             model.ObjectiveFuntion = Objective(rule=C.Total_Variable_Cost_Obj, 
                                                sense = minimize)
 
-        instance = model.create_instance(datapath) # load parameters
+        instance = model.create_instance(Load_Model_Data(model, datapath)) # load parameters
     
         print('\nInstance created')
         
@@ -423,7 +424,7 @@ def Model_Resolution(model, datapath=data_file_path, options_string="mipgap=0.05
             
             #NPC min and CO2 emission max calculation
             model.ObjectiveFuntion1.deactivate()
-            instance = model.create_instance(datapath)
+            instance = model.create_instance(Load_Model_Data(model, datapath))
             if Solver == 0:
                 opt = SolverFactory('gurobi')
                 if MILP_Formulation:
@@ -451,7 +452,7 @@ def Model_Resolution(model, datapath=data_file_path, options_string="mipgap=0.05
             #NPC max and CO2 emission min calculation
             model.ObjectiveFuntion.deactivate()
             model.ObjectiveFuntion1.activate()
-            instance = model.create_instance(datapath)
+            instance = model.create_instance(Load_Model_Data(model, datapath))
             print('Optimizing only for minimum CO2 emissions...')
             results = opt.solve(instance, tee=True)  # Solve the model instance
             instance.solutions.load_from(results)    # Load the solution into the instance
@@ -465,7 +466,7 @@ def Model_Resolution(model, datapath=data_file_path, options_string="mipgap=0.05
             # Second Optimization: Minimize cost while constraining emissions to the minimum value found
             model.ObjectiveFuntion.activate()     # Reactivate cost minimization objective
             model.ObjectiveFuntion1.deactivate()  # Ensure emissions objective is deactivated
-            instance = model.create_instance(datapath)
+            instance = model.create_instance(Load_Model_Data(model, datapath))
             instance.CO2 = Param(initialize=CO2emission_min, mutable=True)
             instance.CO2_fixed = Constraint(expr = instance.f2 == instance.CO2)
 
@@ -479,7 +480,7 @@ def Model_Resolution(model, datapath=data_file_path, options_string="mipgap=0.05
             model.ObjectiveFuntion.activate()
             model.ObjectiveFuntion1.deactivate()        
 
-            instance = model.create_instance(datapath)
+            instance = model.create_instance(Load_Model_Data(model, datapath))
             instance.e = Param(initialize=0, mutable=True)
             instance.C_e = Constraint(expr = instance.f2 == instance.e)
             
@@ -570,7 +571,7 @@ def Model_Resolution(model, datapath=data_file_path, options_string="mipgap=0.05
                         
             #NPC min and CO2 emission max calculation
             model.ObjectiveFuntion1.deactivate()
-            instance = model.create_instance(datapath)
+            instance = model.create_instance(Load_Model_Data(model, datapath))
             if Solver == 0:
                 opt = SolverFactory('gurobi')
                 if MILP_Formulation:
@@ -596,7 +597,7 @@ def Model_Resolution(model, datapath=data_file_path, options_string="mipgap=0.05
             #NPC max and CO2 emission min calculation
             model.ObjectiveFuntion.deactivate()
             model.ObjectiveFuntion1.activate()
-            instance = model.create_instance(datapath)
+            instance = model.create_instance(Load_Model_Data(model, datapath))
             print('Calling solver...')
             print('Optimizing only for minimum CO2 emissions...')
             opt.solve(instance, tee=True)
@@ -609,7 +610,7 @@ def Model_Resolution(model, datapath=data_file_path, options_string="mipgap=0.05
             # Second Optimization: Minimize cost while constraining emissions to the minimum value found
             model.ObjectiveFuntion.activate()     # Reactivate cost minimization objective
             model.ObjectiveFuntion1.deactivate()  # Ensure emissions objective is deactivated
-            instance = model.create_instance(datapath)
+            instance = model.create_instance(Load_Model_Data(model, datapath))
             instance.CO2 = Param(initialize=CO2emission_min, mutable=True)
             instance.CO2_fixed = Constraint(expr = instance.f2 == instance.CO2)
 
@@ -624,7 +625,7 @@ def Model_Resolution(model, datapath=data_file_path, options_string="mipgap=0.05
             model.ObjectiveFuntion.activate()
             model.ObjectiveFuntion1.deactivate()
 
-            instance = model.create_instance(datapath)
+            instance = model.create_instance(Load_Model_Data(model, datapath))
             instance.e = Param(initialize=0, mutable=True)
             instance.C_e = Constraint(expr = instance.f2 == instance.e)
 
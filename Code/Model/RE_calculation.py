@@ -1,13 +1,13 @@
-from collections import defaultdict
-import time, sys, concurrent.futures, urllib.request, urllib.parse, urllib.error    
-import pandas as pd, math, numpy as np, re, bisect, json, operator
-import os
+import time, concurrent.futures, urllib.request, urllib.parse, urllib.error, http.client, threading
+import pandas as pd, math, numpy as np, re, bisect, json
+import os, gzip, hashlib
+from Input_Cache import evict, file_hash, generation_up_to_date, record_generation
     
 #%% Input data section
 
 ### Import URL components for the POWER API by NASA and generate the URL (two different functions depending on time resolution)
 
-def URL_creation_d(Data_import):
+def URL_creation_d(Data_import, coordinates=None):
     for value in Data_import:
         if "param: base_URL" in value:
             base_URL = value[value.index('=')+1:value.index(';')].replace(' ','')
@@ -43,14 +43,17 @@ def URL_creation_d(Data_import):
     URL_1 = []
     URL_2 = []
     ''' Converts geographical coordinates in decimals'''       
-    if float(lat[0])!= 0:    
-        lat = lat[0] + np.sign(lat[0])*(lat[1]/60 + lat[2]/3600)
+    if coordinates is not None:                         #site given in decimal degrees (batch calculation)
+        lat, lon = coordinates
     else:
-        lat = lat[0]+ lat[1]/60 + lat[2]/3600
-    if float(lon[0])!= 0:    
-        lon = lon[0] + np.sign(lon[0])*(lon[1]/60 + lon[2]/3600)
-    else:
-        lon = lon[0] + lon[1]/60 + lon[2]/3600 
+        if float(lat[0])!= 0:    
+            lat = lat[0] + np.sign(lat[0])*(lat[1]/60 + lat[2]/3600)
+        else:
+            lat = lat[0]+ lat[1]/60 + lat[2]/3600
+        if float(lon[0])!= 0:    
+            lon = lon[0] + np.sign(lon[0])*(lon[1]/60 + lon[2]/3600)
+        else:
+            lon = lon[0] + lon[1]/60 + lon[2]/3600 
     lat_ext_1 = [math.floor(lat), math.ceil(lat)]        #grid boundaries of 1° x 1° spatial grid
     lon_ext_1 = [math.floor(lon), math.ceil(lon)]
     
@@ -74,7 +77,7 @@ def URL_creation_d(Data_import):
 
 
 
-def URL_creation_h(Data_import):
+def URL_creation_h(Data_import, coordinates=None):
     for value in Data_import:
         if "param: base_URL" in value:
             base_URL = value[value.index('=')+1:value.index(';')].replace(' ','')
@@ -102,14 +105,17 @@ def URL_creation_h(Data_import):
             lon = list(map(int, numbers.findall(lon)))
     URL = []
     ''' Converts geographical coordinates from in decimal degrees'''
-    if float(lat[0])!= 0:    
-        lat = lat[0] + np.sign(lat[0])*(lat[1]/60 + lat[2]/3600)
-    else:
-        lat = lat[0]+ lat[1]/60 + lat[2]/3600
-    if float(lon[0])!= 0:    
-        lon = lon[0] + np.sign(lon[0])*(lon[1]/60 + lon[2]/3600)
+    if coordinates is not None:                         #site given in decimal degrees (batch calculation)
+        lat, lon = coordinates
     else:
-        lon = lon[0] + lon[1]/60 + lon[2]/3600 
+        if float(lat[0])!= 0:    
+            lat = lat[0] + np.sign(lat[0])*(lat[1]/60 + lat[2]/3600)
+        else:
+            lat = lat[0]+ lat[1]/60 + lat[2]/3600
+        if float(lon[0])!= 0:    
+            lon = lon[0] + np.sign(lon[0])*(lon[1]/60 + lon[2]/3600)
+        else:
+            lon = lon[0] + lon[1]/60 + lon[2]/3600 
     
     lat_grid =  np.arange(-90, 90, 0.5)             
     lon_grid = np.arange(-180,180,0.625)
@@ -148,11 +154,25 @@ def solarPV_parameters(Data_import):
     
     return nom_power,tilt,azim,ro_ground, k_T, NMOT, T_NMOT, G_NMOT
 
+### Reads the number of scenarios and how the RES scenarios are generated from the historical years
+
+def RES_scenario_parameters(Data_import):
+    RES_scenario_generation = 0
+    n_scenarios = 1
+    for value in Data_import:
+        if "param: Scenarios" in value:
+            n_scenarios = int(value[value.index('=')+1:value.index(';')].replace(' ',''))
+        if "param: RES_Scenario_Generation" in value:
+            RES_scenario_generation = int(value[value.index('=')+1:value.index(';')].replace(' ',''))
+    
+    return RES_scenario_generation, n_scenarios
+
 # Wind turbine parameters        
 def wind_parameters(Data_import):
     for value in Data_import:
         if "param: turbine_type" in value:
             type_turb = value[value.index('=')+1:value.index(';')].strip().replace("'","")
+            type_turb = {'HA': 'Horizontal Axis', 'VA': 'Vertical Axis'}.get(type_turb, type_turb)
         if "param: turbine_model" in value:
             turb_model = value[value.index('=')+1:value.index(';')].strip().replace("'","")
         if "param: drivetrain_efficiency" in value:
@@ -181,10 +201,100 @@ def wind_parameters(Data_import):
 
 ### Retrieves JSON daily and hourly data from POWER API 
 
-def get_data(URL):
-    
-    URL_handle = urllib.request.urlopen(URL)
-    jsdata = URL_handle.read().decode()
+# Local cache of the POWER responses, keyed by the exact URL (gzip-compressed JSON)
+POWER_CACHE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tmp', 'POWER_Cache')
+POWER_CACHE_TTL_DAYS = 90             # Responses older than this are downloaded again (and evicted)
+POWER_CACHE_MAX_SIZE_MB = 1000        # Total size above which the oldest responses are evicted
+POWER_OFFLINE = os.environ.get('MGPY_POWER_OFFLINE', '').strip().lower() in ('1', 'true', 'yes')   # serve the responses only from the cache, without network access
+
+# Download settings
+POWER_MAX_WORKERS = 4                 # Maximum number of concurrent requests
+POWER_TIMEOUT = 60                    # Socket timeout of each request [s]
+POWER_RETRIES = 4                     # Retries of a failed request (connection error, timeout, HTTP 429 or 5xx)
+POWER_BACKOFF = 1                     # Initial waiting time between retries [s], doubled at each retry
+
+class ConnectionPool:
+    '''Keep-alive connections shared by the threads of a download: each request borrows an idle connection to its host
+    (or opens a new one) and gives it back when done. close() closes all the connections opened by the pool'''
+
+    def __init__(self, timeout=None):
+        self.timeout = timeout
+        self.idle = {}
+        self.opened = []
+        self.lock = threading.Lock()
+
+    def acquire(self, scheme, netloc):
+        with self.lock:
+            if self.idle.get((scheme, netloc)):
+                return self.idle[(scheme, netloc)].pop()
+            connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            connection = connection_class(netloc, timeout=self.timeout or POWER_TIMEOUT)
+            self.opened.append(connection)
+            return connection
+
+    def release(self, scheme, netloc, connection):
+        with self.lock:
+            self.idle.setdefault((scheme, netloc), []).append(connection)
+
+    def close(self):
+        with self.lock:
+            for connection in self.opened:
+                connection.close()
+            self.idle, self.opened = {}, []
+
+def fetch_url(URL, pool=None):
+    '''Downloads URL reusing a keep-alive connection of pool, with timeout and exponential-backoff retries.
+    Without a pool, the connection is opened for this download only and closed at the end'''
+    
+    if pool is None:
+        pool = ConnectionPool()
+        try:
+            return fetch_url(URL, pool)
+        finally:
+            pool.close()
+    parts = urllib.parse.urlsplit(URL)
+    path = parts.path + ('?' + parts.query if parts.query else '')
+    for attempt in range(POWER_RETRIES + 1):
+        connection = pool.acquire(parts.scheme, parts.netloc)
+        try:
+            connection.request('GET', path, headers={'Connection': 'keep-alive'})
+            response = connection.getresponse()
+            chunks = []
+            for chunk in iter(lambda: response.read(1 << 16), b''):      #streaming read
+                chunks.append(chunk)
+            pool.release(parts.scheme, parts.netloc, connection)
+            if response.status == 200:
+                return b''.join(chunks).decode()
+            error = urllib.error.HTTPError(URL, response.status, response.reason, response.headers, None)
+            if response.status != 429 and response.status < 500:
+                raise error
+        except (http.client.HTTPException, OSError) as e:
+            if isinstance(e, urllib.error.HTTPError):
+                raise
+            error = e
+            connection.close()                                           #not given back to the pool, reopened on the next request
+        if attempt < POWER_RETRIES:
+            time.sleep(POWER_BACKOFF * 2**attempt)
+    raise ConnectionError(f"{URL} failed after {POWER_RETRIES + 1} attempts: {error}")
+
+def cached_response_path(URL, cache_directory=None):
+    return os.path.join(cache_directory or POWER_CACHE_DIRECTORY, hashlib.sha256(URL.encode()).hexdigest() + '.json.gz')
+
+def get_data(URL, pool=None):
+    
+    entry = cached_response_path(URL)
+    if os.path.exists(entry) and (POWER_OFFLINE or time.time() - os.path.getmtime(entry) < POWER_CACHE_TTL_DAYS*86400):
+        with gzip.open(entry, 'rt') as f:
+            return f.read()
+    if POWER_OFFLINE:
+        raise ConnectionError(f"POWER response not available in the local cache (offline mode): {URL}")
+    
+    jsdata = fetch_url(URL, pool)
+    os.makedirs(POWER_CACHE_DIRECTORY, exist_ok=True)
+    with gzip.open(entry + '.tmp', 'wt') as f:
+        f.write(jsdata)
+    os.replace(entry + '.tmp', entry)
+    evict(max_size_mb=POWER_CACHE_MAX_SIZE_MB, max_age_days=POWER_CACHE_TTL_DAYS, directory=POWER_CACHE_DIRECTORY, extension='.json.gz')
     return jsdata
 
 #%% Data processing and typical year calculation functions
@@ -192,316 +302,167 @@ def get_data(URL):
 ### Download JSON data for the 4 URLs of daily and hourly parameters using multiple threads
 
 def multithread_data_download(URL_list):
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        jsdata = list(executor.map(get_data, URL_list)) 
+    pool = ConnectionPool()                                               #shared by the download threads
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=POWER_MAX_WORKERS) as executor:
+            futures = [executor.submit(get_data, URL, pool) for URL in URL_list]
+    finally:
+        pool.close()
+    jsdata = []
+    failed = []
+    for URL, future in zip(URL_list, futures):
+        try:
+            jsdata.append(future.result())
+        except (urllib.error.URLError, ConnectionError, TimeoutError) as e:      #the other downloads are completed (and cached) anyway
+            failed.append(f"{URL} ({e})")
+    if failed:
+        raise ConnectionError(f"{len(failed)} of {len(URL_list)} downloads failed:\n" + "\n".join(failed))
     return jsdata
 
-### Function for bilinear interpolation 
+### Bilinear interpolation weights of the four grid corners (in the order of the downloaded URLs)
 
-def bilinear_interpolation(x, y, points):
-    '''Interpolate (x,y) from values associated with four points.
+def bilinear_weights(lat, lon, lat_ext, lon_ext):
+    '''Returns the weights of the corners (lon_min, lat_min), (lon_min, lat_max), (lon_max, lat_min), (lon_max, lat_max)
+    so that the interpolated value is the weighted sum of the four corner values. A degenerate side (point on a grid line) takes all the weight on the lower corner'''
+    
+    t_lat = (lat - lat_ext[0])/(lat_ext[1] - lat_ext[0]) if lat_ext[1] != lat_ext[0] else 0
+    t_lon = (lon - lon_ext[0])/(lon_ext[1] - lon_ext[0]) if lon_ext[1] != lon_ext[0] else 0
+    if not (0 <= t_lat <= 1 and 0 <= t_lon <= 1):
+        raise ValueError('(lat, lon) not within the grid cell')
+    return np.array([(1 - t_lon)*(1 - t_lat), (1 - t_lon)*t_lat, t_lon*(1 - t_lat), t_lon*t_lat])
+
+# Parameters contained in the responses of the 12 URLs (4 corners of daily 1° x 1°, daily 0.5° x 0.625° and hourly data)
+POWER_PARAMETERS = [['ALLSKY_SFC_SW_DWN']]*4 + [['T2MWET','T2M','WS50M']]*4 + [['WS50M','WS2M', 'WD50M','T2M']]*4
 
-    The four points are a list of four triplets:  (x, y, value)'''
+### Decodes a POWER JSON response into the array of time stamps (YYYYMMDD or YYYYMMDDHH) and the dense (param, time) array of values
 
-      
-    points = sorted(points)               # order points by x, then by y
-    (x1, y1, q11), (_x1, y2, q12), (x2, _y1, q21), (_x2, _y2, q22) = points
+def decode_json(jsdata, param_str):
+    parameter = json.loads(jsdata)['properties']['parameter']
+    keys = list(parameter[param_str[0]].keys())
+    dates = np.array(keys, dtype=np.int64)
+    values = np.array([[parameter[param][key] for key in keys] for param in param_str], dtype=float)
+    values[values < -990] = 0                                                         #missing values are set to 0
+    return dates, values
 
-    if x1 != _x1 or x2 != _x2 or y1 != _y1 or y2 != _y2:
-        raise ValueError('points do not form a rectangle')
-    if not x1 <= x <= x2 or not y1 <= y <= y2:
-        raise ValueError('(x, y) not within the rectangle')
+### Calendar index of a time axis of time stamps (YYYYMMDD or YYYYMMDDHH): day_bounds are the first time step of each day
+### (the last element being the number of time steps) and month_bounds[year*12 + month] the first day of each month of each year
+### (the last element being the number of days), so that the values of a day or of a month are slices of the (param, time) array
 
-    return (q11 * (x2 - x) * (y2 - y) +
-            q21 * (x - x1) * (y2 - y) +
-            q12 * (x2 - x) * (y - y1) +
-            q22 * (x - x1) * (y - y1)
-           ) / ((x2 - x1) * (y2 - y1) + 0.0)
+def calendar_index(dates, first_year, n_years, hourly=False):
+    days = dates//100 if hourly else dates
+    day_bounds = np.flatnonzero(np.diff(days, prepend=-1, append=-1))
+    day_dates = days[day_bounds[:-1]]
+    month_id = (day_dates//10000 - first_year)*12 + day_dates//100 % 100 - 1
+    month_bounds = np.searchsorted(month_id, np.arange(n_years*12 + 1))
+    return month_bounds, day_bounds
 
-### Converts JSON data into lists and applies 2D interpolation
+### Converts JSON data into arrays and applies 2D interpolation as a weighted sum of the corner arrays
+### Returns the interpolated daily and hourly data, each as a tuple (values, month_bounds, day_bounds) of the (param, time) array and its calendar index
+### The elements of jsdata can also be responses already decoded by decode_json (shared by several sites in the batch calculation)
 
 def data_2D_interpolation(jsdata, date_start, date_end, lat, lon,lat_ext_1, lon_ext_1, lat_ext_2, lon_ext_2):
-    ''' Here converting JSON daily data into daily annidated list param_daily_list '''
-    jsdata_daily_1 = jsdata[0:4]
-    jsdata_daily_2 = jsdata[4:8]
-    jsdata_hourly = jsdata[8:12]
-    param_daily_list = []
-    param_daily_str_1 = ['ALLSKY_SFC_SW_DWN'] 
-    param_daily_str_2 = ['T2MWET','T2M','WS50M']   
-    
-    for jsdata_d_1 in jsdata_daily_1:
-        pydata_d = json.loads(jsdata_d_1)    
-        keys = pydata_d['properties']['parameter'][param_daily_str_1[0]].keys() 
-        param_daily_1 = [[[[] for ii in range(12)] for ii in range(int(date_end[5:9])-int(date_start[7:11])+1)]for ii in range(1)] 
-        for pp in range(len(param_daily_str_1)):   
-            jj = int(date_start[7:11])
-            month = 1
-            year = 0
-            for key in keys:
-                if pydata_d['properties']['parameter'][param_daily_str_1[pp]][key] < -990:             #check for missing values (equal to 0)
-                   pydata_d['properties']['parameter'][param_daily_str_1[pp]][key] = 0
-                
-                if month>=10:
-                    mm = str(month)
-                else: 
-                    mm = '0' + str(month)
-                         
-                if jj == int(key[0:4]) and mm == key[4:6]:
-                    param_daily_1[pp][year][month-1].append(pydata_d['properties']['parameter'][param_daily_str_1[pp]][key]) 
-                                
-                elif jj == int(key[0:4]) and mm != key[4:6]:
-                    month = month + 1
-                    param_daily_1[pp][year][month-1].append(pydata_d['properties']['parameter'][param_daily_str_1[pp]][key])
-                                  
-                elif jj != int(key[0:4]):
-                    month = 1 
-                    year = year+1   
-                    param_daily_1[pp][year][month-1].append(pydata_d['properties']['parameter'][param_daily_str_1[pp]][key])
-                    jj = jj+1
-            param_daily_list.append(param_daily_1)
-    
-    for jsdata_d_2 in jsdata_daily_2:
-        pydata_d = json.loads(jsdata_d_2) 
-        keys = pydata_d['properties']['parameter'][param_daily_str_2[0]].keys() 
-        param_daily_2 = [[[[] for ii in range(12)] for ii in range(int(date_end[5:9])-int(date_start[7:11])+1)]for ii in range(3)]
-        for pp in range(len(param_daily_str_2)):   
-            jj = int(date_start[7:11])
-            month = 1
-            year = 0
-            for key in keys:
-                if pydata_d['properties']['parameter'][param_daily_str_2[pp]][key] < -990:             #check for missing values (equal to 0)
-                   pydata_d['properties']['parameter'][param_daily_str_2[pp]][key] = 0
-                
-                if month>=10:
-                    mm = str(month)
-                else: 
-                    mm = '0' + str(month)
-                         
-                if jj == int(key[0:4]) and mm == key[4:6]:
-                    param_daily_2[pp][year][month-1].append(pydata_d['properties']['parameter'][param_daily_str_2[pp]][key]) 
-                                
-                elif jj == int(key[0:4]) and mm != key[4:6]:
-                    month = month + 1
-                    param_daily_2[pp][year][month-1].append(pydata_d['properties']['parameter'][param_daily_str_2[pp]][key])
-                                  
-                elif jj != int(key[0:4]):
-                    month = 1 
-                    year = year+1   
-                    param_daily_2[pp][year][month-1].append(pydata_d['properties']['parameter'][param_daily_str_2[pp]][key])
-                    jj = jj+1
-        param_daily_list.append(param_daily_2)
-    
-    ''' Here converting JSON hourly data into hourly annidated list param_hourly_list'''   
-    param_hourly_list = [] 
-    for jsdata_h in jsdata_hourly:
-        pydata = json.loads(jsdata_h)
-        param_hourly = [[[[] for ii in range(12)] for ii in range(int(date_end[5:9])-int(date_start[7:11])+1)]for ii in range(4)]
-        for ii in range(len(param_hourly)):
-            for jj in range(len(param_daily_2[0])):
-                for kk in range(12):
-                    param_hourly[ii][jj][kk] = [[] for yy in range(len(param_daily_2[0][jj][kk]))]
-        param_hourly_str = ['WS50M','WS2M', 'WD50M','T2M']    
-        keys = pydata['properties']['parameter'][param_hourly_str[0]].keys()
-        for param in range(len(param_hourly_str)):  
-            jj = int(date_start[7:11])
-            day_counter = 1
-            month_counter = 1
-            year_counter = 0
-            for key in keys:
-                if pydata['properties']['parameter'][param_hourly_str[param]][key] < -990:             
-                   pydata['properties']['parameter'][param_hourly_str[param]][key] = 0
-                
-                if month_counter>=10:
-                    mm = str(month_counter)
-                else: 
-                    mm = '0' + str(month_counter)
-                if day_counter>=10:
-                    dd = str(day_counter)
-                else:
-                    dd = '0' + str(day_counter)
-                         
-                if jj == int(key[0:4]) and mm == key[4:6] and dd == key[6:8]:
-                    param_hourly[param][year_counter][month_counter-1][day_counter-1].append(pydata['properties']['parameter'][param_hourly_str[param]][key]) 
-                elif jj == int(key[0:4]) and mm == key[4:6] and dd != key[6:8]:
-                    day_counter = day_counter + 1
-                    param_hourly[param][year_counter][month_counter-1][day_counter-1].append(pydata['properties']['parameter'][param_hourly_str[param]][key])
-                elif jj == int(key[0:4]) and mm != key[4:6]:
-                    day_counter = 1
-                    month_counter = month_counter + 1
-                    param_hourly[param][year_counter][month_counter-1][day_counter-1].append(pydata['properties']['parameter'][param_hourly_str[param]][key])
-                elif jj != int(key[0:4]):
-                    day_counter = 1
-                    month_counter = 1 
-                    year_counter = year_counter+1   
-                    param_hourly[param][year_counter][month_counter-1][day_counter-1].append(pydata['properties']['parameter'][param_hourly_str[param]][key])
-                    jj = jj+1
-                    
-        param_hourly_list.append(param_hourly)
-        
-    ''' Here applies bilinear interpolation function to daily and hourly lists '''
-    lat_min_1 = lat_ext_1[0]     #1 is used for 1° x 1° resolution, 2 for 0.5° x 0.625°
-    lat_max_1 = lat_ext_1[1]
-    lon_min_1 = lon_ext_1[0]
-    lon_max_1 = lon_ext_1[1]
-    lat_min_2 = lat_ext_2[0]
-    lat_max_2 = lat_ext_2[1]
-    lon_min_2 = lon_ext_2[0]
-    lon_max_2 = lon_ext_2[1]
-    param_daily_interp = [[[[] for ii in range(12)] for ii in range(int(date_end[5:9])-int(date_start[7:11])+1)] for ii in range(len(param_daily_str_1 + param_daily_str_2))]
-    param_hourly_interp = [[[[] for ii in range(12)] for ii in range(int(date_end[5:9])-int(date_start[7:11])+1)] for ii in range(len(param_daily_str_1 + param_daily_str_2))]
-    ''' Check if coordinates coincide with a point covered by data (interpolation would fail)'''
-    if math.modf(lat)[0] == 0 and math.modf(lon)[0] == 0:      
-       return param_daily_interp, param_hourly_interp
-    else:    
-        for param in range(len(param_hourly_list[0])):
-            for year in range(len(param_hourly_list[0][param])):
-                for month in range(len(param_hourly_list[0][param][year])):
-                    for day in range(len(param_hourly_list[0][param][year][month])):
-                        param_hourly_interp[param][year][month].append([[] for ii in range(24)])
-                        if param == 0:
-                            points_daily_1 = [(lat_min_1, lon_min_1, param_daily_list[0][0][year][month][day]), (lat_min_1, lon_max_1, param_daily_list[1][0][year][month][day]), (lat_max_1, lon_min_1, param_daily_list[2][0][year][month][day]), (lat_max_1, lon_max_1, param_daily_list[3][0][year][month][day])]
-                            param_daily_interp[param][year][month].append(bilinear_interpolation(lat, lon, points_daily_1)) 
-                        else:
-                            points_daily_2 = [(lat_min_2, lon_min_2, param_daily_list[4][param-1][year][month][day]), (lat_min_2, lon_max_2, param_daily_list[5][param-1][year][month][day]), (lat_max_2, lon_min_2, param_daily_list[6][param-1][year][month][day]), (lat_max_2, lon_max_2, param_daily_list[7][param-1][year][month][day])]
-                            param_daily_interp[param][year][month].append(bilinear_interpolation(lat, lon, points_daily_2))
-                        for hour in range(len(param_hourly_list[0][param][year][month][day])):
-                            points_hourly = [(lat_min_2, lon_min_2, param_hourly_list[0][param][year][month][day][hour]), (lat_max_2, lon_min_2, param_hourly_list[1][param][year][month][day][hour]), (lat_min_2, lon_max_2, param_hourly_list[2][param][year][month][day][hour]), (lat_max_2, lon_max_2, param_hourly_list[3][param][year][month][day][hour])]
-                            param_hourly_interp[param][year][month][day][hour] = bilinear_interpolation(lat, lon, points_hourly)
-                        
+    first_year = int(date_start[7:11])
+    n_years = int(date_end[5:9]) - first_year + 1
+    weights_1 = bilinear_weights(lat, lon, lat_ext_1, lon_ext_1)     #1 is used for 1° x 1° resolution, 2 for 0.5° x 0.625°
+    weights_2 = bilinear_weights(lat, lon, lat_ext_2, lon_ext_2)
+    
+    decoded = [decode_json(js, param_str) if isinstance(js, str) else js for js, param_str in zip(jsdata, POWER_PARAMETERS)]
+    decoded_daily_1 = decoded[0:4]
+    decoded_daily_2 = decoded[4:8]
+    decoded_hourly = decoded[8:12]
+    
+    dates_daily = decoded_daily_1[0][0]
+    dates_hourly = decoded_hourly[0][0]
+    param_daily = np.concatenate([np.tensordot(weights_1, np.stack([values for dates, values in decoded_daily_1]), axes=1),
+                                  np.tensordot(weights_2, np.stack([values for dates, values in decoded_daily_2]), axes=1)])
+    param_hourly = np.tensordot(weights_2, np.stack([values for dates, values in decoded_hourly]), axes=1)
+    
+    param_daily_interp = (param_daily,) + calendar_index(dates_daily, first_year, n_years)
+    param_hourly_interp = (param_hourly,) + calendar_index(dates_hourly, first_year, n_years, hourly=True)
     return param_daily_interp, param_hourly_interp
 
-### Finds the list of most representative year for each month (best_years) and returns the nested  list of typical daily values (param_typical_daily) given as input param_daily
+### Empirical CDF (rank / group size) of each value within its group, ties being ranked in order of appearance
+
+def group_cdf(values, groups):
+    order = np.lexsort((values, groups))                                      #sorted by group, then by value (stable)
+    sorted_groups = groups[order]
+    group_start = np.searchsorted(sorted_groups, sorted_groups)
+    cdf = np.empty(len(values))
+    cdf[order] = (np.arange(len(values)) - group_start + 1)/np.bincount(groups)[sorted_groups]
+    return cdf
+
+### Finds the list of most representative year for each month (best_years) and returns the (param, day) array of typical daily values (param_typical_daily) given as input param_daily
 
 def typical_year_daily(param_daily, date_start, date_end):          
     
-    # the list param_daily is re-ordered and the long-term cumulate is calculated
-    param_daily_ord = [[[]for ii in range(12)]for ii in range(len(param_daily))]
-    cdf_1 = [[defaultdict(list) for ii in range(0,12)]for ii in range(len(param_daily))]
-    phi_1 = [[[[] for ii in range(int(date_end[5:9])-int(date_start[7:11])+1)]for ii in range(12)]for ii in range(len(param_daily))]
-    f_2 = [[[[] for ii in range(int(date_end[5:9])-int(date_start[7:11])+1)]for ii in range(12)]for ii in range(len(param_daily))]
-    fs = [[defaultdict(list) for ii in range(12)]for ii in range(len(param_daily))]
-    
-    
-    for ii in range(len(param_daily)):
-        for jj in range(len(param_daily[ii])):
-            for kk in range(len(param_daily[ii][jj])):
-                     param_daily_ord[ii][kk] = sorted(param_daily_ord[ii][kk] + param_daily[ii][jj][kk])
-    for ii in range(len(param_daily_ord)):
-        for jj in range(len(param_daily_ord[ii])):                
-            for kk in range(len(param_daily_ord[ii][jj])):
-                cdf_1[ii][jj][str(param_daily_ord[ii][jj][kk])].append((kk+1)/len(param_daily_ord[ii][jj]))
-    
-    
-    for ii in range(len(cdf_1)):
-        for jj in range(len(cdf_1[ii])):
-                for kk in range(len(phi_1[ii][jj])):
-                    for yy in range(len(param_daily[ii][kk][jj])):
-                        for key in cdf_1[ii][jj]:
-                            if str(param_daily[ii][kk][jj][yy]) == key and len(cdf_1[ii][jj][key]) == 1:
-                                 phi_1[ii][jj][kk].append(cdf_1[ii][jj][key][0])
-                            elif str(param_daily[ii][kk][jj][yy]) == key and len(cdf_1[ii][jj][key]) > 1:
-                                 phi_1[ii][jj][kk].append(cdf_1[ii][jj][key][0])
-                                 cdf_1[ii][jj][key].pop(0)
-                            else:
-                                 continue
-    
-    # the year-specific cumulate is calculated
-    param_daily_ord_2 = [[[] for ii in range(int(date_end[5:9])-int(date_start[7:11])+1)]for ii in range(len(param_daily))]
-    cdf_2 = [[[defaultdict(list) for ii in range(12)] for ii in range(int(date_end[5:9])-int(date_start[7:11])+1)]for ii in range(len(param_daily))]
-    
-    for ii in range(len(param_daily)):
-        for jj in range(len(param_daily[ii])):
-            for kk in range(len(param_daily[ii][jj])):
-                param_daily_ord_2[ii][jj].append(sorted(param_daily[ii][jj][kk]))  #organizing param_daily in ascending order values
-    
-    for ii in range(len(param_daily_ord_2)):
-        for jj in range(len(param_daily_ord_2[ii])):
-            for kk in range(len(param_daily_ord_2[ii][jj])):
-                for day in range(len(param_daily_ord_2[ii][jj][kk])):
-                    cdf_2[ii][jj][kk][param_daily_ord_2[ii][jj][kk][day]].append((day+1)/(len(param_daily_ord_2[ii][jj][kk]))) #constructing year-specific cdf
-    
-    for ii in range(len(cdf_1)):
-        for jj in range(len(cdf_1[ii])):
-                for kk in range(len(f_2[ii][jj])):
-                    for yy in range(len(param_daily[ii][kk][jj])):
-                        for key in cdf_2[ii][kk][jj]:
-                            if (param_daily[ii][kk][jj][yy]) == key and len(cdf_2[ii][kk][jj][key]) == 1:
-                                 f_2[ii][jj][kk].append(cdf_2[ii][kk][jj][key][0])                              
-                            elif (param_daily[ii][kk][jj][yy]) == key and len(cdf_2[ii][kk][jj][key]) > 1:     #checking for multiple values
-                                 f_2[ii][jj][kk].append(cdf_2[ii][kk][jj][key][0])                         
-                                 cdf_2[ii][kk][jj][key].pop(0)
-                            else:
-                                 continue
-    # Finkelstein-Shafer statistics is calculated
-                    fs[ii][jj][str(kk)] = np.absolute(np.subtract(f_2[ii][jj][kk],phi_1[ii][jj][kk]))   #computing deviations of year-specific cdf from long-term cdf 
-                    fs[ii][jj][str(kk)] = sum(fs[ii][jj][str(kk)][:])                                   #summing deviations in a month for each year
-                
-                
-    # choice of the best years for each month according to primary and secondary parameters
-    
-    sum_prim = [dict() for ii in range(len(fs[0]))]
-    best_prim = [[] for ii in range(12)]
-    
-    #first 3 best years according to the minimum sum of FS for primary parameters are collected into best_prim
-    
-    for jj in range(len(fs[0])):
-        for key in fs[0][jj]:
-            sum_prim[jj][key] =  fs[0][jj][key] + fs[1][jj][key] + fs[2][jj][key]
-            best_prim[jj] = sorted(sum_prim[jj].items(),key=operator.itemgetter(1))[0:3]        
-            
-    #among the 3 best years for each month, the one having the lowest deviation between monthly mean and long-term monthly mean for wind speed (secondary parameter) is picked
-    
-    diff_sec = [dict() for ii in range(12)]
-    long_term_average = [[] for ii in range(12)]
-    best_years = [[] for ii in range(12)]
+    values, month_bounds, day_bounds = param_daily
+    n_years = (len(month_bounds) - 1)//12
+    days = np.diff(month_bounds)
+    year_id = np.repeat(np.arange(n_years*12)//12, days)
+    month_id = np.repeat(np.arange(n_years*12) % 12, days)
+    
+    # Finkelstein-Shafer statistics: deviations of the year-specific cdf from the long-term (all years) cdf, summed in each month
+    fs = np.empty((len(values), 12, n_years))
+    for ii in range(len(values)):
+        phi_1 = group_cdf(values[ii], month_id)                               #long-term cdf
+        f_2 = group_cdf(values[ii], month_id*n_years + year_id)               #year-specific cdf
+        fs[ii] = np.bincount(month_id*n_years + year_id, np.abs(f_2 - phi_1), minlength=12*n_years).reshape(12, n_years)
+    
+    # first 3 best years according to the minimum sum of FS for primary parameters (GHI, wet bulb and dry bulb temperature)
+    best_prim = np.argsort(fs[0] + fs[1] + fs[2], axis=1, kind='stable')[:, 0:3]
+    
+    # among the 3 best years for each month, the one having the lowest deviation between monthly mean and long-term monthly mean for wind speed (secondary parameter) is picked
+    monthly_average = (np.bincount(month_id*n_years + year_id, values[3], minlength=12*n_years)/np.bincount(month_id*n_years + year_id, minlength=12*n_years)).reshape(12, n_years)
+    long_term_average = monthly_average.mean(axis=1)
+    diff_sec = np.abs(np.take_along_axis(monthly_average, best_prim, axis=1) - long_term_average[:, None])
+    best_years = best_prim[np.arange(12), np.argmin(diff_sec, axis=1)].tolist()
+    
+    param_typical_daily = selected_year_daily(param_daily, best_years)
+    return best_years,param_typical_daily, fs, diff_sec
+
+### Returns the time steps of the year made of the given historical year (index) of each month, leaving out 29 February
+
+def selected_steps(month_bounds, day_bounds, years):
     
-    for ii in range(len(param_daily[3])):
-        for jj in range(len(param_daily[3][ii])):
-            long_term_average[jj].append(sum(param_daily[3][ii][jj])/len(param_daily[3][ii][jj]))
-    for ii in range(len(long_term_average)):
-        long_term_average[ii] = sum(long_term_average[ii])/len(long_term_average[ii])        
-            
-    for ii in range(len(best_prim)):
-        for jj in range(len(best_prim[ii])):
-            diff_sec[ii][best_prim[ii][jj][0]] = abs(np.mean(param_daily[3][int(best_prim[ii][jj][0])][ii]) - long_term_average[ii]) 
-        best_years[ii] = min(diff_sec[ii], key=diff_sec[ii].get) 
+    days = np.concatenate([np.arange(month_bounds[int(year)*12 + month], month_bounds[int(year)*12 + month + 1])[:28 if month == 1 else None] for month, year in enumerate(years)])
+    steps = day_bounds[days + 1] - day_bounds[days]                           #time steps of each day
+    return np.repeat(day_bounds[days] - np.cumsum(steps) + steps, steps) + np.arange(steps.sum())
+
+### Returns the (param, day) array of daily values of the year made of the given historical year (index) of each month
+
+def selected_year_daily(param_daily, years):
     
-    param_typical_daily = [[[] for ii in range(12)] for ii in range(len(param_daily))]    
+    values, month_bounds, day_bounds = param_daily
+    return values[:, selected_steps(month_bounds, day_bounds, years)]
+
+### Returns the historical year (index) used in each month of each RES scenario:
+### 0 typical meteorological year in every scenario, 1 one scenario per historical year, 2 monthly blocks bootstrapped from the historical years
+
+def scenario_years(RES_scenario_generation, n_scenarios, n_years, best_years, rng):
     
-    for ii in range(len(param_daily)):
-        for jj in range(len(param_typical_daily[ii])):
-            param_typical_daily[ii][jj] = param_daily[ii][int(best_years[jj])][jj]
-            
-            # removes data for 29 feb if TMY is a leap year
-            
-        if len(param_typical_daily[ii][1]) == 29:
-            param_typical_daily[ii][1].remove(param_typical_daily[ii][1][28])         
-    return best_years,param_typical_daily, fs, diff_sec
+    if RES_scenario_generation == 0:
+        return np.tile(best_years, (n_scenarios, 1))
+    if RES_scenario_generation == 1:
+        if n_scenarios > n_years:
+            raise ValueError(f"{n_scenarios} scenarios requested but only {n_years} historical years downloaded: extend date_start/date_end or use RES_Scenario_Generation = 2")
+        if n_scenarios < n_years:
+            print(f"Warning: only the first {n_scenarios} of the {n_years} historical years are used as RES scenarios")
+        return np.repeat(np.arange(n_scenarios)[:, None], 12, axis=1)
+    if RES_scenario_generation == 2:
+        return rng.integers(n_years, size=(n_scenarios, 12))
+    raise ValueError(f"RES_Scenario_Generation must be 0, 1 or 2 (got {RES_scenario_generation})")
 
-### Returns the nested list of hourly values for the typical year (param_typical_hourly) taking as input the best_years list and param_hourly
+### Returns the (param, day, hour) array of hourly values for the typical year (param_typical_hourly) taking as input the best_years list and param_hourly
 
 def typical_year_hourly(best_years, param_hourly_interp):
     
-    param_typical_hourly = [[[] for ii in range(12)] for ii in range(len(param_hourly_interp))]
-    for param in range(len(param_hourly_interp)):    
-        for month in range(12):
-            for day in range(len(param_hourly_interp[param][int(best_years[month])][month])):                       
-                param_typical_hourly[param][month].append(param_hourly_interp[param][int(best_years[month])][month][day])
-                
-                # removes data for 29 feb if TMY is a leap year
-                
-        if len(param_typical_hourly[param][1]) == 29:
-            param_typical_hourly[param][1].remove(param_typical_hourly[param][1][28])
-    return param_typical_hourly
+    values, month_bounds, day_bounds = param_hourly_interp
+    return values[:, selected_steps(month_bounds, day_bounds, best_years)].reshape(len(values), -1, 24)
 
 ### Function to export results to excel file and produce windrose and plots
 
 def export(energy_PV, U_rotor_lst, energy_WT, wind_direction_lst, Cp):
-    energy_PV_lst = [] 
-    for months in range(0,len(energy_PV)):
-        for day in range(0,len(energy_PV[months])):
-            for hour in range(0,len(energy_PV[months][day])):
-                energy_PV_lst.append(energy_PV[months][day][hour])   
+    energy_PV_lst = np.ravel(energy_PV)
     dataf = pd.concat([pd.DataFrame([ii for ii in range(1,len(energy_WT)+1)]), pd.DataFrame(energy_PV_lst), pd.DataFrame(energy_WT)], axis = 1)
     dataf = dataf.set_axis([None,1,2], axis=1)
     
@@ -588,102 +549,66 @@ def export(energy_PV, U_rotor_lst, energy_WT, wind_direction_lst, Cp):
 
 #%% Correlations for solar radiation data
 
-### Returns the ratio of daily diffuse irradiation to total irradiation (K_diff)
+### Returns the ratio of daily diffuse irradiation to total irradiation (K_diff), element-wise on arrays
 
 def erbs_corr(omega_s,K_T):
     omega_s = omega_s*180/math.pi
-    if omega_s <= 81.4:
-        if K_T < 0.715:
-            K_diff = 1 - 0.2727*K_T + 2.4495*(K_T**2) - 11.9514*(K_T**3) + 9.3879*(K_T**4)
-        else: 
-            K_diff = 0.143
-    else:
-        if K_T<0.722:
-            K_diff = 1 + 0.2832*K_T-2.5557*(K_T**2)+0.8448*(K_T**3)
-        else:
-            K_diff = 0.175
-    return K_diff
+    K_diff_1 = np.where(K_T < 0.715, 1 - 0.2727*K_T + 2.4495*(K_T**2) - 11.9514*(K_T**3) + 9.3879*(K_T**4), 0.143)
+    K_diff_2 = np.where(K_T < 0.722, 1 + 0.2832*K_T-2.5557*(K_T**2)+0.8448*(K_T**3), 0.175)
+    return np.where(omega_s <= 81.4, K_diff_1, K_diff_2)
 
-### Returns the hourly irradiation on a tilted surface given total and diffuse irradiation and geometrical parameters
+### Returns the hourly irradiation on a tilted surface given total and diffuse irradiation and geometrical parameters, element-wise on arrays
 
 def I_tilt_f(beta, I_tot, I_diff, ro_g, theta_z, theta_i):
-    I_tilt_iso = I_diff * (1+ math.cos(beta))/2 + I_tot*ro_g*(1-math.cos(beta))/2 + (I_tot - I_diff)*math.cos(theta_i)/math.cos(theta_z)
-    if I_tilt_iso <= 0:
-        I_tilt_iso = 0
-    return I_tilt_iso
+    I_tilt_iso = I_diff * (1+ np.cos(beta))/2 + I_tot*ro_g*(1-np.cos(beta))/2 + (I_tot - I_diff)*np.cos(theta_i)/np.cos(theta_z)
+    return np.maximum(I_tilt_iso, 0)
 
 ### Define the function hourly_solar to obtain the hourly solar radiation on a tilted surface from daily GHI data
+### H_day and day_year are arrays of n days and the result has shape (n, 24); tilt and azimuth can also be arrays broadcastable
+### against (n, 24), e.g. of shape (k, 1, 1) to evaluate k orientations at once (result of shape (k, n, 24))
 
 def hourly_solar(H_day,lat,lon, standard_lon, day_year,tilt, azimuth, albedo):
     
+    H_day = np.asarray(H_day, dtype=float)[..., None]                         #days along the first axis, hours of the day along the last one
+    day_year = np.asarray(day_year, dtype=float)[..., None]
     B = (day_year-1)*2*math.pi/365
-    delta =  math.radians(23.45*(math.sin(math.radians((day_year+284)*360/365))))               #declination angle in radians
+    delta =  np.radians(23.45*(np.sin(np.radians((day_year+284)*360/365))))    #declination angle in radians
     phi = lat * math.pi/180
-    beta = tilt * math.pi/180
-    gamma = azimuth*math.pi/180                                              
+    beta = np.asarray(tilt, dtype=float) * math.pi/180
+    gamma = np.asarray(azimuth, dtype=float)*math.pi/180                                              
     
     # Calculation of daily extraterrestrial irradiation 
-    if (-math.tan(phi)*math.tan(delta))>1:
-        omega_s = 0.001
-    elif (-math.tan(phi)*math.tan(delta))<-1:
-        omega_s = math.pi
-    else:
-        omega_s = math.acos((-math.tan(phi)*math.tan(delta)))                                                                            #sunset hour angle
-    E_0 = 1.000110 + 0.034221 * math.cos(B) + 0.001280*math.sin(B) + 0.000719*math.cos(2*B) + 0.000077*math.sin(2*B)                     #ratio between average sun-earth distance and distance in day day_year (Iqbal correlation)
-    G_0n = 1.367*E_0                                                                                                                     #extraterrestrial irradiance [kW/m^2] incident on a normal surface in the day day_year
-    H_extra = (24/math.pi) * G_0n * (math.cos(phi) * math.cos(delta) * math.sin(omega_s) + omega_s * math.sin(phi) * math.sin(delta))    #extraterr. daily irradiation on a normal surface [kWh/m^2]
-    K_T = H_day/H_extra                                                                                                                  #daily clearness index
+    x = -math.tan(phi)*np.tan(delta)
+    omega_s = np.where(x > 1, 0.001, np.where(x < -1, math.pi, np.arccos(np.clip(x, -1, 1))))                                       #sunset hour angle
+    E_0 = 1.000110 + 0.034221 * np.cos(B) + 0.001280*np.sin(B) + 0.000719*np.cos(2*B) + 0.000077*np.sin(2*B)                        #ratio between average sun-earth distance and distance in day day_year (Iqbal correlation)
+    G_0n = 1.367*E_0                                                                                                                #extraterrestrial irradiance [kW/m^2] incident on a normal surface in the day day_year
+    H_extra = (24/math.pi) * G_0n * (math.cos(phi) * np.cos(delta) * np.sin(omega_s) + omega_s * math.sin(phi) * np.sin(delta))    #extraterr. daily irradiation on a normal surface [kWh/m^2]
+    K_T = H_day/H_extra                                                                                                             #daily clearness index
     
     # Calculation of diffuse daily irradiation with Erbs correlation
     
     K_diff = erbs_corr(omega_s,K_T)
-    H_diff = K_diff * H_day                                                                                                              #daily diffuse irradiation on a normal surface
+    H_diff = K_diff * H_day                                                                                                         #daily diffuse irradiation on a normal surface
     
     # Calculation of diffuse and total hourly irradiation with LJ and CPR correlation 
     
-    EoT = 229.2*(0.000075+0.001868*math.cos(B)-0.032077*math.sin(B)-0.014615*math.cos(2*B)-0.04089*math.sin(2*B))                        #equation of time [min]
-    a_r= 0.409 + 0.5016 * math.sin(omega_s - math.pi/3)
-    b_r= 0.6609 - 0.4767 * math.sin(omega_s - math.pi/3)
-    I_tilt = []
-    I_tot_lst = []
-    I_dir_lst = []
-    I_diff_lst = []
-    r_d_CBR_lst = []
-    t_s_lst = []
-    omega_lst = []
+    EoT = 229.2*(0.000075+0.001868*np.cos(B)-0.032077*np.sin(B)-0.014615*np.cos(2*B)-0.04089*np.sin(2*B))                          #equation of time [min]
+    a_r= 0.409 + 0.5016 * np.sin(omega_s - math.pi/3)
+    b_r= 0.6609 - 0.4767 * np.sin(omega_s - math.pi/3)
     ro_g = albedo
-    for hour_day in range(0,24):
-        clock_time = hour_day 
-        t_s = clock_time - 4*(standard_lon - lon)/60 + EoT/60
-        t_s_lst.append(t_s)                                                                               #solar time in hours
-        omega = (math.pi/180)* 15 * (t_s - 12)  
-        omega_lst.append(omega)                                                                                                      #hour angle
-        r_d_lj = math.pi/24 * (math.cos(omega)-math.cos(omega_s))/(math.sin(omega_s) - omega_s * math.cos(omega_s))                                 #Liu-Jordan correlation for diffuse hourly irradiation
-        r_d_CBR = (a_r + b_r * math.cos(omega)) * r_d_lj  
-        r_d_CBR_lst.append(r_d_CBR)                                                                                           #Collares-Pereira-Rabl correlation for total hourly irradiation
-        if r_d_lj < 0:
-            I_diff = 0
-        else:
-            I_diff = r_d_lj * H_diff                                                                                                                    #diffuse hourly irradiation
-        if r_d_CBR>0:
-           I_tot = r_d_CBR * H_day                                                                          #total hourly irradiation
-           if I_tot - I_diff <0:
-               I_tot = I_diff
-        else:
-            I_tot = 0
-        theta_z = abs(math.acos(math.cos(phi) * math.cos(delta)*math.cos(omega)+ math.sin(phi)*math.sin(delta)))                                    #zenith angle
-        gamma_s = np.sign(omega) * abs((math.acos((math.cos(theta_z) * math.sin(phi) - math.sin(delta))/(math.sin(theta_z) * math.cos(phi)))))  #solar azimuth angle
-        theta_i = math.acos(math.cos(theta_z) * math.cos(beta) + math.sin(theta_z) *math.sin(beta) * math.cos(gamma_s -  gamma))                  #angle of incidence
-        I_tot_lst.append(I_tot)
-        I_diff_lst.append(I_diff)
-        if I_tot-I_diff>0:
-            I_dir_lst.append(I_tot-I_diff)
-        else:
-            I_dir_lst.append(0)
-        if math.cos(theta_z) < 0.1:
-           theta_i = math.pi/2
-        I_tilt.append(I_tilt_f(beta, I_tot, I_diff, ro_g, theta_z, theta_i))
-    return I_tilt
+    clock_time = np.arange(24)
+    t_s = clock_time - 4*(standard_lon - lon)/60 + EoT/60                                                                          #solar time in hours
+    omega = (math.pi/180)* 15 * (t_s - 12)                                                                                         #hour angle
+    r_d_lj = math.pi/24 * (np.cos(omega)-np.cos(omega_s))/(np.sin(omega_s) - omega_s * np.cos(omega_s))                           #Liu-Jordan correlation for diffuse hourly irradiation
+    r_d_CBR = (a_r + b_r * np.cos(omega)) * r_d_lj                                                                                 #Collares-Pereira-Rabl correlation for total hourly irradiation
+    I_diff = np.where(r_d_lj < 0, 0, r_d_lj * H_diff)                                                                              #diffuse hourly irradiation
+    I_tot = np.where(r_d_CBR > 0, np.maximum(r_d_CBR * H_day, I_diff), 0)                                                          #total hourly irradiation
+    cos_theta_z = math.cos(phi) * np.cos(delta)*np.cos(omega)+ math.sin(phi)*np.sin(delta)
+    theta_z = np.abs(np.arccos(np.clip(cos_theta_z, -1, 1)))                                                                       #zenith angle
+    gamma_s = np.sign(omega) * np.abs(np.arccos(np.clip((np.cos(theta_z) * math.sin(phi) - np.sin(delta))/(np.sin(theta_z) * math.cos(phi)), -1, 1)))  #solar azimuth angle
+    theta_i = np.arccos(np.clip(np.cos(theta_z) * np.cos(beta) + np.sin(theta_z) *np.sin(beta) * np.cos(gamma_s -  gamma), -1, 1))  #angle of incidence
+    theta_i = np.where(np.cos(theta_z) < 0.1, math.pi/2, theta_i)
+    return I_tilt_f(beta, I_tot, I_diff, ro_g, theta_z, theta_i)
 
 ### Calculation of daily extraterrestrial irradiation
 
@@ -703,93 +628,99 @@ def K_T_calc(H_day,lat,lon, standard_lon, day_year,tilt, azimuth):
 #%% Correlations for wind turbine production
 
 ### Calculates the Hellmann coefficient and the wind speed at rotor height given the wind speed measurements at two different heights
+### Hours with a missing (or zero) wind speed at one of the two heights get the average Hellmann coefficient of the valid hours
+
 def shear_exp(param_typical_hourly, Z_1, Z_0, Z_rot): 
                                                  
-    w_Z1 = param_typical_hourly[0]
-    w_Z0 = param_typical_hourly[1]
-    alpha = [[] for ii in range(len(w_Z1))]       #Hellmann coefficient is evaluated from velocities at 2 and 50 meters on hourly basis
-    U_rotor = [[] for ii in range(len(w_Z1))]
-    for month in range(len(w_Z1)):
-        alpha[month] = [[] for ii in range(len(w_Z1[month]))]
-        U_rotor[month] = [[] for ii in range(len(w_Z1[month]))]
-        for day in range(len(w_Z1[month])):
-            for hour in range(len(w_Z1[month][day])):
-                if w_Z1[month][day][hour] == 0 or w_Z0[month][day][hour] == 0:
-                    alpha[month][day].append(0)
-                else:
-                    alpha[month][day].append((math.log(w_Z1[month][day][hour]) - math.log(w_Z0[month][day][hour]))/(math.log(Z_1)-math.log(Z_0)))  
-                    U_rotor[month][day].append(w_Z0[month][day][hour] * (Z_rot/Z_0)**alpha[month][day][hour])
-    # corrects error in wind speed dataset
-    if len(U_rotor[9][21]) < 24:
-        U_rotor[9][21].append(param_typical_hourly[1][9][21][23] * (40/2)**alpha[9][21][23])
+    w_Z1 = param_typical_hourly[0].ravel()
+    w_Z0 = param_typical_hourly[1].ravel()
+    valid = (w_Z1 > 0) & (w_Z0 > 0)
+    alpha = np.full(w_Z1.shape, np.nan)                                     #Hellmann coefficient is evaluated from velocities at 2 and 50 meters on hourly basis
+    alpha[valid] = (np.log(w_Z1[valid]) - np.log(w_Z0[valid]))/(math.log(Z_1)-math.log(Z_0))
+    alpha[~valid] = alpha[valid].mean() if valid.any() else 0
+    U_rotor = w_Z0 * (Z_rot/Z_0)**alpha
     return U_rotor,alpha
         
-### Calculate the daily average air density at rotor height
+### Calculate the hourly air density at rotor height
 
 def air_density(Z,param_typical_hourly):
     
-    T2M_hourly = param_typical_hourly[3]
+    T2M_hourly = param_typical_hourly[3].ravel()
     DT =  -0.0066 * (Z-2)                               #[°C/m] Change of temperature from measurement height (2 m) to height Z (standard lapse rate expression)
     P = 101.29 - (0.011837)*Z + (4.793*(10**-7))*Z**2     #[kPa] Pressure at height Z
     MM = 28.96                                          #[kg/kmol] molar mass of dry air
     R = 8.314                                           #[kJ/K kmol] gas constant
     R_molar = R/MM
-    ro_air = [[] for i in range(len(T2M_hourly))]
-    for ii in range(len(T2M_hourly)):
-        ro_air[ii] = [[] for ii in range(len(T2M_hourly[ii]))]
-        for jj in range(len(T2M_hourly[ii])):
-            for kk in range(len(T2M_hourly[ii][jj])):
-                ro_air[ii][jj].append(P/(R_molar*(T2M_hourly[ii][jj][kk] + 273.15 + DT)))       #find air density at hub height
-             
-        
+    ro_air = P/(R_molar*(T2M_hourly + 273.15 + DT))     #find air density at hub height
     return ro_air
 
-### Returns wind speed, direction and air density at rotor height as list of 8760 elements
+### Returns wind speed, direction and air density at rotor height as arrays of 8760 elements
 
 def wind_lst(U_rotor, wind_direction, ro_air):
-    U_rotor_lst = []
-    wind_direction_lst = []
-    ro_air_lst = []
-    for ii in range(len(U_rotor)):
-        for jj in range(len(U_rotor[ii])):
-            U_rotor_lst.extend(U_rotor[ii][jj])
-            wind_direction_lst.extend(wind_direction[2][ii][jj])
-            ro_air_lst.extend(ro_air[ii][jj])
+    U_rotor_lst = np.ravel(U_rotor)
+    wind_direction_lst = wind_direction[2].ravel()
+    ro_air_lst = np.ravel(ro_air)
     return U_rotor_lst, wind_direction_lst, ro_air_lst
 
            
-### Extrapolate power curve of the turbine from Power_curves excel file and calculate wind power hourly production     #QUI MANCA IL CALCOLO PER TURBINE AD ASSE ORIZZONTALE
+### Extrapolate power curve of the turbine from Power_curves excel file and calculate wind power hourly production
+### power_curve can also be a 2D array (one power curve per turbine model, with surface_area an array of the same length) to evaluate several models at once
 
 def P_turb(power_curve, WS_rotor_lst, ro_air_lst, surface_area, drivetrain_efficiency):
-    # Ensure power_curve is a numeric array
-    # If power_curve is a list of strings, convert it to a list of floats.
-    fp = np.array([float(pc) for pc in power_curve])
-
-    # Convert range to numpy array for xp
-    xp = np.array(range(0, 30))
-
-    En_wind = []
-    En_WT = []
-    Cp = []
-    for ii in range(len(WS_rotor_lst)):
-        # Ensure WS_rotor_lst[ii] is numeric and convert it if necessary
-        WS_rotor_value = float(WS_rotor_lst[ii])
-
-        # Compute hourly ideal wind energy
-        En_wind.append(0.5 * ro_air_lst[ii] * surface_area * WS_rotor_value**3)
-
-        # Compute hourly energy production using interpolation
-        interpolated_value = np.interp(WS_rotor_value, xp, fp) * 1000
-        En_WT.append(interpolated_value)
+    fp = np.array(power_curve, dtype=float)
+    WS_rotor = np.asarray(WS_rotor_lst, dtype=float)
+    xp = np.arange(fp.shape[-1])                                            #wind speeds of the power curve [m/s]
+    
+    if fp.ndim == 1:
+        En_WT = np.interp(WS_rotor, xp, fp) * 1000                          #hourly energy production [Wh]
+        En_wind = 0.5 * np.asarray(ro_air_lst) * surface_area * WS_rotor**3  #hourly ideal wind energy
+    else:
+        En_WT = np.array([np.interp(WS_rotor, xp, f) for f in fp]) * 1000
+        En_wind = 0.5 * np.asarray(ro_air_lst) * np.asarray(surface_area, dtype=float)[:, None] * WS_rotor**3
+    
+    # hourly turbine power coefficient
+    Cp = np.divide(En_WT, En_wind, out=np.zeros_like(En_WT), where=En_wind != 0)
+    return En_WT, Cp 
 
-        # Compute hourly turbine power coefficient
-        Cp.append(En_WT[ii]/(En_wind[ii])) if En_wind[ii] != 0 else Cp.append(0)
+### Returns the hourly PV (Wh/module) and wind (Wh/turbine) production in the typical year given the interpolated daily and hourly parameters of a site
+### If years is given (historical year index of each month), the production is calculated for that year instead of the typical year
 
-    return En_WT, Cp 
+def RES_production(param_daily_interp, param_hourly_interp, date_start, date_end, lat, lon, standard_lon, PV_parameters, WT_parameters, years=None):
+    
+    (nom_power,tilt,azim,ro_ground, k_T, NMOT, T_NMOT, G_NMOT) = PV_parameters
+    (power_curve, surface_area, rot_height,drivetrain_efficiency) = WT_parameters
+    
+### Calculate the typical year using the daily parameters 
+    
+    if years is None:
+        (years,param_typical_daily,fs, diff_sec) = typical_year_daily(param_daily_interp, date_start, date_end)
+    else:
+        param_typical_daily = selected_year_daily(param_daily_interp, years)
+    param_typical_hourly = typical_year_hourly(years, param_hourly_interp)
+    
+### Find the vector of hourly irradiation on a tilted surface for all days of the year [W/m^2 h] and K_T for power calculation
+    
+    H_day = param_typical_daily[0]
+    I_tilt = hourly_solar(H_day, lat, lon, standard_lon, np.arange(1, len(H_day)+1), tilt, azim, ro_ground)     #hourly irradiation [kWh/m^2] on tilted surface (days x 24)
+             
+### Calculate electricity production from the PV system
+    
+    T_amb = param_typical_hourly[3]                                                      #[°C]
+    T_cell = T_amb + ((NMOT - T_NMOT)/G_NMOT)*I_tilt*1000                               #hourly average cell T using T2M
+    energy_PV = I_tilt * nom_power * (1+(k_T/100)*(T_cell-25))                          #[Wh/module]
+    
+### Wind turbine electricity production calculation
+    
+    param_hourly_str = ['WS50M', 'WS2M', 'WD10M']
+    (WS_rotor,alpha) = shear_exp(param_typical_hourly,int(param_hourly_str[0][2:4]), int(param_hourly_str[1][2:3]), rot_height) 
+    ro_air = air_density(rot_height,param_typical_hourly)
+    U_rotor_lst, wind_direction_lst, ro_air_lst = wind_lst(WS_rotor, param_typical_hourly, ro_air)
+    (energy_WT, Cp) = P_turb(power_curve, U_rotor_lst, ro_air_lst, surface_area,drivetrain_efficiency)            #hourly energy production of 1 wind turbine [kWh]            
+    return export(energy_PV, U_rotor_lst, energy_WT, wind_direction_lst, Cp)
 
 #%% Main 
 
-def RE_supply():
+def RE_supply(seed=None):
     
             
     start = time.time()
@@ -804,73 +735,72 @@ def RE_supply():
     (date_start, date_end, lat, lon, lat_ext_1,lon_ext_1, lat_ext_2, lon_ext_2, standard_lon, URL_1_d, URL_2_d, periods) = URL_creation_d(data_import)
     URL_h = URL_creation_h(data_import)
     URL_list = URL_1_d + URL_2_d + URL_h
-    print("Input file reading completed\n")
-    print("Downloading time-series from NASA POWER...\n")
-    try:
-        jsdata = multithread_data_download(URL_list) 
-        param_daily_interp, param_hourly_interp = data_2D_interpolation(jsdata, date_start, date_end,lat, lon, lat_ext_1, lon_ext_1, lat_ext_2, lon_ext_2)
-    except:
-        print("POWER server response error, please try again")
-        sys.exit(1)        
-    print("Completed\n")
-    
-### Calculate the typical year using the daily parameters 
-    
-    print("Calculating the typical meteorological year...\n")
-    (best_years,param_typical_daily,fs, diff_sec) = typical_year_daily(param_daily_interp, date_start, date_end)
-    param_typical_hourly = typical_year_hourly(best_years, param_hourly_interp)
-    
-    print("Completed \n") 
     
 ### Import technological parameters of RE technologies
     
     (nom_power,tilt,azim,ro_ground, k_T, NMOT, T_NMOT, G_NMOT) = solarPV_parameters(data_import)  #PV param.
     (power_curve, surface_area, rot_height,drivetrain_efficiency, data1, df) = wind_parameters(data_import)
+    (RES_scenario_generation, n_scenarios) = RES_scenario_parameters(data_import)
+    print("Input file reading completed\n")
     
-### Find the vector of hourly irradiation on a tilted surface for all days of the year [W/m^2 h] and K_T for power calculation
-    
-    print("Calculating the solar PV production in the typical year... \n")      
-    I_tilt = [[] for i in range(len(param_typical_daily[0]))]        #[KWh/m^2]
-    day = 1
-    for month in range(len(param_typical_daily[0])):
-        for day_year in range(len(param_typical_hourly[0][month])):     
-            I_tilt[month].append(hourly_solar(param_typical_daily[0][month][day_year],lat,lon, standard_lon, day,tilt, azim, ro_ground))   #hourly irradiation [kWh/m^2] on tilted surface
-            day = day + 1
-             
-### Calculate electricity production from the PV system
-    
-    T_amb = param_typical_hourly[3]                               #[°C]
-    T_cell = [[] for ii in range(len(T_amb))]    
-    energy_PV = [[] for ii in range(len(T_amb))]
+### Reuse RES_Time_Series.csv if it was generated with the same parameters (and the same given seed, bootstrapped scenarios being drawn again without seed)
     
-    for ii in range(len(T_amb)):   
-        T_cell[ii] = [[] for ii in range(len(T_amb[ii]))]
-        energy_PV[ii] = [[] for ii in range(len(T_amb[ii]))]   
-        for jj in range(len(T_amb[ii])):
-            for kk in range(len(T_amb[ii][jj])):
-                T_cell[ii][jj].append(T_amb[ii][jj][kk] + ((NMOT - T_NMOT)/G_NMOT)*I_tilt[ii][jj][kk]*1000)          #find the vector of hourly average cell T using T2M
-                energy_PV[ii][jj].append((I_tilt[ii][jj][kk])* nom_power * (1+(k_T/100)*(T_cell[ii][jj][kk]-25)))                #[Wh/module]
-     
-    print("Completed\n")  
+    stochastic = RES_scenario_generation == 2
+    filename = os.path.join(inputs_directory, 'RES_Time_Series.csv')
+    parameters = {'URL': URL_list, 'lat': lat, 'lon': lon, 'standard_lon': standard_lon, 'periods': periods,
+                  'PV': [nom_power, tilt, azim, ro_ground, k_T, NMOT, T_NMOT, G_NMOT],
+                  'WT': [power_curve, surface_area, rot_height, drivetrain_efficiency],
+                  'WT_Power_Curve': file_hash(os.path.join(inputs_directory, 'WT_Power_Curve.csv')),
+                  'RES_Scenario_Generation': RES_scenario_generation, 'scenarios': n_scenarios, 'seed': seed if stochastic else None}
+    record = generation_up_to_date(filename, parameters) if seed is not None or not stochastic else None
+    if record:
+        dataf = pd.read_csv(filename)
+        dataf = dataf.set_axis([None] + list(range(1, dataf.shape[1])), axis=1)
+        if RES_scenario_generation:
+            dataf.attrs['Scenario_Weight'] = record['scenario_weight']
+        print("RES parameters unchanged: RES_Time_Series.csv reused without download and calculation\n")
+        return dataf
+    print("Downloading time-series from NASA POWER...\n")
+    try:
+        jsdata = multithread_data_download(URL_list) 
+    except (urllib.error.URLError, ConnectionError, TimeoutError) as e:
+        print("POWER server response error, please try again")
+        raise ConnectionError(f"Download of NASA POWER data failed: {e}") from e
+    try:
+        param_daily_interp, param_hourly_interp = data_2D_interpolation(jsdata, date_start, date_end,lat, lon, lat_ext_1, lon_ext_1, lat_ext_2, lon_ext_2)
+    except (KeyError, ValueError) as e:
+        print("POWER server response error, please try again")
+        raise ValueError(f"Unexpected NASA POWER response: {e}") from e
+    print("Completed\n")
     
-### Wind turbine electricity production calculation
+### Calculate the typical year, solar PV and wind turbine production
     
-    print("Calculating the wind turbine production in the typical year... \n")  
+    print("Calculating the typical meteorological year, solar PV and wind turbine production... \n")
+    PV_parameters = (nom_power,tilt,azim,ro_ground, k_T, NMOT, T_NMOT, G_NMOT)
+    WT_parameters = (power_curve, surface_area, rot_height,drivetrain_efficiency)
+    best_years = typical_year_daily(param_daily_interp, date_start, date_end)[0]
     
-    param_hourly_str = ['WS50M', 'WS2M', 'WD10M']
-    (WS_rotor,alpha) = shear_exp(param_typical_hourly,int(param_hourly_str[0][2:4]), int(param_hourly_str[1][2:3]), rot_height) 
-    ro_air = air_density(rot_height,param_typical_hourly)
-    U_rotor_lst, wind_direction_lst, ro_air_lst = wind_lst(WS_rotor, param_typical_hourly, ro_air)
-    (energy_WT, Cp) = P_turb(power_curve, U_rotor_lst, ro_air_lst, surface_area,drivetrain_efficiency)            #hourly energy production of 1 wind turbine [kWh]            
-    dataf = export(energy_PV, U_rotor_lst, energy_WT, wind_direction_lst, Cp)
+### RES scenarios: the typical year repeated in every scenario, or the historical years (or bootstrapped monthly blocks of them) reusing the downloaded data
     
+    if seed is None:
+        seed = np.random.SeedSequence().entropy                                   #random seed, recorded to allow reproducing the bootstrapped scenarios
+    years = scenario_years(RES_scenario_generation, n_scenarios, (len(param_daily_interp[1]) - 1)//12, best_years, np.random.default_rng(seed))
+    if RES_scenario_generation:
+        print(f"Calculating {n_scenarios} RES scenarios from the historical years {date_start[7:11]}-{date_end[5:9]}...\n")
+        scenarios_dataf = [RES_production(param_daily_interp, param_hourly_interp, date_start, date_end, lat, lon, standard_lon, PV_parameters, WT_parameters, years=scenario.tolist()) for scenario in years]
+    else:
+        scenarios_dataf = [RES_production(param_daily_interp, param_hourly_interp, date_start, date_end, lat, lon, standard_lon, PV_parameters, WT_parameters, years=best_years)]*n_scenarios
+    dataf = scenarios_dataf[0]
+    dataf = pd.concat([dataf.iloc[:, :1]] + [scenario_dataf.iloc[:, 1:] for scenario_dataf in scenarios_dataf], axis=1)
+    dataf = dataf.set_axis([None] + list(range(1, dataf.shape[1])), axis=1)
+    scenario_weight = [1/n_scenarios]*n_scenarios                                  #historical years and bootstrapped years are equally likely
+    if RES_scenario_generation:
+        dataf.attrs['Scenario_Weight'] = scenario_weight
     print("Completed\n ")
     
-    current_directory = os.path.dirname(os.path.abspath(__file__))
-    inputs_directory = os.path.join(current_directory, '..', 'Inputs')
-    filename = os.path.join(inputs_directory, 'RES_Time_Series.csv')
     book = pd.DataFrame(dataf)
     book.to_csv(filename, sep=',', decimal='.', quotechar = ' ', index=False, header = True)
+    record_generation(filename, parameters, seed=seed, scenario_years=years.tolist(), scenario_weight=scenario_weight)
 
     # Timing
     end = time.time()
@@ -879,6 +809,73 @@ def RE_supply():
 
     return dataf
 
+
+### Batch calculation of the RES time series of several sites, downloading only once the grid cells shared by the sites
+
+def RE_supply_batch(sites, output_directory=None):
+    """
+    Calculates the RES time series of several sites with the parameters of Parameters.dat,
+    downloading and decoding each POWER grid cell only once even if it is a corner of several sites.
+    
+    Parameters:
+    sites (list): (name, lat, lon) or (name, lat, lon, time_zone) of each site, coordinates in decimal degrees.
+    output_directory (str): Folder where RES_Time_Series_<name>.csv is written for each site (default: Inputs).
+    
+    Returns:
+    dict: Site name -> RES time series (same format as RE_supply).
+    """
+    start = time.time()
+    current_directory = os.path.dirname(os.path.abspath(__file__))
+    inputs_directory = os.path.join(current_directory, '..', 'Inputs')
+    output_directory = output_directory or inputs_directory
+    data_import = open(os.path.join(inputs_directory, 'Parameters.dat')).readlines()
+    (nom_power,tilt,azim,ro_ground, k_T, NMOT, T_NMOT, G_NMOT) = solarPV_parameters(data_import)
+    (power_curve, surface_area, rot_height,drivetrain_efficiency, data1, df) = wind_parameters(data_import)
+    
+### Creates the URLs of every site and the list of the distinct grid cells
+    
+    site_inputs = {}
+    for site in sites:
+        name, site_lat, site_lon = site[0], float(site[1]), float(site[2])
+        (date_start, date_end, lat, lon, lat_ext_1,lon_ext_1, lat_ext_2, lon_ext_2, standard_lon, URL_1_d, URL_2_d, periods) = URL_creation_d(data_import, (site_lat, site_lon))
+        if len(site) > 3:
+            standard_lon = 15*int(site[3])
+        URL_list = URL_1_d + URL_2_d + URL_creation_h(data_import, (site_lat, site_lon))
+        site_inputs[name] = (URL_list, date_start, date_end, lat, lon, lat_ext_1, lon_ext_1, lat_ext_2, lon_ext_2, standard_lon)
+    URL_unique = {}
+    for URL_list in (inputs[0] for inputs in site_inputs.values()):
+        for URL, param_str in zip(URL_list, POWER_PARAMETERS):
+            URL_unique.setdefault(URL, param_str)
+    print(f"Downloading time-series from NASA POWER for {len(site_inputs)} sites ({len(URL_unique)} distinct requests instead of {12*len(site_inputs)})...\n")
+    
+    try:
+        jsdata = multithread_data_download(list(URL_unique))
+    except (urllib.error.URLError, ConnectionError, TimeoutError) as e:
+        print("POWER server response error, please try again")
+        raise ConnectionError(f"Download of NASA POWER data failed: {e}") from e
+    try:
+        decoded = {URL: decode_json(js, param_str) for js, (URL, param_str) in zip(jsdata, URL_unique.items())}
+    except (KeyError, ValueError) as e:
+        print("POWER server response error, please try again")
+        raise ValueError(f"Unexpected NASA POWER response: {e}") from e
+    print("Completed\n")
+    
+### Interpolation, typical year and RES production of each site
+    
+    results = {}
+    os.makedirs(output_directory, exist_ok=True)
+    for name, (URL_list, date_start, date_end, lat, lon, lat_ext_1, lon_ext_1, lat_ext_2, lon_ext_2, standard_lon) in site_inputs.items():
+        print(f"Calculating the RES time series of site {name}...")
+        param_daily_interp, param_hourly_interp = data_2D_interpolation([decoded[URL] for URL in URL_list], date_start, date_end, lat, lon, lat_ext_1, lon_ext_1, lat_ext_2, lon_ext_2)
+        dataf = RES_production(param_daily_interp, param_hourly_interp, date_start, date_end, lat, lon, standard_lon,
+                               (nom_power,tilt,azim,ro_ground, k_T, NMOT, T_NMOT, G_NMOT), (power_curve, surface_area, rot_height,drivetrain_efficiency))
+        pd.DataFrame(dataf).to_csv(os.path.join(output_directory, f'RES_Time_Series_{name}.csv'), sep=',', decimal='.', quotechar = ' ', index=False, header = True)
+        results[name] = dataf
+    
+    elapsed = time.time() - start
+    print('\n\nRES time series calculation of',len(results),'sites completed (overall time: ',round(elapsed,0),'s,', round(elapsed/60,1),' m)\n')
+    return results
+
 if __name__ == "__main__":
     RE_supply()
 
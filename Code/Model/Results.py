@@ -1,53 +1,94 @@
-import pandas as pd
+import pandas as pd, numpy as np
 from pandas import ExcelWriter
-import os
+import os, concurrent.futures, importlib.util
+from itertools import chain
 import warnings; warnings.simplefilter(action='ignore', category=FutureWarning)
 
 #%% Results summary
-def ResultsSummary(instance, Optimization_Goal, TimeSeries):
-
-    from Results import EnergySystemCost, EnergySystemSize, YearlyCosts, YearlyEnergyParams, YearlyEnergyParamsSC, EnergySystemLandUse
-    
-    print('Results: exporting economic results...')
-    EnergySystemCost                              = EnergySystemCost(instance, Optimization_Goal)
-    YearlyCost                                    = YearlyCosts(instance) 
-    print('         exporting technical results...')
-    EnergySystemSize                              = EnergySystemSize(instance)
-    YearlyEnergyParams, RenewablePenetration      = YearlyEnergyParams(instance, TimeSeries)
-    YearlyEnergyParamsSC, RenewablePenetrationSC  = YearlyEnergyParamsSC(instance, TimeSeries)
-    if instance.Land_Use.value == 1: EnergySystemLandUse = EnergySystemLandUse(instance)
-    
-    current_directory = os.path.dirname(os.path.abspath(__file__))
-    results_directory = os.path.join(current_directory, '..', 'Results/Results_Summary.xlsx')
-    
-    Excel = ExcelWriter(results_directory)
-
-    EnergySystemSize.to_excel(Excel, sheet_name='Size')
-    if instance.Land_Use.value == 1: EnergySystemLandUse.to_excel(Excel, sheet_name='Land Use')
-    EnergySystemCost.to_excel(Excel, sheet_name='Cost')
-    YearlyCost.to_excel(Excel, sheet_name='Yearly cash flows')
-    YearlyEnergyParams.to_excel(Excel, sheet_name='Yearly energy parameters')
-    YearlyEnergyParamsSC.to_excel(Excel, sheet_name='Yearly energy parameters SC')
-
-    Excel.close()
-
-    Results = {
-        'Costs': EnergySystemCost,
-        'Size': EnergySystemSize,
-        'Land Use': EnergySystemLandUse if instance.Land_Use.value == 1 else None,
-        'Yearly cash flows': YearlyCost,
-        'Yearly energy parameters': YearlyEnergyParams,
-        'Renewables Penetration': RenewablePenetration,
-        'Yearly energy parameters SC': YearlyEnergyParamsSC,
-        'Renewables Penetration SC': RenewablePenetrationSC,
-    }
-    
-    return Results
+class ResultsSummary(dict):
+    """
+    Summary reports of a solved instance, read as a dict: 'Costs', 'Size', 'Land Use', 'Yearly cash flows',
+    'Yearly energy parameters', 'Renewables Penetration', 'Yearly energy parameters SC' and 'Renewables Penetration SC'.
+    'Yearly energy' holds the yearly energy of each flow (see YearlyEnergy), computed once for both energy parameter reports.
+    Each report is computed on its first access and kept for the following ones, so a run (e.g. a batch of sensitivity runs
+    reading only NPC and LCOE from Results['Costs']) pays only for the reports it reads. No file is written until export(),
+    which writes Results_Summary.xlsx and the time series.
+
+    Parameters:
+    instance: Solved model instance.
+    Optimization_Goal (int): 0 for the Net Present Cost, 1 for the Total Variable Cost.
+    TimeSeries (dict): Time series as returned by TimeSeries, used by the energy parameters.
+    """
+    def __init__(self, instance, Optimization_Goal, TimeSeries):
+        super().__init__()
+        self.instance = instance
+        self.TimeSeries = TimeSeries
+        Energy_Params    = lambda: YearlyEnergyParams(instance, self['Yearly energy'])
+        Energy_Params_SC = lambda: YearlyEnergyParamsSC(instance, self['Yearly energy'])
+        # report -> (function computing it, position of the report in the returned tuple, if the function returns two reports)
+        self.Reports = {
+            'Costs':                       (lambda: EnergySystemCost(instance, Optimization_Goal), None),
+            'Size':                        (lambda: EnergySystemSize(instance), None),
+            'Land Use':                    (lambda: EnergySystemLandUse(instance) if instance.Land_Use.value == 1 else None, None),
+            'Yearly cash flows':           (lambda: YearlyCosts(instance), None),
+            'Yearly energy':               (lambda: YearlyEnergy(TimeSeries), None),
+            'Yearly energy parameters':    (Energy_Params, 0),
+            'Renewables Penetration':      (Energy_Params, 1),
+            'Yearly energy parameters SC': (Energy_Params_SC, 0),
+            'Renewables Penetration SC':   (Energy_Params_SC, 1)}
+
+    def __missing__(self, report):
+        function, position = self.Reports[report]
+        values = function()
+        if position is None: self[report] = values
+        for key, (other, index) in self.Reports.items():                    # reports computed together are kept together
+            if other is function and index is not None: self[key] = values[index]
+        return self[report]
+
+    def export(self, results_directory=None):
+        """
+        Writes Results_Summary.xlsx (one sheet per report) and the time series, in the format selected by the Time_Series_Format
+        parameter, in results_directory (default: Results). Returns the path of Results_Summary.xlsx.
+        """
+        if results_directory is None:
+            current_directory = os.path.dirname(os.path.abspath(__file__))
+            results_directory = os.path.join(current_directory, '..', 'Results')
+        path = os.path.join(results_directory, 'Results_Summary.xlsx')
+
+        print('Results: exporting results summary...')
+        Sheets = {'Size': self['Size'], 'Land Use': self['Land Use'], 'Cost': self['Costs'], 'Yearly cash flows': self['Yearly cash flows'],
+                  'Yearly energy parameters': self['Yearly energy parameters'], 'Yearly energy parameters SC': self['Yearly energy parameters SC']}
+        with ExcelWriter(path) as Excel:
+            for sheet, report in Sheets.items():
+                if report is not None: report.to_excel(Excel, sheet_name=sheet)
+        export_time_series(self.TimeSeries, TIME_SERIES_FORMATS[self.instance.Time_Series_Format.value], results_directory)
+        return path
 
 #%% TimeSeries generation
+def indexed_array(values, out):
+    """
+    Fills out (one axis per index set, e.g. scenarios x years x periods) with the values of an indexed component,
+    given as a dict keyed by the index tuples counted from 1 (as returned by get_values() or extract_values()).
+    Missing or undefined values are set to NaN.
+    """
+    index = np.fromiter(chain.from_iterable(values.keys()), dtype=int, count=len(values)*out.ndim).reshape(len(values), out.ndim) - 1
+    out[...] = np.nan
+    out[tuple(index.T)] = np.array(list(values.values()), dtype=float)
+    return out
+
+class TimeSeriesResults(dict):
+    """
+    Time series returned by TimeSeries: TimeSeriesResults[s][y] is the DataFrame of scenario s and year y, viewing
+    the (scenarios, years, columns, periods) array Flows whose columns are the (flow, component, unit) tuples of Columns.
+    """
+    def __init__(self, Flows, Columns):
+        super().__init__()
+        self.Flows = Flows
+        self.Columns = Columns
+
 def TimeSeries(instance):
 
-    print('\nResults: exporting time-series...')
+    print('\nResults: extracting time-series...')
     "Importing parameters"
     S  = int(instance.Scenarios.extract_values()[None])
     P  = int(instance.Periods.extract_values()[None])
@@ -112,154 +153,200 @@ def TimeSeries(instance):
     Generator_Efficiency        = instance.Generator_Efficiency.extract_values()
     FUEL_emission               = instance.FUEL_emission.get_values()
     
-    "Creating TimeSeries dictionary and exporting excel"
-    TimeSeries = {}
+    "Columns of the time series: flow, components (None for flows without components), unit and values"
+    Generators = [Generator_Names[g] for g in range(1,G+1)]
+    Fuels      = [Fuel_Names[g] for g in range(1,G+1)]
+    flows = [('Electric Demand', None, 'Wh', Electric_Demand),
+             ('RES Production', [RES_Names[r] for r in range(1,R+1)], 'Wh', RES_Energy_Production)]
+    if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
+        flows += [('Generator Production', Generators, 'Wh', Generator_Energy_Total if instance.MILP_Formulation.value else Generator_Energy_Production)]
+        if instance.MILP_Formulation.value == 1 and instance.Generator_Partial_Load.value == 1:
+            flows += [('Generator Partial Load Production', Generators, 'Wh', Generator_Energy_Partial),
+                      ('Units of Generators in Partial Load', Generators, 'Wh', Generator_Partial),
+                      ('Units of Generators in Full Load', Generators, 'Wh', Generator_Full)]
+    if instance.Model_Components.value == 0 or instance.Model_Components.value == 1:
+        flows += [('Battery Discharge', None, 'Wh', BESS_Outflow),
+                  ('Battery Charge', None, 'Wh', BESS_Inflow)]
+    flows += [('Lost Load', None, 'Wh', Lost_Load),
+              ('Curtailment', None, 'Wh', Curtailment)]
+    if instance.Grid_Connection.value == 1:
+        flows += [('Electricity from grid', None, 'Wh', Electricity_From_Grid),
+                  ('Electricity to grid', None, 'Wh', Electricity_To_Grid)]
+    if instance.Model_Components.value == 0 or instance.Model_Components.value == 1:
+        flows += [('Battery SOC', None, 'Wh', BESS_SOC)]
+    if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
+        flows += [('Fuel Consumption', Fuels, 'Lt', None),                   # computed from the generator production
+                  ('CO2 emission', Fuels, 'kg', FUEL_emission)]
+
+    "Extracting each flow once into a (scenarios, years, [R|G], periods) view of a single array"
+    columns = [(flow, component, unit) for flow, components, unit, values in flows for component in (components or [''])]
+    Flows = np.empty((S, Y, len(columns), P))
+    Flow_Arrays = {}
+    c = 0
+    for flow, components, unit, values in flows:
+        Flow_Arrays[flow] = Flows[:, :, c, :] if components is None else Flows[:, :, c:c+len(components), :]
+        if values is not None:
+            indexed_array(values, Flow_Arrays[flow])
+        c += len(components or [''])
+    if 'Fuel Consumption' in Flow_Arrays:
+        Flow_Arrays['Fuel Consumption'][:] = (Flow_Arrays['Generator Production'] / np.array([LHV[g] for g in range(1,G+1)])[:, None]
+                                              / np.array([Generator_Efficiency[g] for g in range(1,G+1)])[:, None])
+
+    "Creating TimeSeries dictionary (one DataFrame per scenario and year, viewing the array without copies)"
+    TimeSeries = TimeSeriesResults(Flows, columns)
         
     for s in range(1,S+1):
         TimeSeries[s] = {}
-        current_directory = os.path.dirname(os.path.abspath(__file__))
-        results_directory = os.path.join(current_directory, '..', 'Results')
-        results_2_path = os.path.join(results_directory, 'Time_Series_SC_%d.xlsx' % (s))
-        with pd.ExcelWriter(results_2_path) as writer:
-         for y in range(1,Y+1):
-            
-            scenario_header  = []
-            flow_header      = []
-            component_header = []
-            unit_header      = []
-            
-            TimeSeries[s][y] = pd.DataFrame()
-            DEM = pd.DataFrame([Electric_Demand[(s,y,t)] for t in range(1,P+1)])
-            TimeSeries[s][y] = pd.concat([TimeSeries[s][y], DEM], axis=1)
-            scenario_header  += ['Scenario ' + str(s)]
-            flow_header      += ['Electric Demand']
-            component_header += ['']
-            unit_header      += ['Wh']
-            
-            for r in range(1,R+1):
-                RES = pd.DataFrame([RES_Energy_Production[(s,y,r,t)] for t in range(1,P+1)])
-                TimeSeries[s][y] = pd.concat([TimeSeries[s][y], RES], axis=1)
-                scenario_header  += ['Scenario ' + str(s)]
-                flow_header      += ['RES Production']
-                component_header += [RES_Names[r]]
-                unit_header      += ['Wh']
-            
-            # Total Energy Production of the generator
-            if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
-                for g in range(1,G+1):
-                    if instance.MILP_Formulation.value:
-                       GEN = pd.DataFrame([Generator_Energy_Total[(s,y,g,t)] for t in range(1,P+1)])
-                    else:
-                       GEN = pd.DataFrame([Generator_Energy_Production[(s,y,g,t)] for t in range(1,P+1)])
-                    TimeSeries[s][y] = pd.concat([TimeSeries[s][y], GEN], axis=1)
-                    scenario_header  += ['Scenario ' + str(s)]
-                    flow_header      += ['Generator Production']
-                    component_header += [Generator_Names[g]]
-                    unit_header      += ['Wh']
-                    
-                " Partial Load Effect"
-                # Generator Partial Load Production
-                if instance.MILP_Formulation.value == 1 and instance.Generator_Partial_Load.value == 1:
-                   for g in range(1,G+1):
-                       GEN_p = pd.DataFrame([Generator_Energy_Partial[(s,y,g,t)] for t in range(1,P+1)])
-                       TimeSeries[s][y] = pd.concat([TimeSeries[s][y], GEN_p], axis=1)
-                       scenario_header  += ['Scenario ' + str(s)]
-                       flow_header      += ['Generator Partial Load Production']
-                       component_header += [Generator_Names[g]]
-                       unit_header      += ['Wh']
-                
-                # Units of Generators in Partial Load (1 o 0)       
-                if instance.MILP_Formulation.value == 1 and instance.Generator_Partial_Load.value == 1:
-                   for g in range(1,G+1):
-                       GEN_pu = pd.DataFrame([Generator_Partial[(s,y,g,t)] for t in range(1,P+1)])
-                       TimeSeries[s][y] = pd.concat([TimeSeries[s][y], GEN_pu], axis=1)
-                       scenario_header  += ['Scenario ' + str(s)]
-                       flow_header      += ['Units of Generators in Partial Load']
-                       component_header += [Generator_Names[g]]
-                       unit_header      += ['Wh']
-                
-                # Units of Generators in Full Load
-                if instance.MILP_Formulation.value == 1 and instance.Generator_Partial_Load.value == 1:
-                   for g in range(1,G+1):
-                       GEN_fu = pd.DataFrame([Generator_Full[(s,y,g,t)] for t in range(1,P+1)])
-                       TimeSeries[s][y] = pd.concat([TimeSeries[s][y], GEN_fu], axis=1)
-                       scenario_header  += ['Scenario ' + str(s)]
-                       flow_header      += ['Units of Generators in Full Load']
-                       component_header += [Generator_Names[g]]
-                       unit_header      += ['Wh']
-                
-            BESS_OUT         = pd.DataFrame([BESS_Outflow[(s,y,t)] for t in range(1,P+1)])
-            BESS_IN          = pd.DataFrame([BESS_Inflow[(s,y,t)] for t in range(1,P+1)])
-            LL               = pd.DataFrame([Lost_Load[(s,y,t)] for t in range(1,P+1)])
-            CURTAIL          = pd.DataFrame([Curtailment[(s,y,t)] for t in range(1,P+1)])
-            EL_FROM_GRID     = pd.DataFrame([Electricity_From_Grid[(s,y,t)] for t in range(1,P+1)]) 
-            EL_TO_GRID       = pd.DataFrame([Electricity_To_Grid[(s,y,t)] for t in range(1,P+1)])    
-            if instance.Model_Components.value == 0 or instance.Model_Components.value == 1: 
-                if instance.Grid_Connection.value == 1:
-                    TimeSeries[s][y] = pd.concat([TimeSeries[s][y], BESS_OUT, BESS_IN, LL, CURTAIL, EL_FROM_GRID,EL_TO_GRID], axis=1) 
-                    scenario_header  += ['Scenario ' + str(s),'Scenario ' + str(s),'Scenario ' + str(s),'Scenario ' + str(s),'Scenario ' + str(s),'Scenario ' + str(s)]
-                    flow_header      += ['Battery Discharge','Battery Charge','Lost Load','Curtailment','Electricity from grid','Electricity to grid'] 
-                    component_header += ['','','','','','']
-                    unit_header      += ['Wh','Wh','Wh','Wh','Wh','Wh']
-                if instance.Grid_Connection.value == 0:
-                    TimeSeries[s][y] = pd.concat([TimeSeries[s][y], BESS_OUT, BESS_IN, LL, CURTAIL], axis=1) 
-                    scenario_header  += ['Scenario ' + str(s),'Scenario ' + str(s),'Scenario ' + str(s),'Scenario ' + str(s)]
-                    flow_header      += ['Battery Discharge','Battery Charge','Lost Load','Curtailment'] 
-                    component_header += ['','','','']
-                    unit_header      += ['Wh','Wh','Wh','Wh']
-                
-                
-                SOC              = pd.DataFrame([BESS_SOC[(s,y,t)] for t in range(1,P+1)])
-                TimeSeries[s][y] = pd.concat([TimeSeries[s][y], SOC], axis=1)
-                scenario_header  += ['Scenario ' + str(s)]
-                flow_header      += ['Battery SOC']
-                component_header += ['']
-                unit_header      += ['Wh']
-
-            if instance.Model_Components.value == 2: 
-                if instance.Grid_Connection.value == 1:
-                    TimeSeries[s][y] = pd.concat([TimeSeries[s][y], LL, CURTAIL, EL_FROM_GRID, EL_TO_GRID], axis=1) 
-                    scenario_header  += ['Scenario ' + str(s),'Scenario ' + str(s),'Scenario ' + str(s),'Scenario ' + str(s)]
-                    flow_header      += ['Lost Load','Curtailment','Electricity from grid','Electricity to grid'] 
-                    component_header += ['','','','']
-                    unit_header      += ['Wh','Wh','Wh','Wh']
-                if instance.Grid_Connection.value == 0:
-                    TimeSeries[s][y] = pd.concat([TimeSeries[s][y], LL, CURTAIL], axis=1) 
-                    scenario_header  += ['Scenario ' + str(s),'Scenario ' + str(s)]
-                    flow_header      += ['Lost Load','Curtailment'] 
-                    component_header += ['','']
-                    unit_header      += ['Wh','Wh']
-                
-            if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
-                for g in range(1,G+1):
-                    if instance.MILP_Formulation.value:
-                       FUEL = pd.DataFrame([Generator_Energy_Total[(s,y,g,t)]/LHV[g]/Generator_Efficiency[g] for t in range(1,P+1)])
-                    else:
-                       FUEL = pd.DataFrame([Generator_Energy_Production[(s,y,g,t)]/LHV[g]/Generator_Efficiency[g] for t in range(1,P+1)]) 
-                    TimeSeries[s][y] = pd.concat([TimeSeries[s][y], FUEL], axis=1)
-                    scenario_header  += ['Scenario ' + str(s)]
-                    flow_header      += ['Fuel Consumption']
-                    component_header += [Fuel_Names[g]]
-                    unit_header      += ['Lt']
-                    
-                for g in range(1,G+1):
-                    CO2              = pd.DataFrame([FUEL_emission[(s,y,g,t)] for t in range(1,P+1)])
-                    TimeSeries[s][y] = pd.concat([TimeSeries[s][y], CO2], axis=1)
-                    scenario_header  += ['Scenario ' + str(s)]
-                    flow_header      += ['CO2 emission']
-                    component_header += [Fuel_Names[g]]
-                    unit_header      += ['kg']            
-                
-            TimeSeries[s][y].columns = pd.MultiIndex.from_arrays([scenario_header, flow_header, component_header, unit_header], names=['','Flow','Component','Unit'])
-            date                     = str(start_year+y-1)+'/'+str(start_month)+'/'+str(start_day)+' '+str(start_hour)+':'+str(start_minute)
-            TimeSeries[s][y].index   = pd.date_range(start=date, periods=P, freq='H')
-            
-            round(TimeSeries[s][y],1).to_excel(writer, sheet_name='Year ' + str(y))
+        header = pd.MultiIndex.from_tuples([('Scenario ' + str(s),) + column for column in columns], names=['','Flow','Component','Unit'])
+        for y in range(1,Y+1):
+            date             = str(start_year+y-1)+'/'+str(start_month)+'/'+str(start_day)+' '+str(start_hour)+':'+str(start_minute)
+            TimeSeries[s][y] = pd.DataFrame(Flows[s-1, y-1].T, index=pd.date_range(start=date, periods=P, freq='h'), columns=header, copy=False)
             
     return TimeSeries
 
+
+#%% TimeSeries export
+TIME_SERIES_FORMATS = {0: 'xlsx', 1: 'csv', 2: 'parquet', 3: 'hdf5'}        # Time_Series_Format parameter -> file format
+
+def flat_columns(frame):
+    """
+    Returns the columns of a time series as single strings (e.g. 'RES Production | Solar PV [Wh]'), for columnar formats.
+    """
+    return [' | '.join(level for level in (flow, component) if level) + ' [' + unit + ']' for _, flow, component, unit in frame.columns]
+
+def write_scenario(TimeSeries, s, file_format, results_directory):
+    """
+    Writes the time series of scenario s (all years) in the given format and returns the path of the written file or folder.
+    """
+    if file_format == 'xlsx':
+        path = os.path.join(results_directory, 'Time_Series_SC_%d.xlsx' % (s))
+        with pd.ExcelWriter(path) as writer:
+            for y in TimeSeries[s]:
+                round(TimeSeries[s][y],1).to_excel(writer, sheet_name='Year ' + str(y))
+    elif file_format == 'csv':
+        path = os.path.join(results_directory, 'Time_Series_SC_%d.csv.gz' % (s))
+        pd.concat(TimeSeries[s].values()).to_csv(path, compression='gzip')
+    elif file_format == 'parquet':
+        path = os.path.join(results_directory, 'Time_Series', 'scenario=%d' % (s))                  # partitioned by scenario and year
+        for y in TimeSeries[s]:
+            os.makedirs(os.path.join(path, 'year=%d' % (y)), exist_ok=True)
+            frame = TimeSeries[s][y].set_axis(flat_columns(TimeSeries[s][y]), axis=1)
+            frame.to_parquet(os.path.join(path, 'year=%d' % (y), 'Time_Series.parquet'))
+    elif file_format == 'hdf5':
+        path = os.path.join(results_directory, 'Time_Series_SC_%d.h5' % (s))
+        for i, y in enumerate(TimeSeries[s]):
+            TimeSeries[s][y].set_axis(flat_columns(TimeSeries[s][y]), axis=1).to_hdf(path, key='Year_%d' % (y), mode='a' if i else 'w', complevel=5)
+    else:
+        raise ValueError(f"Unknown time series format '{file_format}': use one of {', '.join(TIME_SERIES_FORMATS.values())}")
+    return path
+
+def export_time_series(TimeSeries, file_format='csv', results_directory=None):
+    """
+    Exports the time series (one file per scenario, or one folder for Parquet). Parquet scenarios are written in parallel
+    threads, pyarrow releasing the GIL while encoding; the other writers hold the GIL (openpyxl, to_csv) or are not
+    thread-safe (HDF5), so their scenarios are written one after the other. Excel files are the slowest to write: a faster format can be selected with the Time_Series_Format parameter
+    and the Excel files exported later on, when needed, with export_time_series(TimeSeries, 'xlsx').
+
+    Parameters:
+    TimeSeries (dict): Time series as returned by TimeSeries, TimeSeries[s][y] being the DataFrame of scenario s and year y.
+    file_format (str): 'xlsx' (one sheet per year), 'csv' (gzip compressed), 'parquet' (partitioned by scenario and year) or 'hdf5' (one key per year).
+    results_directory (str): Folder of the exported files (default: Results).
+
+    Returns:
+    list: Paths of the written files.
+    """
+    if results_directory is None:
+        current_directory = os.path.dirname(os.path.abspath(__file__))
+        results_directory = os.path.join(current_directory, '..', 'Results')
+    if file_format in ('parquet', 'hdf5') and importlib.util.find_spec('pyarrow' if file_format == 'parquet' else 'tables') is None:
+        print(f"Results: {file_format} export requires the {'pyarrow' if file_format == 'parquet' else 'tables'} package, time-series exported as compressed csv")
+        file_format = 'csv'
+    print(f'Results: exporting time-series ({file_format})...')
+    if file_format == 'parquet':
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(len(TimeSeries), os.cpu_count() or 1)) as executor:
+            return list(executor.map(lambda s: write_scenario(TimeSeries, s, file_format, results_directory), TimeSeries))
+    return [write_scenario(TimeSeries, s, file_format, results_directory) for s in TimeSeries]
+
     
-#%% Economic output        
+#%% Economic output
+def step_costs(costs):
+    """
+    Columns of a cost row from its costs at each investment step [kUSD]: one column per step plus their total,
+    or the total alone when the project has a single investment step.
+    """
+    if len(costs) == 1: return {'Total': costs[0]}
+    values = {'Step '+str(st): cost for st, cost in enumerate(costs, 1)}
+    values['Total'] = costs.sum()
+    return values
+
+def technology_rows(names, investment, fixed):
+    """
+    Investment and fixed cost rows of the components of a technology, given the investments at each step
+    (steps x components) and the fixed costs (components) [USD].
+    """
+    return ([('Investment cost', name, '-', 'kUSD', step_costs(investment[:,k]/1e3)) for k, name in enumerate(names)] +
+            [('Fixed cost', name, '-', 'kUSD', {'Total': fixed[k]/1e3}) for k, name in enumerate(names)])
+
+def scenario_rows(item, component, unit, values):
+    """
+    One row per scenario of a cost or emission item, given its values by scenario (in thousandths of the unit).
+    """
+    return [(item, component, s, unit, {'Total': value/1e3}) for s, value in values.items()]
+
+def cost_table(rows, columns):
+    """
+    Builds a cost table in a single construction from rows (cost item, component, scenario, unit, values),
+    values being a dict of the row's columns. Columns missing from a row are shown as '-'.
+    """
+    index = pd.MultiIndex.from_tuples([row[:4] for row in rows], names=['Cost item', 'Component', 'Scenario', 'Unit'])
+    table = pd.DataFrame([row[4] for row in rows], index=index, columns=columns, dtype=float).round(4)
+    return table.astype(object).where(table.notna(), '-')
+
+def installed_capacity(instance):
+    """
+    Capacity of each technology at each investment step (steps x components) with the existing capacity and the specific
+    investment and O&M costs of its components, as {technology: (component names, capacity, existing, investment, O&M)}.
+    """
+    ST = int(instance.Steps_Number.extract_values()[None])
+    R  = int(instance.RES_Sources.extract_values()[None])
+    G  = int(instance.Generator_Types.extract_values()[None])
+    Components = instance.Model_Components.value
+
+    "Renewable sources"
+    RES_Nominal_Capacity = np.array(list(instance.RES_Nominal_Capacity.extract_values().values()), dtype=float)
+    if instance.MILP_Formulation.value:
+        RES_Capacity = indexed_array(instance.RES_Units_milp.get_values(), np.empty((ST,R)))*RES_Nominal_Capacity
+    else:
+        RES_Capacity = indexed_array(instance.RES_Units.get_values(), np.empty((ST,R)))*RES_Nominal_Capacity
+    Technologies = {'RES': (list(instance.RES_Names.extract_values().values()), RES_Capacity,
+                            np.array(list(instance.RES_capacity.extract_values().values()), dtype=float),
+                            np.array(list(instance.RES_Specific_Investment_Cost.extract_values().values()), dtype=float),
+                            np.array(list(instance.RES_Specific_OM_Cost.extract_values().values()), dtype=float))}
+
+    "Battery bank"
+    if Components == 0 or Components == 1:
+        if instance.MILP_Formulation.value:
+            BESS_Capacity = np.array(list(instance.Battery_Units.get_values().values()), dtype=float)*instance.Battery_Nominal_Capacity_milp.value
+        else:
+            BESS_Capacity = np.array(list(instance.Battery_Nominal_Capacity.get_values().values()), dtype=float)
+        Technologies['BESS'] = (['Battery bank'], BESS_Capacity[:,None],
+                                np.array([instance.Battery_capacity.value], dtype=float),
+                                np.array([instance.Battery_Specific_Investment_Cost.value], dtype=float),
+                                np.array([instance.Battery_Specific_OM_Cost.value], dtype=float))
+
+    "Generators"
+    if Components == 0 or Components == 2:
+        if instance.MILP_Formulation.value:
+            Generator_Capacity = indexed_array(instance.Generator_Units.get_values(), np.empty((ST,G)))*np.array(list(instance.Generator_Nominal_Capacity_milp.extract_values().values()), dtype=float)
+        else:
+            Generator_Capacity = indexed_array(instance.Generator_Nominal_Capacity.get_values(), np.empty((ST,G)))
+        Technologies['GEN'] = (list(instance.Generator_Names.extract_values().values()), Generator_Capacity,
+                               np.array(list(instance.Generator_capacity.extract_values().values()), dtype=float),
+                               np.array(list(instance.Generator_Specific_Investment_Cost.extract_values().values()), dtype=float),
+                               np.array(list(instance.Generator_Specific_OM_Cost.extract_values().values()), dtype=float))
+
+    return Technologies
+
 def EnergySystemCost(instance, Optimization_Goal):
     
     #%% Importing parameters
@@ -294,493 +381,88 @@ def EnergySystemCost(instance, Optimization_Goal):
     for i in range(0,ST-1):
         tup_list[i] = yu_tuples_list[s_dur*i + s_dur]      
 
+    Year_Step       = np.array([st for (y,st) in yu_tuples_list]) - 1                                   # investment step of each year (from 0)
+    Step_Discount   = (1+Discount_Rate)**np.array([0] + [y-1 for (y,st) in tup_list], dtype=float)      # discount of the investments of each step
+    Year_Discount   = (1+Discount_Rate)**np.arange(1, Y+1, dtype=float)                                  # discount of the fixed costs of each year
+    Components      = instance.Model_Components.value
+    Grid_Connection = instance.Grid_Connection.value
 
-    #%% Investment cost
-    "Total"
-    Grid_Investment = (instance.Grid_Connection_Cost.value * instance.Grid_Connection.value * instance.Grid_Distance.value)/(1 + instance.Discount_Rate.value)**(instance.Year_Grid_Connection.value-1)
-    Total_Investment_Cost = pd.DataFrame(['Total Investment cost', 'System', '-', 'kUSD', (instance.Investment_Cost.value + Grid_Investment)/1e3]).T.set_index([0,1,2,3])
-    Total_Investment_Cost.columns = ['Total']
-
-    if instance.MILP_Formulation.value:
-     "Renewable sources"
-     RES_Units_milp = instance.RES_Units_milp.get_values()
-     RES_Nominal_Capacity = instance.RES_Nominal_Capacity.extract_values()
-     RES_capacity = instance.RES_capacity.extract_values()
-     RES_Inv_Specific_Cost = instance.RES_Specific_Investment_Cost.extract_values()
-     RES_Investment_Cost = pd.DataFrame()
-     for r in range(1,R+1):
-        r_inv = ((RES_Units_milp[1,r]*RES_Nominal_Capacity[r])-RES_capacity[r])*RES_Inv_Specific_Cost[r]
-        res_inv = pd.DataFrame(['Investment cost', RES_Names[r], '-', 'kUSD', r_inv/1e3]).T.set_index([0,1,2,3]) 
-        if ST == 1:
-            res_inv.columns = ['Total']
-        else:
-            res_inv.columns = ['Step 1']
-        res_inv.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-        RES_Investment_Cost = pd.concat([RES_Investment_Cost, res_inv], axis=1).fillna(0)
-        for (y,st) in tup_list:
-            r_inv = (RES_Units_milp[st,r]-RES_Units_milp[st-1,r])*RES_Nominal_Capacity[r]*RES_Inv_Specific_Cost[r]/((1+Discount_Rate)**(y-1))
-            res_inv = pd.DataFrame(['Investment cost', RES_Names[r], '-', 'kUSD', r_inv/1e3]).T.set_index([0,1,2,3]) 
-            if ST == 1:
-                res_inv.columns = ['Total']
-            else:
-                res_inv.columns = ['Step '+str(st)]
-            res_inv.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-            RES_Investment_Cost = pd.concat([RES_Investment_Cost, res_inv], axis=1).fillna(0)
-     RES_Investment_Cost = RES_Investment_Cost.groupby(level=[0], axis=1, sort=False).sum()
-     res_inv_tot = RES_Investment_Cost.sum(1).to_frame()
-     res_inv_tot.columns = ['Total']
-     if ST != 1:
-        RES_Investment_Cost = pd.concat([RES_Investment_Cost, res_inv_tot],axis=1)
-        
-     "Battery Bank"
-     if instance.Model_Components.value == 0 or instance.Model_Components.value == 1:
-         BESS_Units = instance.Battery_Units.get_values()
-         BESS_Nominal_Capacity_milp = instance.Battery_Nominal_Capacity_milp.value
-         BESS_capacity = instance.Battery_capacity.value
-         BESS_Inv_Specific_Cost = instance.Battery_Specific_Investment_Cost.value
-         BESS_Investment_Cost = pd.DataFrame()
-         b_inv = ((BESS_Units[1]*BESS_Nominal_Capacity_milp)-BESS_capacity)*BESS_Inv_Specific_Cost
-         bess_inv = pd.DataFrame(['Investment cost', 'Battery bank', '-', 'kUSD', b_inv/1e3]).T.set_index([0,1,2,3]) 
-         if ST == 1:
-            bess_inv.columns = ['Total']
-         else:
-            bess_inv.columns = ['Step 1']
-         bess_inv.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-         BESS_Investment_Cost = pd.concat([BESS_Investment_Cost, bess_inv], axis=1).fillna(0)
-         for (y,st) in tup_list:
-            b_inv = (BESS_Units[st]-BESS_Units[st-1])*BESS_Nominal_Capacity_milp*BESS_Inv_Specific_Cost/((1+Discount_Rate)**(y-1))
-            bess_inv = pd.DataFrame(['Investment cost', 'Battery bank', '-', 'kUSD', b_inv/1e3]).T.set_index([0,1,2,3]) 
-            if ST == 1:
-                bess_inv.columns = ['Total']
-            else:
-                bess_inv.columns = ['Step '+str(st)]
-            bess_inv.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-            BESS_Investment_Cost = pd.concat([BESS_Investment_Cost, bess_inv], axis=1).fillna(0)
-         BESS_Investment_Cost = BESS_Investment_Cost.groupby(level=[0], axis=1, sort=False).sum()
-         bess_inv_tot = BESS_Investment_Cost.sum(1).to_frame()
-         bess_inv_tot.columns = ['Total']
-         if ST != 1:
-            BESS_Investment_Cost = pd.concat([BESS_Investment_Cost, bess_inv_tot],axis=1)
-        
-     "Generator"
-     if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
-         Generator_Units = instance.Generator_Units.get_values()   
-         Generator_Inv_Specific_Cost = instance.Generator_Specific_Investment_Cost.extract_values()
-         Generator_capacity = instance.Generator_capacity.extract_values()
-         Generator_Nominal_Capacity_milp = instance.Generator_Nominal_Capacity_milp.extract_values()    
-         Generator_Investment_Cost = pd.DataFrame()
-         for g in range(1,G+1):
-            g_inv = ((Generator_Units[1,g]*Generator_Nominal_Capacity_milp[g])-Generator_capacity[g])*Generator_Inv_Specific_Cost[g]
-            gen_inv = pd.DataFrame(['Investment cost', Generator_Names[g], '-', 'kUSD', g_inv/1e3]).T.set_index([0,1,2,3]) 
-            if ST == 1:
-                gen_inv.columns = ['Total']
-            else:
-                gen_inv.columns = ['Step 1']
-            gen_inv.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-            Generator_Investment_Cost = pd.concat([Generator_Investment_Cost, gen_inv], axis=1).fillna(0)
-            for (y,st) in tup_list:
-                g_inv = ((Generator_Units[st,g]-Generator_Units[st-1,g])*Generator_Nominal_Capacity_milp[g])*Generator_Inv_Specific_Cost[g]/((1+Discount_Rate)**(y-1))
-                gen_inv = pd.DataFrame(['Investment cost', Generator_Names[g], '-', 'kUSD', g_inv/1e3]).T.set_index([0,1,2,3]) 
-                if ST == 1:
-                    gen_inv.columns = ['Total']
-                else:
-                    gen_inv.columns = ['Step '+str(st)]
-                gen_inv.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-                Generator_Investment_Cost = pd.concat([Generator_Investment_Cost, gen_inv], axis=1).fillna(0)
-         Generator_Investment_Cost = Generator_Investment_Cost.groupby(level=[0], axis=1, sort=False).sum()
-         gen_inv_tot = Generator_Investment_Cost.sum(1).to_frame()
-         gen_inv_tot.columns = ['Total']
-         if ST != 1:
-            Generator_Investment_Cost = pd.concat([Generator_Investment_Cost, gen_inv_tot],axis=1)
-        
-    else:
-        
-     "Renewable sources"
-     RES_Units = instance.RES_Units.get_values()
-     RES_Nominal_Capacity = instance.RES_Nominal_Capacity.extract_values()
-     RES_capacity = instance.RES_capacity.extract_values()
-     RES_Inv_Specific_Cost = instance.RES_Specific_Investment_Cost.extract_values()
-     RES_Investment_Cost = pd.DataFrame()
-     for r in range(1,R+1):
-        r_inv = ((RES_Units[1,r]*RES_Nominal_Capacity[r])-RES_capacity[r])*RES_Inv_Specific_Cost[r]
-        res_inv = pd.DataFrame(['Investment cost', RES_Names[r], '-', 'kUSD', r_inv/1e3]).T.set_index([0,1,2,3]) 
-        if ST == 1:
-            res_inv.columns = ['Total']
-        else:
-            res_inv.columns = ['Step 1']
-        res_inv.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-        RES_Investment_Cost = pd.concat([RES_Investment_Cost, res_inv], axis=1).fillna(0)
-        for (y,st) in tup_list:
-            r_inv = (RES_Units[st,r]-RES_Units[st-1,r])*RES_Nominal_Capacity[r]*RES_Inv_Specific_Cost[r]/((1+Discount_Rate)**(y-1))
-            res_inv = pd.DataFrame(['Investment cost', RES_Names[r], '-', 'kUSD', r_inv/1e3]).T.set_index([0,1,2,3]) 
-            if ST == 1:
-                res_inv.columns = ['Total']
-            else:
-                res_inv.columns = ['Step '+str(st)]
-            res_inv.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-            RES_Investment_Cost = pd.concat([RES_Investment_Cost, res_inv], axis=1).fillna(0)
-     RES_Investment_Cost = RES_Investment_Cost.groupby(level=[0], axis=1, sort=False).sum()
-     res_inv_tot = RES_Investment_Cost.sum(1).to_frame()
-     res_inv_tot.columns = ['Total']
-     if ST != 1:
-        RES_Investment_Cost = pd.concat([RES_Investment_Cost, res_inv_tot],axis=1)
-        
-     "Battery bank"
-     if instance.Model_Components.value == 0 or instance.Model_Components.value == 1:
-         BESS_Nominal_Capacity = instance.Battery_Nominal_Capacity.get_values()
-         BESS_capacity = instance.Battery_capacity.value
-         BESS_Inv_Specific_Cost = instance.Battery_Specific_Investment_Cost.value
-         BESS_Investment_Cost = pd.DataFrame()
-         b_inv = (BESS_Nominal_Capacity[1]-BESS_capacity)*BESS_Inv_Specific_Cost
-         bess_inv = pd.DataFrame(['Investment cost', 'Battery bank', '-', 'kUSD', b_inv/1e3]).T.set_index([0,1,2,3]) 
-         if ST == 1:
-            bess_inv.columns = ['Total']
-         else:
-            bess_inv.columns = ['Step 1']
-         bess_inv.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-         BESS_Investment_Cost = pd.concat([BESS_Investment_Cost, bess_inv], axis=1).fillna(0)
-         for (y,st) in tup_list:
-            b_inv = (BESS_Nominal_Capacity[st]-BESS_Nominal_Capacity[st-1])*BESS_Inv_Specific_Cost/((1+Discount_Rate)**(y-1))
-            bess_inv = pd.DataFrame(['Investment cost', 'Battery bank', '-', 'kUSD', b_inv/1e3]).T.set_index([0,1,2,3]) 
-            if ST == 1:
-                bess_inv.columns = ['Total']
-            else:
-                bess_inv.columns = ['Step '+str(st)]
-            bess_inv.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-            BESS_Investment_Cost = pd.concat([BESS_Investment_Cost, bess_inv], axis=1).fillna(0)
-         BESS_Investment_Cost = BESS_Investment_Cost.groupby(level=[0], axis=1, sort=False).sum()
-         bess_inv_tot = BESS_Investment_Cost.sum(1).to_frame()
-         bess_inv_tot.columns = ['Total']
-         if ST != 1:
-            BESS_Investment_Cost = pd.concat([BESS_Investment_Cost, bess_inv_tot],axis=1)
-        
-     "Generator"
-     if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
-         Generator_Capacity = instance.Generator_Nominal_Capacity.get_values()   
-         Generator_Inv_Specific_Cost = instance.Generator_Specific_Investment_Cost.extract_values()
-         Generator_capacity = instance.Generator_capacity.extract_values()     
-         Generator_Investment_Cost = pd.DataFrame()
-         for g in range(1,G+1):
-            g_inv = (Generator_Capacity[1,g]-Generator_capacity[g])*Generator_Inv_Specific_Cost[g]
-            gen_inv = pd.DataFrame(['Investment cost', Generator_Names[g], '-', 'kUSD', g_inv/1e3]).T.set_index([0,1,2,3]) 
-            if ST == 1:
-                gen_inv.columns = ['Total']
-            else:
-                gen_inv.columns = ['Step 1']
-            gen_inv.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-            Generator_Investment_Cost = pd.concat([Generator_Investment_Cost, gen_inv], axis=1).fillna(0)
-            for (y,st) in tup_list:
-                g_inv = (Generator_Capacity[st,g]-Generator_Capacity[st-1,g])*Generator_Inv_Specific_Cost[g]/((1+Discount_Rate)**(y-1))
-                gen_inv = pd.DataFrame(['Investment cost', Generator_Names[g], '-', 'kUSD', g_inv/1e3]).T.set_index([0,1,2,3]) 
-                if ST == 1:
-                    gen_inv.columns = ['Total']
-                else:
-                    gen_inv.columns = ['Step '+str(st)]
-                gen_inv.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-                Generator_Investment_Cost = pd.concat([Generator_Investment_Cost, gen_inv], axis=1).fillna(0)
-         Generator_Investment_Cost = Generator_Investment_Cost.groupby(level=[0], axis=1, sort=False).sum()
-         gen_inv_tot = Generator_Investment_Cost.sum(1).to_frame()
-         gen_inv_tot.columns = ['Total']
-         if ST != 1:
-            Generator_Investment_Cost = pd.concat([Generator_Investment_Cost, gen_inv_tot],axis=1)
-
-    "National Grid"
-    if instance.Grid_Connection.value == 1:
-        Grid_Connection_Specific_Cost = instance.Grid_Connection_Cost.extract_values()  
-        Grid_Distance = instance.Grid_Distance.extract_values()   
-        Grid_Investment_Cost = pd.DataFrame()
-        gr_inv = Grid_Distance[None]*Grid_Connection_Specific_Cost[None]*instance.Grid_Connection.value
-        grid_inv = pd.DataFrame(['Investment cost', 'National Grid', '-', 'kUSD', gr_inv/1e3]).T.set_index([0,1,2,3]) 
-        if ST == 1:
-            grid_inv.columns = ['Total']
-        else:
-            grid_inv.columns = ['Step 1']
-        grid_inv.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-        Grid_Investment_Cost = pd.concat([Grid_Investment_Cost, grid_inv], axis=1).fillna(0)
-        for (y,st) in tup_list:
-            gr_inv = (Grid_Distance[None]*Grid_Connection_Specific_Cost[None]*instance.Grid_Connection.value)/((1+Discount_Rate)**(y-1))
-            grid_inv = pd.DataFrame(['Investment cost', 'National Grid', '-', 'kUSD', gr_inv/1e3]).T.set_index([0,1,2,3]) 
-            if ST == 1:
-                grid_inv.columns = ['Total']
-            else:
-                grid_inv.columns = ['Step '+str(st)]
-            grid_inv.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-            Grid_Investment_Cost = pd.concat([Grid_Investment_Cost, grid_inv], axis=1).fillna(0)
-        Grid_Investment_Cost = Grid_Investment_Cost.groupby(level=[0], axis=1, sort=False).sum()
-        grid_inv_tot = Grid_Investment_Cost.sum(1).to_frame()
-        grid_inv_tot.columns = ['Total']
-        if ST != 1:
-            Grid_Investment_Cost = pd.concat([Grid_Investment_Cost, grid_inv_tot],axis=1)
- 
-
-    #%% Fixed costs  
-    
-    "Renewable sources"    
-    RES_OM_Specific_Cost = instance.RES_Specific_OM_Cost.extract_values()
-    RES_Fixed_Cost = pd.DataFrame()
-    for r in range(1,R+1):
-        r_fc = 0
-        for (y,st) in yu_tuples_list:
-            if instance.MILP_Formulation.value:
-               r_fc += RES_Units_milp[st,r]*RES_Nominal_Capacity[r]*RES_Inv_Specific_Cost[r]*RES_OM_Specific_Cost[r]/((1+Discount_Rate)**(y))
-            else:
-               r_fc += RES_Units[st,r]*RES_Nominal_Capacity[r]*RES_Inv_Specific_Cost[r]*RES_OM_Specific_Cost[r]/((1+Discount_Rate)**(y))
-        res_fc = pd.DataFrame(['Fixed cost', RES_Names[r], '-', 'kUSD', r_fc/1e3]).T.set_index([0,1,2,3]) 
-        res_fc.columns = ['Total']
-        res_fc.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-        RES_Fixed_Cost = pd.concat([RES_Fixed_Cost, res_fc], axis=1).fillna(0)
-    RES_Fixed_Cost = RES_Fixed_Cost.groupby(level=[0], axis=1, sort=False).sum()
-
-    "Battery bank"
-    if instance.Model_Components.value == 0 or instance.Model_Components.value == 1:
-        BESS_OM_Specific_Cost = instance.Battery_Specific_OM_Cost.value    
-        BESS_Fixed_Cost = pd.DataFrame()
-        b_fc = 0
-        for (y,st) in yu_tuples_list:
-            if instance.MILP_Formulation.value:
-               b_fc += BESS_Units[st]*BESS_Nominal_Capacity_milp*BESS_Inv_Specific_Cost*BESS_OM_Specific_Cost/((1+Discount_Rate)**(y))
-            else:
-               b_fc += BESS_Nominal_Capacity[st]*BESS_Inv_Specific_Cost*BESS_OM_Specific_Cost/((1+Discount_Rate)**(y))
-        bess_fc = pd.DataFrame(['Fixed cost', 'Battery bank', '-', 'kUSD', b_fc/1e3]).T.set_index([0,1,2,3]) 
-        bess_fc.columns = ['Total']
-        bess_fc.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-        BESS_Fixed_Cost = pd.concat([BESS_Fixed_Cost, bess_fc], axis=1).fillna(0) 
-        BESS_Fixed_Cost = BESS_Fixed_Cost.groupby(level=[0], axis=1, sort=False).sum()
-        
-    "Generators"
-    if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
-        Generator_OM_Specific_Cost = instance.Generator_Specific_OM_Cost.extract_values()     
-        Generator_Fixed_Cost = pd.DataFrame()
-        for g in range(1,G+1):
-            g_fc = 0
-            for (y,st) in yu_tuples_list:
-                if instance.MILP_Formulation.value:
-                   g_fc += (Generator_Units[st,g]*Generator_Nominal_Capacity_milp[g])*Generator_Inv_Specific_Cost[g]*Generator_OM_Specific_Cost[g]/((1+Discount_Rate)**(y))
-                else:
-                    g_fc += Generator_Capacity[st,g]*Generator_Inv_Specific_Cost[g]*Generator_OM_Specific_Cost[g]/((1+Discount_Rate)**(y))
-            gen_fc = pd.DataFrame(['Fixed cost', Generator_Names[g], '-', 'kUSD', g_fc/1e3]).T.set_index([0,1,2,3]) 
-            gen_fc.columns = ['Total']
-            gen_fc.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-            Generator_Fixed_Cost = pd.concat([Generator_Fixed_Cost, gen_fc], axis=1).fillna(0)
-        Generator_Fixed_Cost = Generator_Fixed_Cost.groupby(level=[0], axis=1, sort=False).sum()
+    #%% Investment and fixed costs
+    "Investments of each step are paid on the capacity added since the previous one, fixed costs on the capacity of each year"
+    Investment_Cost, Fixed_Cost = {}, {}
+    for tech, (names, capacity, existing, inv_cost, om_cost) in installed_capacity(instance).items():
+        Investment_Cost[tech] = np.diff(capacity, axis=0, prepend=existing[None,:])*inv_cost/Step_Discount[:,None]
+        Fixed_Cost[tech] = (capacity[Year_Step]*inv_cost*om_cost/Year_Discount[:,None]).sum(axis=0)
 
     "National Grid"
-    if instance.Grid_Connection.value == 1:
-        Grid_OM_Cost = (instance.Grid_Connection_Cost.value * instance.Grid_Connection.value * instance.Grid_Distance.value)* instance.Grid_Maintenance_Cost.value   
-        Grid_Fixed_Cost = pd.DataFrame()
-        g_fc = 0
-        for (y,st) in yu_tuples_list:
-            if y < instance.Year_Grid_Connection.extract_values()[None]:
-                g_fc += (0)/((1+Discount_Rate)**(y))
-            else:
-                g_fc += (Grid_OM_Cost)/((1+Discount_Rate)**(y))
-        grid_fc = pd.DataFrame(['Fixed cost', 'National Grid', '-', 'kUSD', g_fc/1e3]).T.set_index([0,1,2,3]) 
-        grid_fc.columns = ['Total']
-        grid_fc.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-        Grid_Fixed_Cost = pd.concat([Grid_Fixed_Cost, grid_fc], axis=1).fillna(0)
-        Grid_Fixed_Cost = Grid_Fixed_Cost.groupby(level=[0], axis=1, sort=False).sum()
-        
-    "Total"
-    if instance.Optimization_Goal.value == 0:
-        if instance.Grid_Connection.value == 1:
-            Fixed_Costs_Act = pd.DataFrame(['Total fixed O&M cost', 'System', '-', 'kUSD', (instance.Operation_Maintenance_Cost_Act.value + Grid_Fixed_Cost.iloc[0]['Total']*1000)/1e3]).T.set_index([0,1,2,3])
-        if instance.Grid_Connection.value == 0:
-            Fixed_Costs_Act = pd.DataFrame(['Total fixed O&M cost', 'System', '-', 'kUSD', (instance.Operation_Maintenance_Cost_Act.value)/1e3]).T.set_index([0,1,2,3])
+    Grid_Investment = (instance.Grid_Connection_Cost.value * Grid_Connection * instance.Grid_Distance.value)/(1 + Discount_Rate)**(instance.Year_Grid_Connection.value-1)
+    if Grid_Connection == 1:
+        Grid_OM_Cost = (instance.Grid_Connection_Cost.value * Grid_Connection * instance.Grid_Distance.value)* instance.Grid_Maintenance_Cost.value   
+        Investment_Cost['Grid'] = np.full((ST,1), instance.Grid_Distance.value*instance.Grid_Connection_Cost.value*Grid_Connection)/Step_Discount[:,None]
+        Fixed_Cost['Grid'] = np.array([(Grid_OM_Cost/Year_Discount[instance.Year_Grid_Connection.value-1:]).sum()])
+        Grid_Fixed_Cost = Fixed_Cost['Grid'][0]/1e3
     else:
-        if instance.Grid_Connection.value == 1:
-            Fixed_Costs_NonAct = pd.DataFrame(['Total fixed O&M cost (Not Actualized)', 'System', '-', 'kUSD', (instance.Operation_Maintenance_Cost_NonAct.value + Grid_Fixed_Cost.iloc[0]['Total']*1000)/1e3]).T.set_index([0,1,2,3])
-        if instance.Grid_Connection.value == 0:
-            Fixed_Costs_NonAct = pd.DataFrame(['Total fixed O&M cost (Not Actualized)', 'System', '-', 'kUSD', (instance.Operation_Maintenance_Cost_NonAct.value)/1e3]).T.set_index([0,1,2,3])
-        Fixed_Costs_NonAct.columns = ['Total']     
-    #%% Variable costs
+        Grid_Fixed_Cost = 0
+    Grid_Revenue = instance.Total_Revenues_Act.get_values()[1]/1e3 if Grid_Connection == 1 else 0                  # revenues of the first scenario [kUSD]
 
-    "Grid electricity cost and revenue"  
-    if instance.Grid_Connection.value == 1:
-        Grid_El_Cost = pd.DataFrame()
-        Grid_El_Rev = pd.DataFrame()
-        for s in range(1,S+1):
-            Grid_Cost = pd.DataFrame(['Grid electricity cost', "National Grid", s , 'kUSD', instance.Total_Electricity_Cost_Act.get_values()[s]/1e3]).T
-            Grid_Rev = pd.DataFrame(['Grid electricity revenue', "National Grid", s , 'kUSD', instance.Total_Revenues_Act.get_values()[s]/1e3]).T
-            Grid_El_Cost = pd.concat([Grid_El_Cost, Grid_Cost], axis=0)
-            Grid_El_Rev = pd.concat([Grid_El_Rev, Grid_Rev], axis=0)
-        Grid_El_Cost = Grid_El_Cost.set_index([0,1,2,3])
-        Grid_El_Rev = Grid_El_Rev.set_index([0,1,2,3])
-        Grid_El_Cost.columns = ['Total']
-        Grid_El_Rev.columns = ['Total']    
-    
-    "Total"
-    Variable_Costs_Act = pd.DataFrame()
-    for s in range(1,S+1):
-        if instance.Grid_Connection.value == 1:
-            Variable_Cost = pd.DataFrame(['Total variable O&M cost', 'System', s, 'kUSD', (instance.Total_Scenario_Variable_Cost_Act.get_values()[s] - instance.Operation_Maintenance_Cost_Act.value +
-                                          Grid_El_Rev.iloc[0]['Total']*1000)/1e3]).T
-        if instance.Grid_Connection.value == 0:
-            Variable_Cost = pd.DataFrame(['Total variable O&M cost', 'System', s, 'kUSD', (instance.Total_Scenario_Variable_Cost_Act.get_values()[s] - instance.Operation_Maintenance_Cost_Act.value)/1e3]).T
-        Variable_Costs_Act = pd.concat([Variable_Costs_Act, Variable_Cost], axis=0)
-    Variable_Costs_Act = Variable_Costs_Act.set_index([0,1,2,3])
-    Variable_Costs_Act.columns = ['Total']      
-
-    "Replacement cost"
-    if instance.Model_Components.value == 0 or instance.Model_Components.value == 1:
-        BESS_Replacement_Cost = pd.DataFrame()
-        for s in range(1,S+1):
-            BESS_Rep = pd.DataFrame(['Replacement cost', 'Battery bank', s, 'kUSD', instance.Battery_Replacement_Cost_Act.get_values()[s]/1e3]).T
-            BESS_Replacement_Cost = pd.concat([BESS_Replacement_Cost, BESS_Rep], axis=0)
-        BESS_Replacement_Cost = BESS_Replacement_Cost.set_index([0,1,2,3])
-        BESS_Replacement_Cost.columns = ['Total']
-
-    "Fuel cost" 
-    if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
-        Fuel_Cost = pd.DataFrame()
-        for g in range(1,G+1):   
-            for s in range(1,S+1):
-                fc = pd.DataFrame(['Fuel cost', Fuel_Names[g], s, 'kUSD', instance.Total_Fuel_Cost_Act.get_values()[s,g]/1e3]).T
-                Fuel_Cost = pd.concat([Fuel_Cost, fc], axis=0)
-        Fuel_Cost = Fuel_Cost.set_index([0,1,2,3])
-        Fuel_Cost.columns = ['Total']
-    
-    "Lost load cost"
+    #%% Net present cost and levelized cost of energy
     if instance.Optimization_Goal.value == 0:
-        LostLoad_Cost = pd.DataFrame()        
-        for s in range(1,S+1):
-            LostLoad = pd.DataFrame(['Lost load cost', 'System', s, 'kUSD', instance.Scenario_Lost_Load_Cost_Act.get_values()[s]/1e3]).T
-            LostLoad_Cost = pd.concat([LostLoad_Cost, LostLoad], axis=0)
-        LostLoad_Cost = LostLoad_Cost.set_index([0,1,2,3])
-        LostLoad_Cost.columns = ['Total']
-    else:
-        LostLoad_Cost = pd.DataFrame()        
-        for s in range(1,S+1):
-            LostLoad = pd.DataFrame(['Lost load cost (Not Actualized)', 'System', s, 'kUSD', instance.Scenario_Lost_Load_Cost_NonAct.get_values()[s]/1e3]).T
-            LostLoad_Cost = pd.concat([LostLoad_Cost, LostLoad], axis=0)
-        LostLoad_Cost = LostLoad_Cost.set_index([0,1,2,3])
-        LostLoad_Cost.columns = ['Total']
-
-
-    #%% Salvage value
-    Salvage_Value = pd.DataFrame(['Salvage value', 'System', '-', 'kUSD', -instance.Salvage_Value.value/1e3]).T.set_index([0,1,2,3])
-    Salvage_Value.columns = ['Total']      
-    
-    #%% Emission
-    CO2_out = pd.DataFrame()  
-    for s in range(1,S+1):
-        CO = pd.DataFrame(['TOTAL CO2 emission', 'System', s, 'ton', instance.Scenario_CO2_emission.get_values()[s]/1e3]).T
-        CO2_out = pd.concat([CO2_out, CO], axis=0)
-    CO2_out = CO2_out.set_index([0,1,2,3])
-    CO2_out.columns = ['Total']
-    
-    if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
-        CO2_fuel = pd.DataFrame()  
-        for s in range(1,S+1):
-            CO = pd.DataFrame(['Fuel CO2 emission', 'System', s, 'ton', instance.Scenario_FUEL_emission.get_values()[s]/1e3]).T
-            CO2_fuel = pd.concat([CO2_fuel, CO], axis=0)
-        CO2_fuel = CO2_fuel.set_index([0,1,2,3])
-        CO2_fuel.columns = ['Total']
-    
-    RES_emission = pd.DataFrame(['RES CO2 emission', 'RES', '-', 'ton', instance.RES_emission.value/1e3]).T.set_index([0,1,2,3])
-    RES_emission.columns = ['Total']
-    RES_emission.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-    
-    if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
-        GEN_emission = pd.DataFrame(['GEN CO2 emission', 'GEN', '-', 'ton', instance.GEN_emission.value/1e3]).T.set_index([0,1,2,3])
-        GEN_emission.columns = ['Total']
-        GEN_emission.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-   
-    if instance.Model_Components.value == 0 or instance.Model_Components.value == 1:
-        BESS_emission = pd.DataFrame(['BESS CO2 emission', 'BESS', '-', 'ton', instance.BESS_emission.value/1e3]).T.set_index([0,1,2,3])
-        BESS_emission.columns = ['Total']
-        BESS_emission.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-    
-    if instance.Grid_Connection.value == 1:
-        CO2_grid = pd.DataFrame()  
-        for s in range(1,S+1):
-            CO_grid = pd.DataFrame(['Grid CO2 emission', 'System', s, 'ton', instance.Scenario_GRID_emission.get_values()[s]/1e3]).T
-            CO2_grid = pd.concat([CO2_grid, CO_grid], axis=0)
-        CO2_grid = CO2_grid.set_index([0,1,2,3])
-        CO2_grid.columns = ['Total']   
-     #%% Net present cost
-    if instance.Optimization_Goal.value == 0:              
-        if instance.Grid_Connection.value == 1:
-            Net_Present_Cost = pd.DataFrame(['Weighted Net present cost', 'System', '-', 'kUSD', (instance.ObjectiveFuntion.expr() + Grid_Investment + Grid_Fixed_Cost.iloc[0]['Total']*1000)/1e3]).T.set_index([0,1,2,3])
-        if instance.Grid_Connection.value == 0:
-            Net_Present_Cost = pd.DataFrame(['Weighted Net present cost', 'System', '-', 'kUSD', (instance.ObjectiveFuntion.expr())/1e3]).T.set_index([0,1,2,3])
-        Net_Present_Cost.columns = ['Total']
-        Net_Present_Cost.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-        NPC = pd.DataFrame()
-        for s in range (1,S+1):
-            if instance.Grid_Connection.value == 1:
-                Net_Present_Cost_sc = pd.DataFrame(['Net present cost ', 'System',s, 'kUSD', (instance.Scenario_Net_Present_Cost.get_values()[s] + Grid_Investment + Grid_Fixed_Cost.iloc[0]['Total']*1000)/1e3]).T
-            if instance.Grid_Connection.value == 0:
-                Net_Present_Cost_sc = pd.DataFrame(['Net present cost ', 'System',s, 'kUSD', (instance.Scenario_Net_Present_Cost.get_values()[s])/1e3]).T
-            NPC = pd.concat([NPC,Net_Present_Cost_sc], axis=0)
-        NPC = NPC.set_index([0,1,2,3])
-        NPC.columns = ['Total']
-        #%%LCOE
-        Electric_Demand = pd.DataFrame.from_dict(instance.Energy_Demand.extract_values(), orient='index') #[Wh]
-        Electric_Demand.index = pd.MultiIndex.from_tuples(list(Electric_Demand.index))
-        Electric_Demand = Electric_Demand.groupby(level=[1], axis=0, sort=False).sum()
-        Energy_Demand = instance.Energy_Demand.extract_values()
-        
-        LCOE_scenarios = pd.DataFrame()
-        for s in range(1,S+1):
-            LC = pd.DataFrame(['Levelized Cost of Energy scenarios','System',s,'USD/kWh',(instance.Scenario_Net_Present_Cost.get_values()[s]/sum(sum(Energy_Demand[s,i,t] for t in range(1,P+1))/(1+Discount_Rate)**i for i in range(1,(Y+1))))*1e3 ]).T
-            LCOE_scenarios = pd.concat([LCOE_scenarios, LC], axis=0)
-        LCOE_scenarios = LCOE_scenarios.set_index([0,1,2,3])
-        LCOE_scenarios.columns = ['Total']
-        
-        Net_Present_Demand = sum(Electric_Demand.iloc[i-1,0]/(1+Discount_Rate)**i for i in range(1,(Y+1)))    #[Wh]
-        if instance.Grid_Connection.value == 1:
-            LCOE = pd.DataFrame([(Net_Present_Cost.iloc[0,0] + Grid_El_Rev.iloc[0]['Total']*1000/1e3)/Net_Present_Demand])*1e6    #[USD/KWh]
-        if instance.Grid_Connection.value == 0:
-            LCOE = pd.DataFrame([(Net_Present_Cost.iloc[0,0])/Net_Present_Demand])*1e6    #[USD/KWh]
-        LCOE.index = pd.MultiIndex.from_arrays([['Levelized Cost of Energy '],['System'],['-'],['USD/kWh']])
-        LCOE.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-        LCOE.columns = ['Total']
+        Scenario_Net_Present_Cost = instance.Scenario_Net_Present_Cost.get_values()
+        Net_Present_Cost = (instance.ObjectiveFuntion.expr() + Grid_Investment + Grid_Fixed_Cost*1000)/1e3
+        Variable_Cost = instance.Total_Scenario_Variable_Cost_Act.get_values()
+        Energy_Demand = indexed_array(instance.Energy_Demand.extract_values(), np.empty((S,Y,P))).sum(axis=2)      #[Wh]
+        Net_Present_Demand = (Energy_Demand/Year_Discount).sum(axis=1)
+        LCOE = (Net_Present_Cost + Grid_Revenue)/(Energy_Demand.sum(axis=0)/Year_Discount).sum()*1e6    #[USD/KWh]
+
+        rows  = [('Weighted Net present cost', 'System', '-', 'kUSD', {'Total': Net_Present_Cost})]
+        rows += [('Net present cost ', 'System', s, 'kUSD', {'Total': (Scenario_Net_Present_Cost[s] + Grid_Investment + Grid_Fixed_Cost*1000)/1e3}) for s in range(1,S+1)]
+        rows += [('Total Investment cost', 'System', '-', 'kUSD', {'Total': (instance.Investment_Cost.value + Grid_Investment)/1e3}),
+                 ('Total fixed O&M cost', 'System', '-', 'kUSD', {'Total': (instance.Operation_Maintenance_Cost_Act.value + Grid_Fixed_Cost*1000)/1e3})]
+        rows += [('Total variable O&M cost', 'System', s, 'kUSD', {'Total': (Variable_Cost[s] - instance.Operation_Maintenance_Cost_Act.value + Grid_Revenue*1000)/1e3}) for s in range(1,S+1)]
+        rows += [('Levelized Cost of Energy ', 'System', '-', 'USD/kWh', {'Total': LCOE})]
+        rows += [('Levelized Cost of Energy scenarios', 'System', s, 'USD/kWh', {'Total': Scenario_Net_Present_Cost[s]/Net_Present_Demand[s-1]*1e3}) for s in range(1,S+1)]
+        rows += [('Salvage value', 'System', '-', 'kUSD', {'Total': -instance.Salvage_Value.value/1e3})]
 
     # Total Variable Cost                                
     elif instance.Optimization_Goal.value == 1:
-        if instance.Grid_Connection.value == 1:
-            Total_Variable_Cost = pd.DataFrame(['Total Variable Cost (Not Actualized)', 'System', '-', 'kUSD', (instance.ObjectiveFuntion.expr() + Grid_Fixed_Cost.iloc[0]['Total']*1000)/1e3]).T.set_index([0,1,2,3])
-        if instance.Grid_Connection.value == 0:
-            Total_Variable_Cost = pd.DataFrame(['Total Variable Cost (Not Actualized)', 'System', '-', 'kUSD', (instance.ObjectiveFuntion.expr())/1e3]).T.set_index([0,1,2,3])
-        Total_Variable_Cost.columns = ['Total']
-        Total_Variable_Cost.index.names = ['Cost item', 'Component', 'Scenario', 'Unit']
-        TVC = pd.DataFrame()
-        for s in range (1,S+1):
-            if instance.Grid_Connection.value == 1:
-                Total_Variable_Cost_sc = pd.DataFrame(['Total Variable Cost (Not Actualized)', 'System',s, 'kUSD', (instance.STotal_Scenario_Variable_Cost_NonAct.get_values()[s] + Grid_Fixed_Cost.iloc[0]['Total']*1000)/1e3]).T
-            if instance.Grid_Connection.value == 0:
-                Total_Variable_Cost_sc = pd.DataFrame(['Total Variable Cost (Not Actualized)', 'System',s, 'kUSD', (instance.Total_Scenario_Variable_Cost_NonAct.get_values()[s])/1e3]).T
-            TVC = pd.concat([TVC,Total_Variable_Cost_sc], axis=0)
-        TVC = TVC.set_index([0,1,2,3])
-        TVC.columns = ['Total'] 
-
-    #%% Concatenating
-    # Determine the base costs columns based on the optimization goal
+        Variable_Cost = instance.Total_Scenario_Variable_Cost_NonAct.get_values()
+        rows  = [('Total Variable Cost (Not Actualized)', 'System', '-', 'kUSD', {'Total': (instance.ObjectiveFuntion.expr() + Grid_Fixed_Cost*1000)/1e3})]
+        rows += [('Total Variable Cost (Not Actualized)', 'System', s, 'kUSD', {'Total': (Variable_Cost[s] + Grid_Fixed_Cost*1000)/1e3}) for s in range(1,S+1)]
+        rows += [('Total fixed O&M cost (Not Actualized)', 'System', '-', 'kUSD', {'Total': (instance.Operation_Maintenance_Cost_NonAct.value + Grid_Fixed_Cost*1000)/1e3})]
+
+    #%% Cost items and emissions of each technology
+    rows += technology_rows(list(RES_Names.values()), Investment_Cost['RES'], Fixed_Cost['RES'])
+    rows += [('RES CO2 emission', 'RES', '-', 'ton', {'Total': instance.RES_emission.value/1e3})]
     if instance.Optimization_Goal.value == 0:
-        base_columns = [Net_Present_Cost, NPC, Total_Investment_Cost, Fixed_Costs_Act, Variable_Costs_Act, LCOE, LCOE_scenarios, Salvage_Value]
-    elif instance.Optimization_Goal.value == 1:
-        base_columns = [Total_Variable_Cost, TVC, Fixed_Costs_NonAct]
-
-    res_columns = [RES_Investment_Cost, RES_Fixed_Cost, RES_emission]
-    bess_columns = [BESS_Investment_Cost, BESS_Fixed_Cost, BESS_Replacement_Cost, BESS_emission]
-    gen_columns = [Generator_Investment_Cost, Generator_Fixed_Cost, GEN_emission, Fuel_Cost, CO2_fuel]
-    extra_columns = [LostLoad_Cost, CO2_out]
-
-    # Build the list of columns to concatenate based on model components and grid connection
-    columns = base_columns + res_columns + extra_columns
-    if instance.Model_Components.value in [0, 2]:
-        columns += gen_columns
-    if instance.Model_Components.value in [0, 1]:
-        columns += bess_columns
-    if instance.Grid_Connection.value == 1:
-        grid_columns = [Grid_Investment_Cost, Grid_Fixed_Cost, Grid_El_Cost, Grid_El_Rev, CO2_grid]
-        columns += grid_columns
+        rows += scenario_rows('Lost load cost', 'System', 'kUSD', instance.Scenario_Lost_Load_Cost_Act.get_values())
+    else:
+        rows += scenario_rows('Lost load cost (Not Actualized)', 'System', 'kUSD', instance.Scenario_Lost_Load_Cost_NonAct.get_values())
+    rows += scenario_rows('TOTAL CO2 emission', 'System', 'ton', instance.Scenario_CO2_emission.get_values())
+
+    if Components == 0 or Components == 2:
+        Fuel_Cost = instance.Total_Fuel_Cost_Act.get_values()
+        rows += technology_rows(list(Generator_Names.values()), Investment_Cost['GEN'], Fixed_Cost['GEN'])
+        rows += [('GEN CO2 emission', 'GEN', '-', 'ton', {'Total': instance.GEN_emission.value/1e3})]
+        rows += [('Fuel cost', Fuel_Names[g], s, 'kUSD', {'Total': Fuel_Cost[s,g]/1e3}) for g in range(1,G+1) for s in range(1,S+1)]
+        rows += scenario_rows('Fuel CO2 emission', 'System', 'ton', instance.Scenario_FUEL_emission.get_values())
+
+    if Components == 0 or Components == 1:
+        rows += technology_rows(['Battery bank'], Investment_Cost['BESS'], Fixed_Cost['BESS'])
+        rows += scenario_rows('Replacement cost', 'Battery bank', 'kUSD', instance.Battery_Replacement_Cost_Act.get_values())
+        rows += [('BESS CO2 emission', 'BESS', '-', 'ton', {'Total': instance.BESS_emission.value/1e3})]
+
+    if Grid_Connection == 1:
+        rows += technology_rows(['National Grid'], Investment_Cost['Grid'], Fixed_Cost['Grid'])
+        rows += scenario_rows('Grid electricity cost', 'National Grid', 'kUSD', instance.Total_Electricity_Cost_Act.get_values())
+        rows += scenario_rows('Grid electricity revenue', 'National Grid', 'kUSD', instance.Total_Revenues_Act.get_values())
+        rows += scenario_rows('Grid CO2 emission', 'System', 'ton', instance.Scenario_GRID_emission.get_values())
 
-    # Concatenate and round all numeric values to 4 decimals
-    SystemCost = pd.concat([col.round(4) for col in columns],axis=0).fillna('-')
+    #%% Concatenating
+    # Build the whole table at once, rounding all values to 4 decimals
+    SystemCost = cost_table(rows, ['Total'] + (['Step '+str(st) for st in range(1,ST+1)] if ST > 1 else []))
     print(SystemCost)
 
-    return  SystemCost   
+    return  SystemCost
 
 
 #%% Plant size output
@@ -1017,6 +699,21 @@ def EnergySystemSize(instance):
     print("\n------------------------------------------------------------------------------------")
     return SystemSize
 #%% Yearly costs
+def yearly_sums(values, shape):
+    """
+    Yearly totals of an hourly indexed component, given its get_values() dict and the shape of its index
+    (e.g. scenarios x years x periods): the last axis, the periods, is summed.
+    """
+    return indexed_array(values, np.empty(shape)).sum(axis=-1)
+
+def scenario_columns(item, components, costs):
+    """
+    Yearly cash flow columns of a cost item for each scenario and component, given its costs
+    (scenarios x years x components) [kUSD]: returns the column labels and the (years x columns) values.
+    """
+    S, Y, C = costs.shape
+    return [(item, component, s, 'kUSD') for s in range(1,S+1) for component in components], costs.transpose(1,0,2).reshape(Y, S*C)
+
 def YearlyCosts(instance):
 
     "Importing parameters"
@@ -1048,635 +745,168 @@ def YearlyCosts(instance):
                     ys_tuples_list[y-1] = (y, steps[i])       
                 elif y >= years_steps_list[-1]:
                     ys_tuples_list[y-1] = (y, len(steps)) 
+    Year_Step = np.array([st for (y,st) in ys_tuples_list]) - 1         # investment step of each year (from 0)
 
-    #%% Fixed costs
-    
-    if instance.MILP_Formulation.value:
-     "Renewable sources"
-     RES_Units_milp = instance.RES_Units_milp.get_values()
-     RES_Sources = instance.RES_Sources.value
-     RES_Nominal_Capacity = instance.RES_Nominal_Capacity.extract_values()    
-     RES_Inv_Specific_Cost = instance.RES_Specific_Investment_Cost.extract_values()
-     RES_OM_Specific_Cost = instance.RES_Specific_OM_Cost.extract_values()
-     RES_Yearly_Cost = pd.DataFrame()
-     for r in range(1,RES_Sources+1):
-        res_yc_source =  pd.DataFrame()
-        for (y,st) in ys_tuples_list:
-            res_yc = pd.DataFrame(['Year '+str(y), RES_Units_milp[st,r]*RES_Nominal_Capacity[r]*RES_Inv_Specific_Cost[r]*RES_OM_Specific_Cost[r]/1e3]).T.set_index([0]) 
-            res_yc.columns = pd.MultiIndex.from_arrays([['Fixed costs'],[RES_Names[r]],['-'],['kUSD']], names=['','Component','Scenario','Unit'])
-            res_yc_source = pd.concat([res_yc_source,res_yc], axis=0)
-        RES_Yearly_Cost = pd.concat([RES_Yearly_Cost,res_yc_source], axis=1)
-        
-     "Battery bank"
-     if instance.Model_Components.value == 0 or instance.Model_Components.value == 1:
-         BESS_Nominal_Capacity_milp = instance.Battery_Nominal_Capacity_milp.value
-         BESS_Units = instance.Battery_Units.get_values() 
-         BESS_Inv_Specific_Cost = instance.Battery_Specific_Investment_Cost.value
-         BESS_OM_Specific_Cost = instance.Battery_Specific_OM_Cost.value
-         BESS_Yearly_Cost = pd.DataFrame()
-         for (y,st) in ys_tuples_list:
-            bess_yc = pd.DataFrame(['Year '+str(y), BESS_Units[st]*BESS_Nominal_Capacity_milp*BESS_Inv_Specific_Cost*BESS_OM_Specific_Cost/1e3]).T.set_index([0]) 
-            bess_yc.columns = pd.MultiIndex.from_arrays([['Fixed costs'],['Battery bank'],['-'],['kUSD']], names=['','Component','Scenario','Unit'])
-            BESS_Yearly_Cost = pd.concat([BESS_Yearly_Cost,bess_yc], axis=0)
-        
-     "Generator"
-     if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
-         Generator_Types = instance.Generator_Types.value
-         Generator_Units = instance.Generator_Units.get_values()
-         Generator_Nominal_Capacity_milp = instance.Generator_Nominal_Capacity_milp.extract_values()  
-         Generator_Inv_Specific_Cost = instance.Generator_Specific_Investment_Cost.extract_values()
-         Generator_OM_Specific_Cost = instance.Generator_Specific_OM_Cost.extract_values()
-         Generator_Yearly_Cost = pd.DataFrame()
-         for g in range(1,Generator_Types+1):
-            gen_yc_types =  pd.DataFrame()
-            for (y,st) in ys_tuples_list:
-                gen_yc = pd.DataFrame(['Year '+str(y), (Generator_Units[st,g]*Generator_Nominal_Capacity_milp[g])*Generator_Inv_Specific_Cost[g]*Generator_OM_Specific_Cost[g]/1e3]).T.set_index([0]) 
-                gen_yc.columns = pd.MultiIndex.from_arrays([['Fixed costs'],[Generator_Names[g]],['-'],['kUSD']], names=['','Component','Scenario','Unit'])
-                gen_yc_types = pd.concat([gen_yc_types,gen_yc], axis=0)
-            Generator_Yearly_Cost = pd.concat([Generator_Yearly_Cost,gen_yc_types], axis=1)
-    else:  
-     "Renewable Sources"
-     RES_Units = instance.RES_Units.get_values()
-     RES_Sources = instance.RES_Sources.value
-     RES_Nominal_Capacity = instance.RES_Nominal_Capacity.extract_values()    
-     RES_Inv_Specific_Cost = instance.RES_Specific_Investment_Cost.extract_values()
-     RES_OM_Specific_Cost = instance.RES_Specific_OM_Cost.extract_values()
-     RES_Yearly_Cost = pd.DataFrame()
-     for r in range(1,RES_Sources+1):
-        res_yc_source =  pd.DataFrame()
-        for (y,st) in ys_tuples_list:
-            res_yc = pd.DataFrame(['Year '+str(y), RES_Units[st,r]*RES_Nominal_Capacity[r]*RES_Inv_Specific_Cost[r]*RES_OM_Specific_Cost[r]/1e3]).T.set_index([0]) 
-            res_yc.columns = pd.MultiIndex.from_arrays([['Fixed costs'],[RES_Names[r]],['-'],['kUSD']], names=['','Component','Scenario','Unit'])
-            res_yc_source = pd.concat([res_yc_source,res_yc], axis=0)
-        RES_Yearly_Cost = pd.concat([RES_Yearly_Cost,res_yc_source], axis=1)
-        
-     "Battery bank"
-     if instance.Model_Components.value == 0 or instance.Model_Components.value == 1:
-         BESS_Nominal_Capacity = instance.Battery_Nominal_Capacity.extract_values()    
-         BESS_Inv_Specific_Cost = instance.Battery_Specific_Investment_Cost.value
-         BESS_OM_Specific_Cost = instance.Battery_Specific_OM_Cost.value
-         BESS_Yearly_Cost = pd.DataFrame()
-         for (y,st) in ys_tuples_list:
-            bess_yc = pd.DataFrame(['Year '+str(y), BESS_Nominal_Capacity[st]*BESS_Inv_Specific_Cost*BESS_OM_Specific_Cost/1e3]).T.set_index([0]) 
-            bess_yc.columns = pd.MultiIndex.from_arrays([['Fixed costs'],['Battery bank'],['-'],['kUSD']], names=['','Component','Scenario','Unit'])
-            BESS_Yearly_Cost = pd.concat([BESS_Yearly_Cost,bess_yc], axis=0)
+    "Each cost item is a block of column labels with its yearly values (years x columns) [kUSD]"
+    Blocks = []
 
-     "Generator"
-     if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
-         Generator_Types = instance.Generator_Types.value
-         Generator_Nominal_Capacity = instance.Generator_Nominal_Capacity.get_values()    
-         Generator_Inv_Specific_Cost = instance.Generator_Specific_Investment_Cost.extract_values()
-         Generator_OM_Specific_Cost = instance.Generator_Specific_OM_Cost.extract_values()
-         Generator_Yearly_Cost = pd.DataFrame()
-         for g in range(1,Generator_Types+1):
-            gen_yc_types =  pd.DataFrame()
-            for (y,st) in ys_tuples_list:
-                gen_yc = pd.DataFrame(['Year '+str(y), Generator_Nominal_Capacity[st,g]*Generator_Inv_Specific_Cost[g]*Generator_OM_Specific_Cost[g]/1e3]).T.set_index([0]) 
-                gen_yc.columns = pd.MultiIndex.from_arrays([['Fixed costs'],[Generator_Names[g]],['-'],['kUSD']], names=['','Component','Scenario','Unit'])
-                gen_yc_types = pd.concat([gen_yc_types,gen_yc], axis=0)
-            Generator_Yearly_Cost = pd.concat([Generator_Yearly_Cost,gen_yc_types], axis=1)
+    #%% Fixed costs
+    for (names, capacity, existing, inv_cost, om_cost) in installed_capacity(instance).values():
+        Blocks.append(([('Fixed costs', name, '-', 'kUSD') for name in names], capacity[Year_Step]*inv_cost*om_cost/1e3))
 
     "National Grid"     
     if instance.Grid_Connection.value == 1:
-        Grid_Connection_Specific_Cost = instance.Grid_Connection_Cost.extract_values()  
-        Grid_Distance = instance.Grid_Distance.extract_values() 
-        Grid_OM_Specific_Cost = instance.Grid_Maintenance_Cost.extract_values()
-        Grid_Connection = instance.Grid_Connection.extract_values()  
-        Grid_Yearly_Fixed_Cost = pd.DataFrame()
-        for (y,st) in ys_tuples_list:
-            if y < instance.Year_Grid_Connection.extract_values()[None]:
-                grid_yc = pd.DataFrame(['Year '+str(y), 0]).T.set_index([0]) 
-            else:
-                grid_yc = pd.DataFrame(['Year '+str(y), Grid_Distance[None]*Grid_Connection_Specific_Cost[None]*Grid_OM_Specific_Cost[None]*Grid_Connection[None]/1e3]).T.set_index([0]) 
-            grid_yc.columns = pd.MultiIndex.from_arrays([['Fixed costs'],['Grid'],['-'],['kUSD']], names=['','Component','Scenario','Unit'])
-            Grid_Yearly_Fixed_Cost = pd.concat([Grid_Yearly_Fixed_Cost,grid_yc], axis=0)
-        "Grid costs and revenues"  
-        Energy_From_Grid = instance.Energy_From_Grid.get_values()    
-        El_Purchased_Price = instance.Grid_Purchased_El_Price
-        Grid_Yearly_Cost = pd.DataFrame()    
-        for s in range(1, S+1):
-            grid_s = pd.DataFrame()
-            for (y, st) in ys_tuples_list:
-                grid_yc = pd.DataFrame(['Year ' + str(y), sum(Energy_From_Grid[(s, y, t)] for t in range(1, P+1)) * El_Purchased_Price / 1e6]).T.set_index([0])
-                grid_yc.columns = pd.MultiIndex.from_arrays([['Grid cost'], ['Grid'], [s], ['kUSD']], names=['', 'Component', 'Scenario', 'Unit'])
-                grid_s = pd.concat([grid_s, grid_yc], axis=0)
-            Grid_Yearly_Cost = pd.concat([Grid_Yearly_Cost, grid_s], axis=1)
-       
-        if instance.Grid_Connection_Type.value == 0:
-            Energy_To_Grid = instance.Energy_To_Grid.get_values()    
-            El_Sold_Price = instance.Grid_Sold_El_Price
-            Grid_Yearly_Rev = pd.DataFrame()    
-            for s in range(1, S+1):
-                grid_s = pd.DataFrame()
-                for (y, st) in ys_tuples_list:
-                    grid_yc = pd.DataFrame(['Year ' + str(y), sum(Energy_To_Grid[(s, y, t)] for t in range(1, P+1)) * El_Sold_Price / 1e6]).T.set_index([0])
-                    grid_yc.columns = pd.MultiIndex.from_arrays([['Grid revenue'], ['Grid'], [s], ['kUSD']], names=['', 'Component', 'Scenario', 'Unit'])
-                    grid_s = pd.concat([grid_s, grid_yc], axis=0)
-                Grid_Yearly_Rev = pd.concat([Grid_Yearly_Rev, grid_s], axis=0)
-   
+        Grid_OM_Cost = instance.Grid_Distance.value*instance.Grid_Connection_Cost.value*instance.Grid_Maintenance_Cost.value*instance.Grid_Connection.value
+        Blocks.append(([('Fixed costs', 'Grid', '-', 'kUSD')], np.where(np.arange(1,Y+1) < instance.Year_Grid_Connection.value, 0, Grid_OM_Cost/1e3)[:,None]))
 
     #%% Variable costs
     
     "Lost Load"    
-    Lost_Load = instance.Lost_Load.get_values()    
-    Lost_Load_Specific_Cost = instance.Lost_Load_Specific_Cost.value
-    Lost_Load_Yearly_Cost = pd.DataFrame()
-    for s in range(1,S+1):
-        lost_load_s = pd.DataFrame()
-        for (y,st) in ys_tuples_list:
-            lost_load_yc = pd.DataFrame(['Year '+str(y), sum(Lost_Load[(s,y,t)] for t in range(1,P+1))*Lost_Load_Specific_Cost/1e3]).T.set_index([0]) 
-            lost_load_yc.columns = pd.MultiIndex.from_arrays([['Lost load cost'],['System'],[s],['kUSD']], names=['','Component','Scenario','Unit'])
-            lost_load_s = pd.concat([lost_load_s,lost_load_yc], axis=0)
-        Lost_Load_Yearly_Cost = pd.concat([Lost_Load_Yearly_Cost,lost_load_s], axis=1)
+    Lost_Load = yearly_sums(instance.Lost_Load.get_values(), (S,Y,P))
+    Blocks.append(scenario_columns('Lost load cost', ['System'], Lost_Load[:,:,None]*instance.Lost_Load_Specific_Cost.value/1e3))
 
     "BESS Replacement Cost"
     if instance.Model_Components.value == 0 or instance.Model_Components.value == 1:
-        BESS_Inflow = instance.Battery_Inflow.get_values()    
-        BESS_Outflow = instance.Battery_Outflow.get_values()    
-        BESS_Unit_Repl_Cost = instance.Unitary_Battery_Replacement_Cost.value
-        BESS_Replacement_Yearly_Cost = pd.DataFrame()    
-        for s in range(1,S+1):
-            Battery_cost_in = [0 for y in range(1,Y+1)]
-            Battery_cost_out = [0 for y in range(1,Y+1)]
-            Battery_Yearly_cost = [0 for y in range(1,Y+1)]    
-            for y in range(1,Y+1):    
-                Battery_cost_in[y-1] = sum(BESS_Inflow[s,y,t]*BESS_Unit_Repl_Cost for t in range(1,P+1))
-                Battery_cost_out[y-1] = sum(BESS_Outflow[s,y,t]*BESS_Unit_Repl_Cost for t in range(1,P+1))
-                Battery_Yearly_cost[y-1] = Battery_cost_in[y-1] + Battery_cost_out[y-1]
-            Battery_Yearly_cost = pd.DataFrame(Battery_Yearly_cost)/1e3
-            Battery_Yearly_cost.index = Lost_Load_Yearly_Cost.index
-            Battery_Yearly_cost.columns = pd.MultiIndex.from_arrays([['Replacement cost'],['Battery bank'],[s],['kUSD']], names=['','Component','Scenario','Unit']) 
-            BESS_Replacement_Yearly_Cost = pd.concat([BESS_Replacement_Yearly_Cost, Battery_Yearly_cost], axis=1)
+        BESS_Flows = yearly_sums(instance.Battery_Inflow.get_values(), (S,Y,P)) + yearly_sums(instance.Battery_Outflow.get_values(), (S,Y,P))
+        Blocks.append(scenario_columns('Replacement cost', ['Battery bank'], BESS_Flows[:,:,None]*instance.Unitary_Battery_Replacement_Cost.value/1e3))
     
     "Fuel cost"
     if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
-        if instance.MILP_Formulation.value:
-         Generator_Energy_Partial = instance.Generator_Energy_Partial.get_values()
-         Generator_Energy_Total = instance.Generator_Energy_Total.get_values()
-         Generator_Full = instance.Generator_Full.get_values()
-         Generator_Partial = instance.Generator_Partial.get_values()
-         Generator_Marginal_Cost = instance.Generator_Marginal_Cost.extract_values()
-         Generator_Marginal_Cost_1 = instance.Generator_Marginal_Cost_1.extract_values()
-         Generator_Marginal_Cost_milp = instance.Generator_Marginal_Cost_milp.extract_values()
-         Generator_Marginal_Cost_milp_1 = instance.Generator_Marginal_Cost_milp_1.extract_values()
-         Generator_Nominal_Capacity_milp = instance.Generator_Nominal_Capacity_milp.extract_values()
-         Generator_Start_Cost = instance.Generator_Start_Cost.extract_values()
-         Generator_Start_Cost_1 = instance.Generator_Start_Cost_1.extract_values()
-         Fuel_Cost_Yearly_Cost = pd.DataFrame()
-         for s in range(1,S+1):
-            fuel_s = pd.DataFrame()
-            for g in range(1,Generator_Types+1):
-                fuel_yc_types = pd.DataFrame()
-                for (y,st) in ys_tuples_list:
-                    if instance.Generator_Partial_Load.value == 1 and instance.Fuel_Specific_Cost_Calculation.value == 1:
-                       fuel_yc = pd.DataFrame(['Year '+str(y), (sum(Generator_Full[(s,y,g,t)] for t in range(1,P+1))*Generator_Marginal_Cost[g,y]*Generator_Nominal_Capacity_milp[g]/1e3) + (sum(Generator_Energy_Partial[(s,y,g,t)] for t in range(1,P+1))*Generator_Marginal_Cost_milp[g,y]/1e3) + (sum(Generator_Partial[(s,y,g,t)] for t in range(1,P+1))*Generator_Start_Cost[g,y])/1e3]).T.set_index([0])
-                    elif instance.Generator_Partial_Load.value == 1 and instance.Fuel_Specific_Cost_Calculation.value == 0:
-                        fuel_yc = pd.DataFrame(['Year '+str(y), (sum(Generator_Full[(s,y,g,t)] for t in range(1,P+1))*Generator_Marginal_Cost_1[g]*Generator_Nominal_Capacity_milp[g]/1e3) + (sum(Generator_Energy_Partial[(s,y,g,t)] for t in range(1,P+1))*Generator_Marginal_Cost_milp_1[g]/1e3) + (sum(Generator_Partial[(s,y,g,t)] for t in range(1,P+1))*Generator_Start_Cost_1[g])/1e3]).T.set_index([0])
-                    elif instance.Generator_Partial_Load.value == 0 and instance.Fuel_Specific_Cost_Calculation.value == 1:
-                       fuel_yc = pd.DataFrame(['Year '+str(y), sum(Generator_Energy_Total[(s,y,g,t)] for t in range(1,P+1))*Generator_Marginal_Cost[g,y]/1e3]).T.set_index([0])
-                    else:
-                        fuel_yc = pd.DataFrame(['Year '+str(y), sum(Generator_Energy_Total[(s,y,g,t)] for t in range(1,P+1))*Generator_Marginal_Cost_1[g]/1e3]).T.set_index([0]) 
-                    fuel_yc.columns = pd.MultiIndex.from_arrays([['Fuel cost'],[Fuel_Names[g]],[s],['kUSD']], names=['','Component','Scenario','Unit'])
-                    fuel_yc_types = pd.concat([fuel_yc_types,fuel_yc], axis=0)
-                fuel_s = pd.concat([fuel_s,fuel_yc_types], axis=0)            
-            Fuel_Cost_Yearly_Cost = pd.concat([Fuel_Cost_Yearly_Cost,fuel_s], axis=1).fillna(0)
-         Fuel_Cost_Yearly_Cost = Fuel_Cost_Yearly_Cost.groupby(level=[0],axis=0,sort=False).sum()
+        Fuel_Specific_Cost = instance.Fuel_Specific_Cost_Calculation.value == 1
+        if Fuel_Specific_Cost:
+            Generator_Marginal_Cost = indexed_array(instance.Generator_Marginal_Cost.extract_values(), np.empty((G,Y))).T
         else:
-         Generator_Energy_Production = instance.Generator_Energy_Production.get_values()
-         Generator_Marginal_Cost = instance.Generator_Marginal_Cost.extract_values()
-         Generator_Marginal_Cost_1 = instance.Generator_Marginal_Cost_1.extract_values()
-         Fuel_Cost_Yearly_Cost = pd.DataFrame()
-         for s in range(1,S+1):
-            fuel_s = pd.DataFrame()
-            for g in range(1,Generator_Types+1):
-                fuel_yc_types = pd.DataFrame()
-                for (y,st) in ys_tuples_list:
-                    if instance.Fuel_Specific_Cost_Calculation.value == 1:
-                     fuel_yc = pd.DataFrame(['Year '+str(y), sum(Generator_Energy_Production[(s,y,g,t)] for t in range(1,P+1))*Generator_Marginal_Cost[g,y]/1e3]).T.set_index([0]) 
-                    else: fuel_yc = pd.DataFrame(['Year '+str(y), sum(Generator_Energy_Production[(s,y,g,t)] for t in range(1,P+1))*Generator_Marginal_Cost_1[g]/1e3]).T.set_index([0]) 
-                    fuel_yc.columns = pd.MultiIndex.from_arrays([['Fuel cost'],[Fuel_Names[g]],[s],['kUSD']], names=['','Component','Scenario','Unit'])
-                    fuel_yc_types = pd.concat([fuel_yc_types,fuel_yc], axis=0)
-                fuel_s = pd.concat([fuel_s,fuel_yc_types], axis=0)            
-            Fuel_Cost_Yearly_Cost = pd.concat([Fuel_Cost_Yearly_Cost,fuel_s], axis=1).fillna(0)
-         Fuel_Cost_Yearly_Cost = Fuel_Cost_Yearly_Cost.groupby(level=[0],axis=0,sort=False).sum()
-    
+            Generator_Marginal_Cost = np.array(list(instance.Generator_Marginal_Cost_1.extract_values().values()), dtype=float)
+        if instance.MILP_Formulation.value and instance.Generator_Partial_Load.value == 1:
+            if Fuel_Specific_Cost:
+                Generator_Marginal_Cost_milp = indexed_array(instance.Generator_Marginal_Cost_milp.extract_values(), np.empty((G,Y))).T
+                Generator_Start_Cost = indexed_array(instance.Generator_Start_Cost.extract_values(), np.empty((G,Y))).T
+            else:
+                Generator_Marginal_Cost_milp = np.array(list(instance.Generator_Marginal_Cost_milp_1.extract_values().values()), dtype=float)
+                Generator_Start_Cost = np.array(list(instance.Generator_Start_Cost_1.extract_values().values()), dtype=float)
+            Generator_Nominal_Capacity_milp = np.array(list(instance.Generator_Nominal_Capacity_milp.extract_values().values()), dtype=float)
+            Fuel_Cost = (yearly_sums(instance.Generator_Full.get_values(), (S,Y,G,P))*Generator_Marginal_Cost*Generator_Nominal_Capacity_milp +
+                         yearly_sums(instance.Generator_Energy_Partial.get_values(), (S,Y,G,P))*Generator_Marginal_Cost_milp +
+                         yearly_sums(instance.Generator_Partial.get_values(), (S,Y,G,P))*Generator_Start_Cost)/1e3
+        elif instance.MILP_Formulation.value:
+            Fuel_Cost = yearly_sums(instance.Generator_Energy_Total.get_values(), (S,Y,G,P))*Generator_Marginal_Cost/1e3
+        else:
+            Fuel_Cost = yearly_sums(instance.Generator_Energy_Production.get_values(), (S,Y,G,P))*Generator_Marginal_Cost/1e3
+        "Generators burning the same fuel are reported together"
+        Fuels = list(dict.fromkeys(Fuel_Names.values()))
+        Fuel_Of = np.array([Fuels.index(Fuel_Names[g]) for g in range(1,G+1)])
+        Blocks.append(scenario_columns('Fuel cost', Fuels, np.stack([Fuel_Cost[:,:,Fuel_Of == f].sum(axis=2) for f in range(len(Fuels))], axis=2)))
 
+    "Grid costs and revenues"  
+    if instance.Grid_Connection.value == 1:
+        Energy_From_Grid = yearly_sums(instance.Energy_From_Grid.get_values(), (S,Y,P))
+        Blocks.append(scenario_columns('Grid cost', ['Grid'], Energy_From_Grid[:,:,None]*instance.Grid_Purchased_El_Price.value/1e6))
+        if instance.Grid_Connection_Type.value == 0:
+            Energy_To_Grid = yearly_sums(instance.Energy_To_Grid.get_values(), (S,Y,P))
+            Blocks.append(scenario_columns('Grid revenue', ['Grid'], Energy_To_Grid[:,:,None]*instance.Grid_Sold_El_Price.value/1e6))
 
     #%% Concatenating
-    if instance.Model_Components.value == 0:
-        if instance.Grid_Connection.value == 1 and instance.Grid_Connection_Type == 0:
-            YearlyCost = pd.concat([round(RES_Yearly_Cost.astype(float),2),
-                                    round(BESS_Yearly_Cost.astype(float),2),
-                                    round(Generator_Yearly_Cost.astype(float),2),
-                                    round(Grid_Yearly_Fixed_Cost.astype(float),2), 
-                                    round(Lost_Load_Yearly_Cost.astype(float),2),
-                                    round(BESS_Replacement_Yearly_Cost.astype(float),2),
-                                    round(Fuel_Cost_Yearly_Cost.astype(float),2),
-                                    round(Grid_Yearly_Cost.astype(float),2),
-                                    round(Grid_Yearly_Rev.astype(float),2)], axis=1) 
-        if instance.Grid_Connection.value == 1 and instance.Grid_Connection_Type == 1:
-            YearlyCost = pd.concat([round(RES_Yearly_Cost.astype(float),2),
-                                    round(BESS_Yearly_Cost.astype(float),2),
-                                    round(Generator_Yearly_Cost.astype(float),2),
-                                    round(Grid_Yearly_Fixed_Cost.astype(float),2), 
-                                    round(Lost_Load_Yearly_Cost.astype(float),2),
-                                    round(BESS_Replacement_Yearly_Cost.astype(float),2),
-                                    round(Fuel_Cost_Yearly_Cost.astype(float),2),
-                                    round(Grid_Yearly_Cost.astype(float),2)], axis=1)
-        if instance.Grid_Connection.value == 0:
-            YearlyCost = pd.concat([round(RES_Yearly_Cost.astype(float),2),
-                                    round(BESS_Yearly_Cost.astype(float),2),
-                                    round(Generator_Yearly_Cost.astype(float),2),
-                                    round(Lost_Load_Yearly_Cost.astype(float),2),
-                                    round(BESS_Replacement_Yearly_Cost.astype(float),2),
-                                    round(Fuel_Cost_Yearly_Cost.astype(float),2)], axis=1) 
-            
-    if instance.Model_Components.value == 1:
-        if instance.Grid_Connection.value == 1 and instance.Grid_Connection_Type == 0:
-            YearlyCost = pd.concat([round(RES_Yearly_Cost.astype(float),2),
-                                    round(BESS_Yearly_Cost.astype(float),2),
-                                    round(Grid_Yearly_Fixed_Cost.astype(float),2), 
-                                    round(Lost_Load_Yearly_Cost.astype(float),2),
-                                    round(BESS_Replacement_Yearly_Cost.astype(float),2),
-                                    round(Grid_Yearly_Cost.astype(float),2), 
-                                    round(Grid_Yearly_Rev.astype(float),2)], axis=1) 
-        if instance.Grid_Connection.value == 1 and instance.Grid_Connection_Type == 1:
-            YearlyCost = pd.concat([round(RES_Yearly_Cost.astype(float),2),
-                                    round(BESS_Yearly_Cost.astype(float),2),
-                                    round(Grid_Yearly_Fixed_Cost.astype(float),2), 
-                                    round(Lost_Load_Yearly_Cost.astype(float),2),
-                                    round(BESS_Replacement_Yearly_Cost.astype(float),2),
-                                    round(Fuel_Cost_Yearly_Cost.astype(float),2),
-                                    round(Grid_Yearly_Cost.astype(float),2)], axis=1)
-        if instance.Grid_Connection.value == 0:
-            YearlyCost = pd.concat([round(RES_Yearly_Cost.astype(float),2),
-                                    round(BESS_Yearly_Cost.astype(float),2),
-                                    round(Lost_Load_Yearly_Cost.astype(float),2),
-                                    round(BESS_Replacement_Yearly_Cost.astype(float),2)], axis=1)
-            
-    if instance.Model_Components.value == 2:
-        if instance.Grid_Connection.value == 1 and instance.Grid_Connection_Type == 0:
-            YearlyCost = pd.concat([round(RES_Yearly_Cost.astype(float),2),
-                                    round(Generator_Yearly_Cost.astype(float),2),
-                                    round(Grid_Yearly_Fixed_Cost.astype(float),2), 
-                                    round(Lost_Load_Yearly_Cost.astype(float),2),
-                                    round(Fuel_Cost_Yearly_Cost.astype(float),2),
-                                    round(Grid_Yearly_Cost.astype(float),2), 
-                                    round(Grid_Yearly_Rev.astype(float),2)], axis=1) 
-        if instance.Grid_Connection.value == 1 and instance.Grid_Connection_Type == 1:
-            YearlyCost = pd.concat([round(RES_Yearly_Cost.astype(float),2),
-                                    round(Generator_Yearly_Cost.astype(float),2),
-                                    round(Grid_Yearly_Fixed_Cost.astype(float),2), 
-                                    round(Lost_Load_Yearly_Cost.astype(float),2),
-                                    round(Fuel_Cost_Yearly_Cost.astype(float),2),
-                                    round(Grid_Yearly_Cost.astype(float),2)], axis=1)
-        if instance.Grid_Connection.value == 0:
-            YearlyCost = pd.concat([round(RES_Yearly_Cost.astype(float),2),
-                                    round(Generator_Yearly_Cost.astype(float),2),
-                                    round(Lost_Load_Yearly_Cost.astype(float),2),
-                                    round(Fuel_Cost_Yearly_Cost.astype(float),2)], axis=1)  
+    YearlyCost = pd.DataFrame(np.hstack([values for (labels, values) in Blocks]).round(2),
+                              index=pd.Index(['Year '+str(y) for y in range(1,Y+1)], name=0),
+                              columns=pd.MultiIndex.from_tuples([label for (labels, values) in Blocks for label in labels], names=['','Component','Scenario','Unit']))
 
     return YearlyCost
 
+#%% Yearly energy of the flows
+def YearlyEnergy(TimeSeries):
+    """
+    Sums each flow of the time series over the periods of every scenario and year, in a single reduction
+    of the (scenarios, years, columns, periods) array of the flows.
+
+    Parameters:
+    TimeSeries (dict): Time series as returned by TimeSeries, TimeSeries[s][y] being the DataFrame of scenario s and year y.
+
+    Returns:
+    dict: Flow (e.g. 'Electric Demand', 'RES Production') -> (scenarios, years, components) array of yearly energy.
+    """
+    Flows = getattr(TimeSeries, 'Flows', None)
+    if Flows is None:                                                   # time series not built by TimeSeries (e.g. read from files)
+        Flows = np.array([[TimeSeries[s][y].to_numpy().T for y in sorted(TimeSeries[s])] for s in sorted(TimeSeries)])
+    totals = np.nansum(Flows, axis=3)
+    flows  = next(iter(next(iter(TimeSeries.values())).values())).columns.get_level_values('Flow')
+    return {flow: totals[:, :, np.asarray(flows == flow)] for flow in flows.unique()}
+
+def scenario_table(values, item, components, unit='%'):
+    """
+    Arranges a (scenarios, years, components) array into a DataFrame with one row per year
+    and one column per scenario and component, labelled (item, component, scenario, unit).
+    """
+    S, Y, K = values.shape
+    columns = pd.MultiIndex.from_tuples([(item, component, s, unit) for s in range(1,S+1) for component in components],
+                                        names=['','Component','Scenario',' '])
+    return pd.DataFrame(values.transpose(1, 0, 2).reshape(Y, S*K), index=pd.Index(['Year '+str(y) for y in range(1,Y+1)], name=0), columns=columns)
+
 #%% Yearly energy parameters
-def YearlyEnergyParams(instance, TimeSeries):
+def YearlyEnergyParams(instance, Energy):
     
     "Importing parameters"
     S  = int(instance.Scenarios.extract_values()[None])
-    P  = int(instance.Periods.extract_values()[None])
     Y  = int(instance.Years.extract_values()[None])
-    ST = int(instance.Steps_Number.extract_values()[None])
-    R  = int(instance.RES_Sources.extract_values()[None])
-    G  = int(instance.Generator_Types.extract_values()[None])
 
-    RES_Names = instance.RES_Names.extract_values()
-    Generator_Names = instance.Generator_Names.extract_values()
-    Fuel_Names = instance.Fuel_Names.extract_values()
-    idx = pd.IndexSlice
+    Scenario_Weight = instance.Scenario_Weight.extract_values()
+    weights = np.array([Scenario_Weight[s] for s in range(1,S+1)])
     
-    #%% Data preparation
-    gen_load  = pd.DataFrame()
-    res_load  = pd.DataFrame()
-    curt_load = pd.DataFrame()
-    res_pen   = pd.DataFrame()
-    battery_usage = pd.DataFrame()
-    grid_usage = pd.DataFrame()   
-    for y in range(1,Y+1):
-        demand = 0
-        curtailment = 0
-        renewables  = 0
-        generators  = 0
-        battery_out = 0
-        grid_in = 0   
-        grid_out = 0
-        for s in range(1,S+1):
-            demand += TimeSeries[s][y].loc[:,idx['Scenario '+str(s),'Electric Demand',:,:]].sum().sum()*instance.Scenario_Weight.extract_values()[s]
-            curtailment += TimeSeries[s][y].loc[:,idx['Scenario '+str(s),'Curtailment',:,:]].sum().sum()*instance.Scenario_Weight.extract_values()[s]
-            renewables  += TimeSeries[s][y].loc[:,idx['Scenario '+str(s),'RES Production',:,:]].sum().sum()*instance.Scenario_Weight.extract_values()[s]
-            if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
-                generators  += TimeSeries[s][y].loc[:,idx['Scenario '+str(s),'Generator Production',:,:]].sum().sum()*instance.Scenario_Weight.extract_values()[s]
-            if instance.Model_Components.value == 0 or instance.Model_Components.value == 1:
-                battery_out += TimeSeries[s][y].loc[:,idx['Scenario '+str(s),'Battery Discharge',:,:]].sum().sum()*instance.Scenario_Weight.extract_values()[s]
-            if instance.Grid_Connection.value == 1:
-                grid_in += TimeSeries[s][y].loc[:,idx['Scenario '+str(s),'Electricity from grid',:,:]].sum().sum()*instance.Scenario_Weight.extract_values()[s]   
-                if instance.Grid_Connection_Type.value == 0:
-                    grid_out += TimeSeries[s][y].loc[:,idx['Scenario '+str(s),'Electricity to grid',:,:]].sum().sum()*instance.Scenario_Weight.extract_values()[s]
-                
-        if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
-            gen_load  = pd.concat([gen_load, pd.DataFrame(['Year '+str(y), generators/demand]).T.set_index([0])], axis=0)
-        res_load  = pd.concat([res_load, pd.DataFrame(['Year '+str(y), (renewables-curtailment)/demand]).T.set_index([0])], axis=0)
-        curt_load = pd.concat([curt_load, pd.DataFrame(['Year '+str(y), curtailment/(generators+renewables)]).T.set_index([0])], axis=0)
-        if instance.Grid_Connection.value == 1:
-            grid_usage = pd.concat([grid_usage, pd.DataFrame(['Year '+str(y), grid_in/demand]).T.set_index([0])], axis=0)    
-        res_pen   = pd.concat([res_pen, pd.DataFrame(['Year '+str(y), renewables/(renewables+generators+grid_in)]).T.set_index([0])], axis=0)
-        if instance.Model_Components.value == 0 or instance.Model_Components.value == 1:
-            battery_usage = pd.concat([battery_usage, pd.DataFrame(['Year '+str(y), battery_out/demand]).T.set_index([0])], axis=0)  
-    gen_load  = round(gen_load.astype(float)*100,2)
-    res_load  = round(res_load.astype(float)*100,2)
-    res_pen   = round(res_pen.astype(float)*100,2)
-    curt_load = round(curt_load.astype(float)*100,2)
-    battery_usage = round(battery_usage.astype(float)*100,2)
-    grid_usage = round(grid_usage.astype(float)*100,2)   
-
-    if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
-        gen_load.columns  = pd.MultiIndex.from_arrays([['Generators share'],['%']], names=['',' '])
-    curt_load.columns = pd.MultiIndex.from_arrays([['Curtailment share'],['%']], names=['',' '])
-    res_pen.columns   = pd.MultiIndex.from_arrays([['Renewables penetration'],['%']], names=['',' '])
-    if instance.Model_Components.value == 0 or instance.Model_Components.value == 1:
-        battery_usage.columns = pd.MultiIndex.from_arrays([['Battery usage'],['%']], names=['',' '])
-    if instance.Grid_Connection.value == 1:
-        grid_usage.columns = pd.MultiIndex.from_arrays([['Grid usage'],['%']], names=['',' ']) 
+    #%% Data preparation: yearly energy of each flow (as returned by YearlyEnergy), weighted over the scenarios
+    def weighted(flow):
+        return weights @ Energy[flow].sum(axis=2) if flow in Energy else np.zeros(Y)
+    demand      = weighted('Electric Demand')
+    curtailment = weighted('Curtailment')
+    renewables  = weighted('RES Production')
+    generators  = weighted('Generator Production')
+    battery_out = weighted('Battery Discharge')
+    grid_in     = weighted('Electricity from grid')
+
+    params = [('Generators share', generators/demand, instance.Model_Components.value == 0 or instance.Model_Components.value == 2),
+              ('Renewables penetration', renewables/(renewables+generators+grid_in), True),
+              ('Curtailment share', curtailment/(generators+renewables), True),
+              ('Battery usage', battery_out/demand, instance.Model_Components.value == 0 or instance.Model_Components.value == 1),
+              ('Grid usage', grid_in/demand, instance.Grid_Connection.value == 1)]
+    params = [(name, values) for name, values, active in params if active]
     
     #%% Concatenating
-    if instance.Model_Components.value == 0:
-        if instance.Grid_Connection.value == 1:
-            YearlyEnergyParams = pd.concat([gen_load,
-                                            res_pen,
-                                            curt_load,
-                                            battery_usage,
-                                            grid_usage], axis=1)
-        if instance.Grid_Connection.value == 0:
-            YearlyEnergyParams = pd.concat([gen_load,
-                                            res_pen,
-                                            curt_load,
-                                            battery_usage], axis=1)          
-    if instance.Model_Components.value == 1:
-        if instance.Grid_Connection.value == 1:
-            YearlyEnergyParams = pd.concat([res_pen,
-                                            curt_load,
-                                            battery_usage,
-                                            grid_usage], axis=1)
-        if instance.Grid_Connection.value == 0:
-            YearlyEnergyParams = pd.concat([res_pen,
-                                            curt_load,
-                                            battery_usage], axis=1)
-    if instance.Model_Components.value == 2:
-        if instance.Grid_Connection.value == 1:
-            YearlyEnergyParams = pd.concat([gen_load,
-                                            res_pen,
-                                            curt_load,
-                                            grid_usage], axis=1)
-        if instance.Grid_Connection.value == 0:
-            YearlyEnergyParams = pd.concat([gen_load,
-                                            res_pen,
-                                            curt_load], axis=1)
+    YearlyEnergyParams = pd.DataFrame(np.round(np.column_stack([values for name, values in params])*100, 2),
+                                      index=pd.Index(['Year '+str(y) for y in range(1,Y+1)], name=0),
+                                      columns=pd.MultiIndex.from_arrays([[name for name, values in params], ['%']*len(params)], names=['',' ']))
+    res_pen = YearlyEnergyParams[['Renewables penetration']]
             
     return YearlyEnergyParams, res_pen
 
 #%% Yearly energy parameters
-def YearlyEnergyParamsSC(instance, TimeSeries):
+def YearlyEnergyParamsSC(instance, Energy):
     
     "Importing parameters"
-    S  = int(instance.Scenarios.extract_values()[None])
-    P  = int(instance.Periods.extract_values()[None])
-    Y  = int(instance.Years.extract_values()[None])
-    ST = int(instance.Steps_Number.extract_values()[None])
     R  = int(instance.RES_Sources.extract_values()[None])
     G  = int(instance.Generator_Types.extract_values()[None])
 
     RES_Names = instance.RES_Names.extract_values()
     Generator_Names = instance.Generator_Names.extract_values()
-    Fuel_Names = instance.Fuel_Names.extract_values()
-    idx = pd.IndexSlice
     
-    "Generating years-steps tuples list"
-    steps = [i for i in range(1, ST+1)]
+    #%% Data preparation: yearly energy of each flow and scenario (as returned by YearlyEnergy)
+    demand      = Energy['Electric Demand']
+    renewables  = Energy['RES Production']
+    generators  = Energy.get('Generator Production', np.zeros(demand.shape))
+    grid_in     = Energy.get('Electricity from grid', np.zeros(demand.shape))
+    production  = renewables.sum(axis=2, keepdims=True) + generators.sum(axis=2, keepdims=True)
     
-    years_steps_list = [1 for i in range(1, ST+1)]
-    s_dur = instance.Step_Duration.value
-    for i in range(1, ST): 
-        years_steps_list[i] = years_steps_list[i-1] + s_dur
-    ys_tuples_list = [[] for i in range(1, Y+1)]
-    for y in range(1, Y+1):  
-        if len(years_steps_list) == 1:
-            ys_tuples_list[y-1] = (y,1)
-        else:
-            for i in range(len(years_steps_list)-1):
-                if y >= years_steps_list[i] and y < years_steps_list[i+1]:
-                    ys_tuples_list[y-1] = (y, steps[i])       
-                elif y >= years_steps_list[-1]:
-                    ys_tuples_list[y-1] = (y, len(steps))
-
-#%% Data preparation
-     
+    tables = []
     if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
-        if instance.MILP_Formulation.value:
-         "Generator"
-         Generator_Names = instance.Generator_Names.extract_values()
-         Generator_Energy_Total = instance.Generator_Energy_Total.get_values()
-         Energy_Demand = instance.Energy_Demand.extract_values()
-         Generator_Types = instance.Generator_Types.value
-         gen_load_sc  = pd.DataFrame()
-         for s in range(1,S+1):
-            gen_load = pd.DataFrame()
-            for g in range(1,Generator_Types+1):
-                gen_load_types = pd.DataFrame()
-                for (y,st) in ys_tuples_list:
-                    gen_load_scenarios = pd.DataFrame(['Year '+str(y), sum(Generator_Energy_Total[(s,y,g,t)] for t in range(1,P+1))/sum(Energy_Demand[s,y,t] for t in range(1,P+1))]).T.set_index([0])
-                    gen_load_scenarios.columns  = pd.MultiIndex.from_arrays([['Generator share'],[Generator_Names[g]],[s],['%']], names=['','Component','Scenario',' ']) 
-                    gen_load_types = pd.concat([gen_load_types, gen_load_scenarios], axis=0)
-                gen_load = pd.concat([gen_load, gen_load_types], axis=0)
-            gen_load_sc = pd.concat([gen_load_sc, gen_load], axis=1).fillna(0)
-         gen_load_sc = gen_load_sc.groupby(level=[0],axis=0,sort=False).sum()
-        else:
-         Generator_Names = instance.Generator_Names.extract_values()
-         Generator_Energy_Production = instance.Generator_Energy_Production.get_values()
-         Energy_Demand = instance.Energy_Demand.extract_values()
-         Generator_Types = instance.Generator_Types.value
-         gen_load_sc  = pd.DataFrame()
-         for s in range(1,S+1):
-            gen_load = pd.DataFrame()
-            for g in range(1,Generator_Types+1):
-                gen_load_types = pd.DataFrame()
-                for (y,st) in ys_tuples_list:
-                    gen_load_scenarios = pd.DataFrame(['Year '+str(y), sum(Generator_Energy_Production[(s,y,g,t)] for t in range(1,P+1))/sum(Energy_Demand[s,y,t] for t in range(1,P+1))]).T.set_index([0])
-                    gen_load_scenarios.columns  = pd.MultiIndex.from_arrays([['Generator share'],[Generator_Names[g]],[s],['%']], names=['','Component','Scenario',' ']) 
-                    gen_load_types = pd.concat([gen_load_types, gen_load_scenarios], axis=0)
-                gen_load = pd.concat([gen_load, gen_load_types], axis=0)
-            gen_load_sc = pd.concat([gen_load_sc, gen_load], axis=1).fillna(0)
-         gen_load_sc = gen_load_sc.groupby(level=[0],axis=0,sort=False).sum()
-
-    RES_Names = instance.RES_Names.extract_values()
-    RES_Energy_Production = instance.RES_Energy_Production.get_values()
-    Curtailment = instance.Energy_Curtailment.get_values()
-    Energy_Demand = instance.Energy_Demand.extract_values()
-    RES_Sources = instance.RES_Sources.value
-    res_load_sc  = pd.DataFrame()
-    for s in range(1,S+1):
-        res_load = pd.DataFrame()
-        for r in range(1,RES_Sources+1):
-            res_load_types = pd.DataFrame()
-            for (y,st) in ys_tuples_list:
-                res_load_scenarios = pd.DataFrame(['Year '+str(y), sum(RES_Energy_Production[(s,y,r,t)]-Curtailment[(s,y,t)] for t in range(1,P+1))/sum(Energy_Demand[s,y,t] for t in range(1,P+1))]).T.set_index([0])
-                res_load_scenarios.columns  = pd.MultiIndex.from_arrays([['RES load'],[RES_Names[r]],[s],['%']], names=['','Component','Scenario',' ']) 
-                res_load_types = pd.concat([res_load_types, res_load_scenarios], axis=0)
-            res_load = pd.concat([res_load, res_load_types], axis=0)
-        res_load_sc = pd.concat([res_load_sc, res_load], axis=1).fillna(0)
-    res_load_sc = res_load_sc.groupby(level=[0],axis=0,sort=False).sum()
-    
-    if instance.MILP_Formulation.value:
-     RES_Names = instance.RES_Names.extract_values()
-     RES_Energy_Production = instance.RES_Energy_Production.get_values()
-     Generator_Energy_Total = instance.Generator_Energy_Total.get_values()
-     Electricity_From_Grid = instance.Energy_From_Grid.get_values() 
-     res_pen_sc  = pd.DataFrame()
-     for s in range(1,S+1):
-        res_pen = pd.DataFrame()
-        for r in range(1,RES_Sources+1):
-            res_pen_types = pd.DataFrame()
-            for (y,st) in ys_tuples_list:
-                
-                if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
-                    if instance.Grid_Connection.value == 1:
-                        res_pen_scenarios = pd.DataFrame(['Year '+str(y), (sum(RES_Energy_Production[(s,y,r,t)] for t in range(1,P+1)))/(sum(sum(RES_Energy_Production[(s,y,r,t)] for r in range(1,R+1)) + sum(Generator_Energy_Total[(s,y,g,t)] for g in range(1,G+1)) + Electricity_From_Grid[(s,y,t)] for t in range(1,P+1)))]).T.set_index([0])
-                    if instance.Grid_Connection.value == 0:
-                        res_pen_scenarios = pd.DataFrame(['Year '+str(y), (sum(RES_Energy_Production[(s,y,r,t)] for t in range(1,P+1)))/(sum(sum(RES_Energy_Production[(s,y,r,t)] for r in range(1,R+1)) + sum(Generator_Energy_Total[(s,y,g,t)] for g in range(1,G+1)) for t in range(1,P+1)))]).T.set_index([0])
-                   
-                if instance.Model_Components.value == 1:
-                    if instance.Grid_Connection.value == 1:
-                        res_pen_scenarios = pd.DataFrame(['Year '+str(y), (sum(RES_Energy_Production[(s,y,r,t)] for t in range(1,P+1)))/(sum(sum(RES_Energy_Production[(s,y,r,t)] for r in range(1,R+1)) + Electricity_From_Grid[(s,y,t)] for t in range(1,P+1)))]).T.set_index([0])
-                    if instance.Grid_Connection.value == 0:
-                        res_pen_scenarios = pd.DataFrame(['Year '+str(y), (sum(RES_Energy_Production[(s,y,r,t)] for t in range(1,P+1)))/(sum(sum(RES_Energy_Production[(s,y,r,t)] for r in range(1,R+1)) for t in range(1,P+1)))]).T.set_index([0])
-     
-                res_pen_scenarios.columns  = pd.MultiIndex.from_arrays([['Renewable penetration'],[RES_Names[r]],[s],['%']], names=['','Component','Scenario',' ']) 
-                res_pen_types = pd.concat([res_pen_types, res_pen_scenarios], axis=0)
-            res_pen = pd.concat([res_pen, res_pen_types], axis=0)
-        res_pen_sc = pd.concat([res_pen_sc, res_pen], axis=1).fillna(0)
-     res_pen_sc = res_pen_sc.groupby(level=[0],axis=0,sort=False).sum()
-    else:
-     RES_Names = instance.RES_Names.extract_values()
-     RES_Energy_Production = instance.RES_Energy_Production.get_values()
-     Generator_Energy_Production = instance.Generator_Energy_Production.get_values()
-     Electricity_From_Grid = instance.Energy_From_Grid.get_values() 
-     res_pen_sc  = pd.DataFrame()
-     for s in range(1,S+1):
-        res_pen = pd.DataFrame()
-        for r in range(1,RES_Sources+1):
-            res_pen_types = pd.DataFrame()
-            for (y,st) in ys_tuples_list:
-                
-                if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
-                    if instance.Grid_Connection.value == 1:
-                            res_pen_scenarios = pd.DataFrame(['Year '+str(y), (sum(RES_Energy_Production[(s,y,r,t)] for t in range(1,P+1)))/(sum(sum(RES_Energy_Production[(s,y,r,t)] for r in range(1,R+1)) + sum(Generator_Energy_Production[(s,y,g,t)] for g in range(1,G+1)) + Electricity_From_Grid[(s,y,t)] for t in range(1,P+1)))]).T.set_index([0])
-                    if instance.Grid_Connection.value == 0:
-                            res_pen_scenarios = pd.DataFrame(['Year '+str(y), (sum(RES_Energy_Production[(s,y,r,t)] for t in range(1,P+1)))/(sum(sum(RES_Energy_Production[(s,y,r,t)] for r in range(1,R+1)) + sum(Generator_Energy_Production[(s,y,g,t)] for g in range(1,G+1)) for t in range(1,P+1)))]).T.set_index([0])
-                if instance.Model_Components.value == 1:
-                    if instance.Grid_Connection.value == 1:
-                            res_pen_scenarios = pd.DataFrame(['Year '+str(y), (sum(RES_Energy_Production[(s,y,r,t)] for t in range(1,P+1)))/(sum(sum(RES_Energy_Production[(s,y,r,t)] for r in range(1,R+1)) + Electricity_From_Grid[(s,y,t)] for t in range(1,P+1)))]).T.set_index([0])
-                    if instance.Grid_Connection.value == 0:
-                            res_pen_scenarios = pd.DataFrame(['Year '+str(y), (sum(RES_Energy_Production[(s,y,r,t)] for t in range(1,P+1)))/(sum(sum(RES_Energy_Production[(s,y,r,t)] for r in range(1,R+1)) for t in range(1,P+1)))]).T.set_index([0])
-                    
-                res_pen_scenarios.columns  = pd.MultiIndex.from_arrays([['Renewable penetration'],[RES_Names[r]],[s],['%']], names=['','Component','Scenario',' ']) 
-                res_pen_types = pd.concat([res_pen_types, res_pen_scenarios], axis=0)
-            res_pen = pd.concat([res_pen, res_pen_types], axis=0)
-        res_pen_sc = pd.concat([res_pen_sc, res_pen], axis=1).fillna(0)
-     res_pen_sc = res_pen_sc.groupby(level=[0],axis=0,sort=False).sum()
-    
-    curt_load_sc = pd.DataFrame()
-    for s in range(1, S+1):
-        curt_sc = pd.DataFrame()
-        for (y, st) in ys_tuples_list:
-            if instance.MILP_Formulation.value:
-                total_energy_production = sum(
-                    sum(RES_Energy_Production[(s, y, r, t)] if RES_Energy_Production.get((s, y, r, t)) is not None else 0 for r in range(1, R+1)) +
-                    sum(Generator_Energy_Total[(s, y, g, t)] if Generator_Energy_Total.get((s, y, g, t)) is not None else 0 for g in range(1, G+1))
-                    for t in range(1, P+1)
-                )
-            else:
-                total_energy_production = sum(
-                    sum(RES_Energy_Production[(s, y, r, t)] if RES_Energy_Production.get((s, y, r, t)) is not None else 0 for r in range(1, R+1)) +
-                    sum(Generator_Energy_Production[(s, y, g, t)] if Generator_Energy_Production.get((s, y, g, t)) is not None else 0 for g in range(1, G+1))
-                    for t in range(1, P+1)
-                )
-                
-            if total_energy_production > 0:
-                curt_load = pd.DataFrame(
-                    ['Year ' + str(y), sum(Curtailment.get((s, y, t), 0) for t in range(1, P+1)) / total_energy_production]
-                ).T.set_index([0])
-            else:
-                curt_load = pd.DataFrame(['Year ' + str(y), 0]).T.set_index([0])  # Set a default value (e.g., 0) when there's no production
-
-            curt_load.columns = pd.MultiIndex.from_arrays([['Curtailment share'], ['-'], [s], ['%']], names=['', 'Component', 'Scenario', ' '])
-            curt_sc = pd.concat([curt_sc, curt_load], axis=0)
-        curt_load_sc = pd.concat([curt_load_sc, curt_sc], axis=1).fillna(0)
-
-    
+        tables.append(scenario_table(generators/demand, 'Generator share', [Generator_Names[g] for g in range(1,G+1)]))
+    res_pen_sc = scenario_table(renewables/(production + grid_in), 'Renewable penetration', [RES_Names[r] for r in range(1,R+1)])
+    tables.append(res_pen_sc)
+    curtailment = np.divide(Energy['Curtailment'], production, out=np.zeros(demand.shape), where=production > 0)
+    tables.append(scenario_table(curtailment, 'Curtailment share', ['-']))
     if instance.Model_Components.value == 0 or instance.Model_Components.value == 1:
-        BESS_Outflow = instance.Battery_Outflow.get_values()    
-        battery_usage_sc = pd.DataFrame()
-        for s in range(1,S+1):
-            battery_sc = pd.DataFrame()
-            for (y,st) in ys_tuples_list:
-                batt_sc = pd.DataFrame(['Year '+str(y), sum(BESS_Outflow[s,y,t] for t in range(1,P+1))/sum(Energy_Demand[s,y,t] for t in range(1,P+1))]).T.set_index([0]) 
-                batt_sc.columns  = pd.MultiIndex.from_arrays([['Battery usage'],['Battery bank'],[s],['%']], names=['','Component','Scenario',' '])
-                battery_sc = pd.concat([battery_sc, batt_sc], axis=0)
-            battery_usage_sc = pd.concat([battery_usage_sc, battery_sc], axis=1).fillna(0)
-    
+        tables.append(scenario_table(Energy['Battery Discharge']/demand, 'Battery usage', ['Battery bank']))
     if instance.Grid_Connection.value == 1:
-        Electricity_From_Grid = instance.Energy_From_Grid.get_values() 
-        grid_usage_sc = pd.DataFrame()
-        for s in range(1,S+1):
-            grid_el_sc = pd.DataFrame()
-            for (y,st) in ys_tuples_list:
-                grid_sc = pd.DataFrame(['Year '+str(y), sum(Electricity_From_Grid[s,y,t] for t in range(1,P+1))/sum(Energy_Demand[s,y,t] for t in range(1,P+1))]).T.set_index([0]) 
-                grid_sc.columns  = pd.MultiIndex.from_arrays([['Grid usage'],['Grid'],[s],['%']], names=['','Component','Scenario',' '])
-                grid_el_sc = pd.concat([grid_el_sc, grid_sc], axis=0)
-            grid_usage_sc = pd.concat([grid_usage_sc, grid_el_sc], axis=1).fillna(0)
+        tables.append(scenario_table(grid_in/demand, 'Grid usage', ['Grid']))
         
     #%% Concatenating
-    if instance.Model_Components.value == 0:
-        if instance.Grid_Connection.value == 1:
-            YearlyEnergyParamsSC = pd.concat([round(gen_load_sc.astype(float)*100,2),
-                                              round(res_pen_sc.astype(float)*100,2),
-                                              round(curt_load_sc.astype(float)*100,2),
-                                              round(battery_usage_sc.astype(float)*100,2),
-                                              round(grid_usage_sc.astype(float)*100,2)], axis=1)
-        if instance.Grid_Connection.value == 0:
-            YearlyEnergyParamsSC = pd.concat([round(gen_load_sc.astype(float)*100,2),
-                                              round(res_pen_sc.astype(float)*100,2),
-                                              round(curt_load_sc.astype(float)*100,2),
-                                              round(battery_usage_sc.astype(float)*100,2)], axis=1)       
-    if instance.Model_Components.value == 1:
-        if instance.Grid_Connection.value == 1:
-            YearlyEnergyParamsSC = pd.concat([round(res_pen_sc.astype(float)*100,2),
-                                              round(curt_load_sc.astype(float)*100,2),
-                                              round(battery_usage_sc.astype(float)*100,2),
-                                              round(grid_usage_sc.astype(float)*100,2)], axis=1)
-        if instance.Grid_Connection.value == 0:
-            YearlyEnergyParamsSC = pd.concat([round(res_pen_sc.astype(float)*100,2),
-                                              round(curt_load_sc.astype(float)*100,2),
-                                              round(battery_usage_sc.astype(float)*100,2)], axis=1)
-    if instance.Model_Components.value == 2:
-        if instance.Grid_Connection.value == 1:
-            YearlyEnergyParamsSC = pd.concat([round(gen_load_sc.astype(float)*100,2),
-                                              round(res_pen_sc.astype(float)*100,2),
-                                              round(curt_load_sc.astype(float)*100,2),
-                                              round(grid_usage_sc.astype(float)*100,2)], axis=1)
-        if instance.Grid_Connection.value == 0:
-            YearlyEnergyParamsSC = pd.concat([round(gen_load_sc.astype(float)*100,2),
-                                              round(res_pen_sc.astype(float)*100,2),
-                                              round(curt_load_sc.astype(float)*100,2)], axis=1)
-
+    YearlyEnergyParamsSC = round(pd.concat(tables, axis=1)*100, 2)
     
     return YearlyEnergyParamsSC, res_pen_sc    
 
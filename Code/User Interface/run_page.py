@@ -181,6 +181,7 @@ class RunPage(tk.Frame):
             self.Time_Series = TimeSeries(self.instance)
             optimization_goal = self.instance.Optimization_Goal.extract_values()[None]
             self.Results = ResultsSummary(self.instance, optimization_goal, self.Time_Series)
+            self.Results.export()
             PrintResults(self.instance, self.Results)
             elapsed = time.time() - start
             self.update_output(f'\n\nModel run complete (overall time: {round(elapsed, 0)} s, {round(elapsed / 60, 1)} m)\n')
@@ -0,0 +1,4 @@
+import os, sys
+
+# The model modules are imported as top-level scripts, as MicroGrids.py does from Code/Model
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Code', 'Model'))
@@ -0,0 +1,106 @@
+import numpy as np
+from itertools import product
+
+
+class Component:
+    '''Stand-in for a component of a solved instance, holding its values keyed by index tuples (None for scalars)'''
+    def __init__(self, values):
+        self.values = values
+
+    @property
+    def value(self):
+        return self.values[None]
+
+    def extract_values(self):
+        return dict(self.values)
+
+    get_values = extract_values
+
+    def __call__(self):
+        return self.value
+
+    expr = __call__
+
+    # scalar parameters used directly in arithmetic, as Pyomo allows
+    def __mul__(self, other):
+        return self.value * other
+
+    __rmul__ = __mul__
+
+
+class Instance:
+    '''Stand-in for a solved model instance: each attribute is a Component'''
+    def __init__(self, components):
+        for name, values in components.items():
+            setattr(self, name, Component(values if isinstance(values, dict) else {None: values}))
+
+
+def solved_instance(Model_Components=0, MILP_Formulation=0, Generator_Partial_Load=0, Grid_Connection=0, Grid_Connection_Type=0,
+                    Optimization_Goal=0, scenarios=2, years=4, periods=24, step_duration=2, seed=0):
+    '''
+    Small instance (2 RES, 2 generators) with random values of the parameters and variables read by the results functions,
+    indexed from 1 as in the model.
+    '''
+    rng = np.random.default_rng(seed)
+    S, Y, P, R, G = scenarios, years, periods, 2, 2
+    ST = -(-Y // step_duration)
+    sets = {'s': range(1, S+1), 'y': range(1, Y+1), 't': range(1, P+1), 'r': range(1, R+1), 'g': range(1, G+1), 'st': range(1, ST+1)}
+
+    def indexed(index, low=0, high=1):
+        keys = list(product(*[sets[i] for i in index]))
+        values = rng.uniform(low, high, len(keys))
+        return {key[0] if len(key) == 1 else key: value for key, value in zip(keys, values)}
+
+    def steps(index, low, high):
+        # capacities growing at each investment step
+        values = indexed(index, low, high)
+        for key in values:
+            step = key[0] if isinstance(key, tuple) else key
+            values[key] *= step
+        return values
+
+    components = {
+        'Scenarios': S, 'Years': Y, 'Periods': P, 'Steps_Number': ST, 'Step_Duration': step_duration, 'RES_Sources': R, 'Generator_Types': G,
+        'Model_Components': Model_Components, 'MILP_Formulation': MILP_Formulation, 'Generator_Partial_Load': Generator_Partial_Load,
+        'Grid_Connection': Grid_Connection, 'Grid_Connection_Type': Grid_Connection_Type, 'Optimization_Goal': Optimization_Goal,
+        'Fuel_Specific_Cost_Calculation': 0, 'Land_Use': 0, 'Time_Series_Format': 1, 'Discount_Rate': 0.1, 'StartDate': '01/01/2023 00:00:00', 'Year_Grid_Connection': 2,
+        'Scenario_Weight': {s: 1/S for s in sets['s']},
+        'RES_Names': {1: 'Solar PV', 2: 'Wind'}, 'Generator_Names': {1: 'Diesel Genset 1', 2: 'Diesel Genset 2'}, 'Fuel_Names': {1: 'Diesel 1', 2: 'Diesel 2'},
+
+        # Parameters
+        'RES_Nominal_Capacity': indexed('r', 5e4, 1.5e5), 'RES_capacity': indexed('r', 0, 1e4), 'RES_Specific_Investment_Cost': indexed('r', 1, 2),
+        'RES_Specific_OM_Cost': indexed('r', 0.01, 0.03),
+        'Battery_Nominal_Capacity_milp': 5e5, 'Battery_capacity': 1e4, 'Battery_Specific_Investment_Cost': 0.4, 'Battery_Specific_OM_Cost': 0.02,
+        'Unitary_Battery_Replacement_Cost': 0.05,
+        'Generator_Nominal_Capacity_milp': indexed('g', 5e5, 1e6), 'Generator_capacity': indexed('g', 0, 1e4), 'Generator_Specific_Investment_Cost': indexed('g', 0.3, 0.5),
+        'Generator_Specific_OM_Cost': indexed('g', 0.01, 0.03), 'Fuel_LHV': indexed('g', 9000, 10000), 'Generator_Efficiency': indexed('g', 0.25, 0.35),
+        'Generator_Marginal_Cost': indexed('gy', 1e-4, 3e-4), 'Generator_Marginal_Cost_milp': indexed('gy', 1e-4, 3e-4), 'Generator_Start_Cost': indexed('gy', 0, 1),
+        'Generator_Marginal_Cost_1': indexed('g', 1e-4, 3e-4), 'Generator_Marginal_Cost_milp_1': indexed('g', 1e-4, 3e-4), 'Generator_Start_Cost_1': indexed('g', 0, 1),
+        'Grid_Connection_Cost': 14., 'Grid_Distance': 1.5, 'Grid_Maintenance_Cost': 0.025, 'Grid_Purchased_El_Price': 1.4e-4, 'Grid_Sold_El_Price': 1e-4,
+        'Lost_Load_Specific_Cost': 1e-3,
+        'Energy_Demand': indexed(('s', 'y', 't'), 1000, 5000),
+
+        # Sizing variables
+        'RES_Units': steps(('st', 'r'), 1, 10), 'RES_Units_milp': steps(('st', 'r'), 1, 10),
+        'Battery_Nominal_Capacity': steps(('st',), 5e5, 2e6), 'Battery_Units': steps(('st',), 1, 4),
+        'Generator_Nominal_Capacity': steps(('st', 'g'), 1e5, 5e5), 'Generator_Units': steps(('st', 'g'), 1, 3),
+
+        # Operation variables
+        'RES_Energy_Production': indexed(('s', 'y', 'r', 't'), 0, 3000), 'Battery_Outflow': indexed(('s', 'y', 't'), 0, 1000),
+        'Battery_Inflow': indexed(('s', 'y', 't'), 0, 1000), 'Battery_SOC': indexed(('s', 'y', 't'), 1000, 10000),
+        'Generator_Energy_Production': indexed(('s', 'y', 'g', 't'), 0, 2000), 'Generator_Energy_Total': indexed(('s', 'y', 'g', 't'), 0, 2000),
+        'Generator_Energy_Partial': indexed(('s', 'y', 'g', 't'), 0, 500), 'Generator_Partial': indexed(('s', 'y', 'g', 't'), 0, 1),
+        'Generator_Full': indexed(('s', 'y', 'g', 't'), 0, 2), 'FUEL_emission': indexed(('s', 'y', 'g', 't'), 0, 5),
+        'Energy_Curtailment': indexed(('s', 'y', 't'), 0, 200), 'Lost_Load': indexed(('s', 'y', 't'), 0, 50),
+        'Energy_From_Grid': indexed(('s', 'y', 't'), 0, 800), 'Energy_To_Grid': indexed(('s', 'y', 't'), 0, 300),
+
+        # Cost and emission variables
+        'ObjectiveFuntion': 9e5, 'Investment_Cost': 4e5, 'Operation_Maintenance_Cost_Act': 1e5, 'Operation_Maintenance_Cost_NonAct': 1.5e5,
+        'Salvage_Value': 2e4, 'RES_emission': 3e5, 'GEN_emission': 2e5, 'BESS_emission': 1e5,
+        'Scenario_Net_Present_Cost': indexed('s', 8e5, 1e6), 'Total_Scenario_Variable_Cost_Act': indexed('s', 2e5, 3e5),
+        'Total_Scenario_Variable_Cost_NonAct': indexed('s', 3e5, 4e5), 'Scenario_Lost_Load_Cost_Act': indexed('s', 0, 1e4),
+        'Scenario_Lost_Load_Cost_NonAct': indexed('s', 0, 2e4), 'Scenario_CO2_emission': indexed('s', 1e6, 2e6),
+        'Scenario_FUEL_emission': indexed('s', 5e5, 1e6), 'Scenario_GRID_emission': indexed('s', 0, 1e5),
+        'Total_Fuel_Cost_Act': indexed(('s', 'g'), 5e4, 1e5), 'Battery_Replacement_Cost_Act': indexed('s', 0, 2e4),
+        'Total_Electricity_Cost_Act': indexed('s', 0, 3e4), 'Total_Revenues_Act': indexed('s', 0, 1e4)}
+    return Instance(components)
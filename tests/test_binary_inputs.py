@@ -0,0 +1,38 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from Binary_Inputs import TIME_SERIES_INPUTS, csv_to_npy, load_time_series, npy_path
+
+
+def write_demand_csv(directory, values):
+    frame = pd.DataFrame(values, index=range(1, len(values) + 1), columns=range(1, values.shape[1] + 1))
+    frame.to_csv(directory / TIME_SERIES_INPUTS['Demand'][0], sep=';', decimal=',')
+
+
+def test_npy_follows_csv_content(tmp_path):
+    rng = np.random.default_rng(0)
+    first, second = rng.random((24, 3)), rng.random((24, 3))
+    csv_path = tmp_path / TIME_SERIES_INPUTS['Demand'][0]
+
+    write_demand_csv(tmp_path, first)
+    csv_to_npy(str(csv_path), npy_path('Demand', str(tmp_path)))
+    np.testing.assert_allclose(load_time_series('Demand', str(tmp_path), use_cache=False).to_numpy(), first)
+
+    # edited .csv file restored with an older modification time (e.g. git checkout, cp -p)
+    write_demand_csv(tmp_path, second)
+    os.utime(csv_path, (0, 0))
+    np.testing.assert_allclose(load_time_series('Demand', str(tmp_path), use_cache=False).to_numpy(), second)
+    np.testing.assert_allclose(np.load(npy_path('Demand', str(tmp_path))), second)           # converted again
+
+    # without the .csv file the .npy file is used as it is
+    csv_path.unlink()
+    np.testing.assert_allclose(load_time_series('Demand', str(tmp_path), use_cache=False).to_numpy(), second)
+
+
+def test_npy_without_stored_hash_is_converted_again(tmp_path):
+    values = np.random.default_rng(1).random((24, 2))
+    write_demand_csv(tmp_path, values)
+    np.save(npy_path('Demand', str(tmp_path)), np.zeros((24, 2)))
+    np.testing.assert_allclose(load_time_series('Demand', str(tmp_path), use_cache=False).to_numpy(), values)
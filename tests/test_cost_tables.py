@@ -0,0 +1,59 @@
+import io, contextlib, os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fake_instance import solved_instance
+from Results import EnergySystemCost, YearlyCosts
+
+# Cost tables of the previous row-by-row implementation (pd.concat of one-row frames and groupby sums), recorded on
+# the instances below. The recorded tables include the fixes of the array-based rewrite: the total fixed O&M cost in
+# 'Total', all values rounded to 4 decimals, one column of grid revenues per scenario and Grid_Connection_Type read by value.
+fixtures_directory = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'cost_tables')
+
+CONFIGURATIONS = {'batteries_generators': dict(),
+                  'milp_partial_load_grid': dict(MILP_Formulation=1, Generator_Partial_Load=1, Grid_Connection=1),
+                  'batteries_total_variable_cost': dict(Model_Components=1, Optimization_Goal=1),
+                  'generators_milp_grid_purchase': dict(Model_Components=2, MILP_Formulation=1, Grid_Connection=1, Grid_Connection_Type=1),
+                  'generators_total_variable_cost_grid': dict(Model_Components=2, Grid_Connection=1, Optimization_Goal=1)}
+
+
+def cost_tables(instance):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return EnergySystemCost(instance, instance.Optimization_Goal.value), YearlyCosts(instance)
+
+
+def labels(index):
+    return [tuple(str(level) for level in (label if isinstance(label, tuple) else (label,))) for label in index]
+
+
+def numeric(table):
+    return table.replace('-', np.nan).astype(float).to_numpy()
+
+
+@pytest.mark.parametrize('name', CONFIGURATIONS)
+def test_system_costs_match_recorded(name):
+    costs, yearly = cost_tables(solved_instance(**CONFIGURATIONS[name]))
+    expected = pd.read_csv(os.path.join(fixtures_directory, name + '_costs.csv'), index_col=[0, 1, 2, 3], dtype=str)
+    assert costs.index.names == expected.index.names
+    assert labels(costs.index) == labels(expected.index)
+    assert list(costs.columns) == list(expected.columns)
+    np.testing.assert_allclose(numeric(costs), numeric(expected), rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize('name', CONFIGURATIONS)
+def test_yearly_cash_flows_match_recorded(name):
+    costs, yearly = cost_tables(solved_instance(**CONFIGURATIONS[name]))
+    expected = pd.read_csv(os.path.join(fixtures_directory, name + '_yearly_cash_flows.csv'), header=[0, 1, 2, 3], index_col=0)
+    assert labels(yearly.columns) == labels(expected.columns)
+    assert list(yearly.index) == list(expected.index)
+    np.testing.assert_allclose(yearly.to_numpy(dtype=float), expected.to_numpy(dtype=float), rtol=1e-12, atol=1e-12)
+
+
+def test_batteries_with_grid_have_no_fuel_costs():
+    # the previous implementation requested an undefined fuel cost block for battery-only systems connected to the grid
+    costs, yearly = cost_tables(solved_instance(Model_Components=1, Grid_Connection=1))
+    assert 'Fuel cost' not in costs.index.get_level_values('Cost item')
+    assert 'Fuel cost' not in yearly.columns.get_level_values(0)
+    assert 'Grid electricity revenue' in costs.index.get_level_values('Cost item')
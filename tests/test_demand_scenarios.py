@@ -0,0 +1,33 @@
+import numpy as np
+
+from Demand import demand_scenarios
+
+
+def archetypes(seed=0, periods=8760):
+    """Synthetic (periods x 11) archetype profiles and units of each archetype."""
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0.1, 2, (periods, 11)), rng.uniform(0.5, 3, 11)
+
+
+def test_same_seed_same_scenarios():
+    matrix, units = archetypes()
+    first = demand_scenarios(matrix, units, 2, 5, 4, np.random.default_rng(42))
+    second = demand_scenarios(matrix, units, 2, 5, 4, np.random.default_rng(42))
+    assert first.shape == (4, 5, 8760)
+    np.testing.assert_array_equal(first, second)
+
+
+def test_different_seeds_and_scenarios_differ():
+    matrix, units = archetypes()
+    first = demand_scenarios(matrix, units, 2, 5, 4, np.random.default_rng(42))
+    other = demand_scenarios(matrix, units, 2, 5, 4, np.random.default_rng(43))
+    assert not np.allclose(first, other)
+    assert all(not np.allclose(first[0], first[s]) for s in range(1, 4))
+
+
+def test_scenarios_centred_on_deterministic_demand():
+    matrix, units = archetypes(periods=240)
+    load = demand_scenarios(matrix, units, 2, 3, 4000, np.random.default_rng(0))
+    deterministic = np.outer(np.cumprod([1, 1.02, 1.02]), matrix @ units)      #same profile in every scenario (Demand_Scenario_Generation = 0)
+    assert (load >= 0).all()
+    np.testing.assert_allclose(load.mean(axis=0).sum(axis=1), deterministic.sum(axis=1), rtol=0.01)
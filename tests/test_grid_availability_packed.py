@@ -0,0 +1,37 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from Binary_Inputs import GRID_AVAILABILITY_PACKED, TIME_SERIES_INPUTS, load_grid_availability, save_packed_availability
+
+
+def write_availability_csv(directory, availability):
+    pd.DataFrame(availability, columns=range(1, availability.shape[1] + 1)).to_csv(directory / TIME_SERIES_INPUTS['Grid Availability'][0], index=False, sep=';')
+
+
+def test_packed_file_follows_csv_content(tmp_path):
+    rng = np.random.default_rng(0)
+    first, second = (rng.integers(0, 2, size=(50, 3), dtype=np.uint8) for _ in range(2))
+    csv_path = tmp_path / TIME_SERIES_INPUTS['Grid Availability'][0]
+    packed_path = tmp_path / GRID_AVAILABILITY_PACKED
+
+    write_availability_csv(tmp_path, first)
+    save_packed_availability(packed_path, first, csv_path)
+    np.testing.assert_array_equal(load_grid_availability(50, 3, str(tmp_path), use_cache=False), first)
+
+    # edited .csv file, with the packed file still looking newer
+    write_availability_csv(tmp_path, second)
+    os.utime(csv_path, (0, 0))
+    np.testing.assert_array_equal(load_grid_availability(50, 3, str(tmp_path), use_cache=False), second)
+
+    # without the .csv file the packed file is used as it is
+    csv_path.unlink()
+    np.testing.assert_array_equal(load_grid_availability(50, 3, str(tmp_path), use_cache=False), first)
+
+
+def test_packed_file_without_source_hash_is_ignored(tmp_path):
+    availability = np.random.default_rng(1).integers(0, 2, size=(20, 2), dtype=np.uint8)
+    write_availability_csv(tmp_path, availability)
+    np.savez_compressed(tmp_path / GRID_AVAILABILITY_PACKED, bits=np.packbits(1 - availability, axis=0), periods=20)
+    np.testing.assert_array_equal(load_grid_availability(20, 2, str(tmp_path), use_cache=False), availability)
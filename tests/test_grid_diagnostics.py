@@ -0,0 +1,38 @@
+import math
+
+import numpy as np
+
+from Grid_Availability import (Weibull_CDF, Weibull_distrib, availability_matrix, grid_availability_diagnostics, k_OD, k_TBO,
+                               lambda_OD, lambda_TBO, sample_outages, scenario_availability)
+
+# Previous scalar Weibull functions, evaluated point by point in list comprehensions, kept as reference
+
+def reference_Weibull_CDF(x,a,b):
+
+    y = 1-math.exp(-(x/a)**b)
+    return y
+
+def reference_Weibull_distrib(x,a,b):
+    y = (b/(a**b)) * x**(b-1) * math.exp(-(x/a)**b)
+    return y
+
+
+def test_weibull_curves_match_reference():
+    times1 = np.linspace(0.00001,math.ceil(lambda_TBO*((-math.log(1-0.9999))**(1/k_TBO))),num = 5*10**3)
+    times2 = np.linspace(0.0001,math.ceil(lambda_OD*((-math.log(1-0.9999))**(1/k_OD))),num = 2*10**4)
+    for times, a, b in [(times1, lambda_TBO, k_TBO), (times2, lambda_OD, k_OD)]:
+        np.testing.assert_allclose(Weibull_CDF(times, a, b), [reference_Weibull_CDF(x, a, b) for x in times], rtol=1e-12)
+        np.testing.assert_allclose(Weibull_distrib(times, a, b), [reference_Weibull_distrib(x, a, b) for x in times], rtol=1e-12)
+
+
+def test_diagnostics_sample_the_first_scenario():
+    # grid_availability_diagnostics draws its samples from the stream of scenario 1 of grid_availability
+    samples_TBO, samples_OD, k = sample_outages(np.random.default_rng(np.random.SeedSequence(5).spawn(1)[0]), 40, 90, 5, 8760)
+    np.testing.assert_array_equal(availability_matrix(samples_TBO, samples_OD, 8760, 5), scenario_availability(40, 90, 5, 3, 8760, 5)[0])
+
+
+def test_diagnostics_plots(tmp_path):
+    grid_availability_diagnostics(40, 90, 6, 2, 8760, seed=5, plot_directory=str(tmp_path))
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(title + '.png' for title in [
+        'Weibull Cumulative Distribution Function (TBO)', 'Weibull Cumulative Distribution Function (OD)',
+        'Weibull Distribution (TBO)', 'Weibull Distribution (OD)', 'Samples Distribution (TBO)', 'Samples Distribution (OD)'])
@@ -0,0 +1,31 @@
+import numpy as np
+
+import Input_Cache
+from Input_Cache import cache_statistics, cached_array
+
+
+def test_cached_array_hits_and_statistics(tmp_path, monkeypatch):
+    monkeypatch.setattr(Input_Cache, 'cache_stats', {'hits': 0, 'misses': 0, 'evicted': 0})
+    source = tmp_path / 'input.csv'
+    source.write_text('1;2\n3;4\n')
+    cache = tmp_path / 'cache'
+    calls = []
+
+    def parser(file_path, scale):
+        calls.append(file_path)
+        return np.loadtxt(file_path, delimiter=';')*scale
+
+    first = cached_array(str(source), parser, directory=str(cache), scale=2)
+    second = cached_array(str(source), parser, directory=str(cache), scale=2)
+    other_settings = cached_array(str(source), parser, directory=str(cache), scale=3)
+
+    np.testing.assert_array_equal(second, first)
+    np.testing.assert_array_equal(other_settings, [[3, 6], [9, 12]])
+    assert len(calls) == 2
+    stats = cache_statistics(str(cache))
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 2, 2)
+    assert stats['size_MB'] > 0
+
+    source.write_text('1;2\n3;5\n')                                            # edited file: parsed again
+    np.testing.assert_array_equal(cached_array(str(source), parser, directory=str(cache), scale=2), [[2, 4], [6, 10]])
+    assert len(calls) == 3
@@ -0,0 +1,54 @@
+import pytest
+from pyomo.environ import AbstractModel, Param, RangeSet
+
+from Input_Preprocessing import add_scenario_weights, load_model_data, run_generators
+
+
+def test_run_generators_joins_outputs():
+    outputs = run_generators({'a': (lambda x, y: x + y, (1, 2)), 'b': (lambda: 'b', ())})
+    assert outputs == {'a': 3, 'b': 'b'}
+    assert run_generators({}) == {}
+
+
+def test_matching_scenario_weights():
+    weights = {}
+    add_scenario_weights(weights, [0.25]*4, 'Load demand generation')
+    add_scenario_weights(weights, [1/4]*4, 'RES time series generation')
+    assert weights == {1: 0.25, 2: 0.25, 3: 0.25, 4: 0.25}
+
+
+def test_different_scenario_counts():
+    weights = {}
+    add_scenario_weights(weights, [0.5]*2, 'Load demand generation')
+    with pytest.raises(ValueError, match='generated 3 scenarios, but the other generated inputs have 2'):
+        add_scenario_weights(weights, [1/3]*3, 'RES time series generation')
+
+
+def test_different_scenario_weights():
+    weights = {}
+    add_scenario_weights(weights, [0.5, 0.5], 'Load demand generation')
+    with pytest.raises(ValueError, match='scenario weights of RES time series generation'):
+        add_scenario_weights(weights, [0.3, 0.7], 'RES time series generation')
+    assert weights == {1: 0.5, 2: 0.5}
+
+
+def scenario_model():
+    model = AbstractModel()
+    model.scenarios = Param()
+    model.scenario = RangeSet(model.scenarios)
+    model.Scenario_Weight = Param(model.scenario)
+    model.Periods = Param()
+    return model
+
+
+def test_model_data_scenario_weights(tmp_path):
+    datapath = tmp_path / 'Parameters.dat'
+    datapath.write_text('param: scenarios := 2;\nparam: Periods := 8760;\nparam: Scenario_Weight :=\n1 0.7\n2 0.3\n;\n')
+    model = scenario_model()
+    instance = model.create_instance(load_model_data(model, str(datapath), {}))
+    assert instance.Scenario_Weight.extract_values() == {1: 0.7, 2: 0.3}
+
+    # weights of the generated scenarios replace the ones of the data file
+    instance = model.create_instance(load_model_data(model, str(datapath), {1: 0.5, 2: 0.5}))
+    assert instance.Scenario_Weight.extract_values() == {1: 0.5, 2: 0.5}
+    assert instance.Periods.value == 8760
@@ -0,0 +1,67 @@
+import math
+
+import numpy as np
+import pytest
+
+from Grid_Availability import availability_matrix, k_OD, lambda_OD, sample_outages, weibull_samples
+
+# Previous sample-by-sample construction, kept as reference. The matrix loop has the two fixes of the
+# vectorized version: the excess hours are removed from the end (was grid.pop(-0), removing the first hour)
+# and the year changes after periods hours (was periods - 1, leaving the last period of every year available).
+
+def reference_outage_durations(rng, OD_tot):
+    samples_OD = []
+    while sum(samples_OD) < OD_tot:                     #construct samples from OD distribution until the sum is equal to OD_tot
+        spl = lambda_OD * rng.weibull(k_OD,size = 1)[0]
+        samples_OD.append(spl)
+        if sum(samples_OD) > OD_tot:
+            samples_OD[-1] = math.ceil(samples_OD[-1] - (sum(samples_OD)-OD_tot))
+    return samples_OD
+
+
+def reference_availability_matrix(samples_TBO, samples_OD, periods, grid_lifetime):
+    grid = []
+    for ii in range(0,len(samples_OD)):                               #populate the grid availability list [length 8760*20]
+            TBO = int(round(samples_TBO[ii]))
+            OD = int(round(samples_OD[ii]))
+            grid.extend([ii for ii in np.ones(TBO)])
+            grid.extend([ii for ii in np.zeros(OD)])
+            if len(grid) >= grid_lifetime * periods:
+                del grid[grid_lifetime * periods:]
+                break
+
+    grid_matrix = np.ones((periods, grid_lifetime))
+    year_count = 0
+    ff = 0
+    for ii in range(len(grid)):
+        if year_count == grid_lifetime:
+            break
+        grid_matrix[ff,year_count] = grid[ii]
+        ff = ff + 1
+        if ff == periods:
+            year_count = year_count +1
+            ff = 0
+    return grid_matrix
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2, 12345])
+def test_outage_durations_match_sequential_draws(seed):
+    OD_tot = 19 * 40 * 90/60                            #19 years, 40 outages of 90 min a year
+    np.testing.assert_array_equal(weibull_samples(np.random.default_rng(seed), lambda_OD, k_OD, OD_tot),
+                                  reference_outage_durations(np.random.default_rng(seed), OD_tot))
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_availability_matrix_matches_reference(seed):
+    samples_TBO, samples_OD, k = sample_outages(np.random.default_rng(seed), 40, 90, 19, 8760)
+    grid = availability_matrix(samples_TBO, samples_OD, 8760, 19)
+    assert grid.shape == (8760, 19)
+    np.testing.assert_array_equal(grid, reference_availability_matrix(samples_TBO, samples_OD, 8760, 19))
+
+
+def test_outage_totals():
+    samples_TBO, samples_OD, k = sample_outages(np.random.default_rng(3), 40, 90, 19, 8760)
+    OD_tot = 19 * 40 * 90/60
+    assert len(samples_TBO) == len(samples_OD)
+    assert samples_OD.sum() == pytest.approx(OD_tot, abs=1)
+    assert samples_TBO.sum() == pytest.approx(19*8760 - OD_tot)
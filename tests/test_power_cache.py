@@ -0,0 +1,94 @@
+import gzip
+import os
+import time
+
+import numpy as np
+import pytest
+
+import RE_calculation
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'power_daily_point.json')
+URL = ('https://power.larc.nasa.gov/api/temporal/daily/point?parameters=ALLSKY_SFC_SW_DWN'
+       '&start=20200101&end=20200107&community=RE&longitude=30&latitude=-12&format=JSON&user=anonymous')
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    '''Empty POWER cache folder, with the network replaced by a recorder of the requested URLs'''
+    monkeypatch.setattr(RE_calculation, 'POWER_CACHE_DIRECTORY', str(tmp_path))
+    monkeypatch.setattr(RE_calculation, 'POWER_OFFLINE', False)
+    requested = []
+
+    def fetch_url(URL, pool=None):
+        requested.append(URL)
+        return '{"downloaded": "%s"}' % URL
+
+    monkeypatch.setattr(RE_calculation, 'fetch_url', fetch_url)
+    return requested
+
+
+def record(URL, path=FIXTURE, age_days=0):
+    '''Stores the response of URL in the cache, as written by get_data, age_days old'''
+    entry = RE_calculation.cached_response_path(URL)
+    os.makedirs(os.path.dirname(entry), exist_ok=True)
+    with open(path) as f, gzip.open(entry, 'wt') as g:
+        g.write(f.read())
+    mtime = time.time() - age_days*86400
+    os.utime(entry, (mtime, mtime))
+    return entry
+
+
+def test_offline_serves_recorded_response(cache, monkeypatch):
+    record(URL)
+    monkeypatch.setattr(RE_calculation, 'POWER_OFFLINE', True)
+
+    jsdata = RE_calculation.get_data(URL)
+
+    assert cache == []                                                        #no network access
+    with open(FIXTURE) as f:
+        assert jsdata == f.read()
+    dates, values = RE_calculation.decode_json(jsdata, ['ALLSKY_SFC_SW_DWN'])
+    np.testing.assert_array_equal(dates, np.arange(20200101, 20200108))
+    np.testing.assert_allclose(values, [[5.42, 6.11, 0, 4.87, 5.96, 6.35, 3.78]])    #fill value set to 0
+
+
+def test_offline_serves_expired_response(cache, monkeypatch):
+    record(URL, age_days=RE_calculation.POWER_CACHE_TTL_DAYS + 1)
+    monkeypatch.setattr(RE_calculation, 'POWER_OFFLINE', True)
+    assert '"ALLSKY_SFC_SW_DWN"' in RE_calculation.get_data(URL)
+    assert cache == []
+
+
+def test_offline_cache_miss(cache, monkeypatch):
+    monkeypatch.setattr(RE_calculation, 'POWER_OFFLINE', True)
+    with pytest.raises(ConnectionError, match='offline'):
+        RE_calculation.get_data(URL)
+    assert cache == []
+
+
+def test_cache_hit(cache):
+    record(URL, age_days=RE_calculation.POWER_CACHE_TTL_DAYS - 1)
+    assert '"ALLSKY_SFC_SW_DWN"' in RE_calculation.get_data(URL)
+    assert cache == []
+
+
+def test_expired_response_is_downloaded_again(cache):
+    entry = record(URL, age_days=RE_calculation.POWER_CACHE_TTL_DAYS + 1)
+
+    assert RE_calculation.get_data(URL) == '{"downloaded": "%s"}' % URL
+    assert cache == [URL]
+    with gzip.open(entry, 'rt') as f:
+        assert f.read() == '{"downloaded": "%s"}' % URL
+    assert RE_calculation.get_data(URL) == '{"downloaded": "%s"}' % URL          #served from the refreshed entry
+    assert cache == [URL]
+
+
+def test_oldest_responses_are_evicted(cache, monkeypatch):
+    old_entries = [record(URL + '&site=%d' % k, age_days=10 - k) for k in range(3)]
+    entry_size = os.path.getsize(old_entries[0])
+    monkeypatch.setattr(RE_calculation, 'POWER_CACHE_MAX_SIZE_MB', 1.8*entry_size/2**20)
+
+    RE_calculation.get_data(URL)                                              #new entry, smaller than the recorded one
+
+    assert [os.path.exists(entry) for entry in old_entries] == [False, False, True]
+    assert os.path.exists(RE_calculation.cached_response_path(URL))
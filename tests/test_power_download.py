@@ -0,0 +1,94 @@
+import http.server
+import threading
+import urllib.error
+
+import pytest
+
+import RE_calculation
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    '''Stand-in for the POWER API: /flaky/<n> answers 503 to the first n requests, /missing answers 404'''
+
+    protocol_version = 'HTTP/1.1'                                             #keep-alive
+    requests = {}
+
+    def do_GET(self):
+        count = self.requests[self.path] = self.requests.get(self.path, 0) + 1
+        if self.path.startswith('/flaky/') and count <= int(self.path.split('?')[0].split('/')[-1]):
+            status, body = 503, b'unavailable'
+        elif self.path == '/missing':
+            status, body = 404, b'not found'
+        else:
+            status, body = 200, ('{"path": "%s"}' % self.path).encode()
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(RE_calculation, 'POWER_BACKOFF', 0)
+    monkeypatch.setattr(RE_calculation, 'POWER_RETRIES', 2)
+    StandInHandler.requests = {}
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:%d' % httpd.server_address[1]
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_server_errors_are_retried(server):
+    assert RE_calculation.fetch_url(server + '/flaky/2') == '{"path": "/flaky/2"}'
+    assert StandInHandler.requests['/flaky/2'] == 3
+
+
+def test_persistent_server_errors_fail(server):
+    with pytest.raises(ConnectionError):
+        RE_calculation.fetch_url(server + '/flaky/5')
+    assert StandInHandler.requests['/flaky/5'] == 3
+
+
+def test_client_errors_are_not_retried(server):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        RE_calculation.fetch_url(server + '/missing')
+    assert error.value.code == 404
+    assert StandInHandler.requests['/missing'] == 1
+
+
+def test_download_closes_shared_connections(server, monkeypatch, tmp_path):
+    monkeypatch.setattr(RE_calculation, 'POWER_CACHE_DIRECTORY', str(tmp_path))
+    pools = []
+
+    class RecordedPool(RE_calculation.ConnectionPool):
+        def __init__(self):
+            super().__init__()
+            self.connections = []
+            pools.append(self)
+
+        def acquire(self, scheme, netloc):
+            connection = super().acquire(scheme, netloc)
+            self.connections.append(connection)
+            return connection
+
+    monkeypatch.setattr(RE_calculation, 'ConnectionPool', RecordedPool)
+    URL_list = [server + '/flaky/1?corner=%d' % k for k in range(4)] + [server + '/ok']
+
+    jsdata = RE_calculation.multithread_data_download(URL_list)
+
+    assert jsdata == ['{"path": "%s"}' % URL[len(server):] for URL in URL_list]
+    assert len(pools) == 1                                                    #one pool shared by all the threads
+    assert all(connection.sock is None for connection in pools[0].connections)
+    assert pools[0].opened == [] and pools[0].idle == {}
+
+
+def test_download_reports_failed_urls(server, monkeypatch, tmp_path):
+    monkeypatch.setattr(RE_calculation, 'POWER_CACHE_DIRECTORY', str(tmp_path))
+    with pytest.raises(ConnectionError, match='1 of 2 downloads failed'):
+        RE_calculation.multithread_data_download([server + '/ok', server + '/missing'])
+
@@ -0,0 +1,67 @@
+import io, contextlib, collections
+
+import pandas as pd
+
+import Results
+from fake_instance import solved_instance
+
+
+def counted_reports(monkeypatch):
+    '''
+    Counts the calls of the functions computing the reports of ResultsSummary and of the time series export.
+    The size report is replaced by a one-row table, the size tables being out of the scope of these tests.
+    '''
+    calls = collections.Counter()
+    def counted(name, function):
+        def wrapper(*args):
+            calls[name] += 1
+            return function(*args)
+        monkeypatch.setattr(Results, name, wrapper)
+    for name in ['EnergySystemCost', 'YearlyCosts', 'YearlyEnergy', 'YearlyEnergyParams', 'YearlyEnergyParamsSC', 'export_time_series']:
+        counted(name, getattr(Results, name))
+    counted('EnergySystemSize', lambda instance: pd.DataFrame({'Total': [1.0]}, index=['Solar PV']))
+    return calls
+
+
+def summary():
+    instance = solved_instance()
+    with contextlib.redirect_stdout(io.StringIO()):
+        return Results.ResultsSummary(instance, 0, Results.TimeSeries(instance))
+
+
+def test_reports_computed_on_first_access(monkeypatch):
+    calls = counted_reports(monkeypatch)
+    Results_Summary = summary()
+    assert len(Results_Summary) == 0 and sum(calls.values()) == 0
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        costs = Results_Summary['Costs']
+        assert Results_Summary['Costs'] is costs
+    assert calls == {'EnergySystemCost': 1}
+
+
+def test_energy_reports_share_yearly_energy(monkeypatch):
+    calls = counted_reports(monkeypatch)
+    Results_Summary = summary()
+    Results_Summary['Renewables Penetration']
+    assert 'Yearly energy parameters' in Results_Summary                # computed together with the renewables penetration
+    Results_Summary['Yearly energy parameters']
+    Results_Summary['Renewables Penetration SC']
+    Results_Summary['Yearly energy parameters SC']
+    assert calls == {'YearlyEnergy': 1, 'YearlyEnergyParams': 1, 'YearlyEnergyParamsSC': 1}
+
+
+def test_files_written_only_by_export(monkeypatch, tmp_path):
+    calls = counted_reports(monkeypatch)
+    Results_Summary = summary()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for report in Results_Summary.Reports:
+            Results_Summary[report]
+    assert list(tmp_path.iterdir()) == [] and calls['export_time_series'] == 0
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        path = Results_Summary.export(str(tmp_path))
+    assert calls['export_time_series'] == 1
+    assert sorted(pd.ExcelFile(path).sheet_names) == sorted(['Size', 'Cost', 'Yearly cash flows', 'Yearly energy parameters', 'Yearly energy parameters SC'])
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['Results_Summary.xlsx', 'Time_Series_SC_1.csv.gz', 'Time_Series_SC_2.csv.gz']
+    assert calls['EnergySystemCost'] == calls['YearlyEnergy'] == 1      # export reuses the reports already computed
@@ -0,0 +1,30 @@
+import numpy as np
+
+from Grid_Availability import sample_availability, scenario_availability
+
+
+def test_same_seed_same_realizations():
+    first = scenario_availability(40, 90, 5, 6, 8760, 2024)
+    second = scenario_availability(40, 90, 5, 6, 8760, 2024)
+    assert len(first) == 6 and first[0].shape == (8760, 5)
+    for a, b in zip(first, second):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_scenarios_are_independent_realizations():
+    matrices = scenario_availability(40, 90, 5, 6, 8760, 2024)
+    assert all(not np.array_equal(matrices[0], matrix) for matrix in matrices[1:])
+    assert not np.array_equal(matrices[0], scenario_availability(40, 90, 5, 1, 8760, 2025)[0])
+
+
+def test_scenario_realization_independent_of_scenario_count():
+    few = scenario_availability(40, 90, 5, 2, 8760, 7)
+    many = scenario_availability(40, 90, 5, 8, 8760, 7)
+    for a, b in zip(few, many):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_parallel_sampling_matches_sequential_streams():
+    matrices = scenario_availability(40, 90, 5, 4, 8760, 11)
+    for stream, matrix in zip(np.random.SeedSequence(11).spawn(4), matrices):
+        np.testing.assert_array_equal(matrix, sample_availability(np.random.default_rng(stream), 40, 90, 5, 8760))
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Results import TIME_SERIES_FORMATS, export_time_series, flat_columns
+
+
+def time_series(scenarios=2, years=2, periods=48):
+    '''Time series shaped as the output of TimeSeries: one DataFrame per scenario and year with (scenario, flow, component, unit) columns'''
+    rng = np.random.default_rng(0)
+    series = {}
+    for s in range(1, scenarios + 1):
+        header = pd.MultiIndex.from_tuples([('Scenario ' + str(s), 'RES Production', 'PV', 'Wh'), ('Scenario ' + str(s), 'Lost Load', '', 'Wh')],
+                                           names=['', 'Flow', 'Component', 'Unit'])
+        series[s] = {y: pd.DataFrame(rng.random((periods, 2)), index=pd.date_range(f'{2022 + y}-01-01', periods=periods, freq='h'), columns=header)
+                     for y in range(1, years + 1)}
+    return series
+
+
+def test_csv_export(tmp_path):
+    TimeSeries = time_series()
+    paths = export_time_series(TimeSeries, 'csv', str(tmp_path))
+    assert [p.endswith('Time_Series_SC_%d.csv.gz' % s) for s, p in zip(TimeSeries, paths)] == [True, True]
+    written = pd.read_csv(paths[1], header=[0, 1, 2, 3], index_col=0)
+    np.testing.assert_allclose(written.to_numpy(), pd.concat(TimeSeries[2].values()).to_numpy())
+
+
+def test_parquet_export(tmp_path):
+    pytest.importorskip('pyarrow')
+    TimeSeries = time_series()
+    export_time_series(TimeSeries, 'parquet', str(tmp_path))
+    written = pd.read_parquet(tmp_path / 'Time_Series' / 'scenario=2' / 'year=1' / 'Time_Series.parquet')
+    assert list(written.columns) == flat_columns(TimeSeries[2][1]) == ['RES Production | PV [Wh]', 'Lost Load [Wh]']
+    np.testing.assert_allclose(written.to_numpy(), TimeSeries[2][1].to_numpy())
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError, match='Unknown time series format'):
+        export_time_series(time_series(), 'json', str(tmp_path))
+    assert sorted(TIME_SERIES_FORMATS.values()) == ['csv', 'hdf5', 'parquet', 'xlsx']
@@ -0,0 +1,237 @@
+import io, contextlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from fake_instance import solved_instance
+from Results import TimeSeries, indexed_array
+
+# Previous implementation, one DataFrame built column by column for each scenario and year, kept as reference
+# (without its Excel export)
+
+def reference_TimeSeries(instance):
+
+    print('\nResults: exporting time-series...')
+    "Importing parameters"
+    S  = int(instance.Scenarios.extract_values()[None])
+    P  = int(instance.Periods.extract_values()[None])
+    Y  = int(instance.Years.extract_values()[None])
+    ST = int(instance.Steps_Number.extract_values()[None])
+    R  = int(instance.RES_Sources.extract_values()[None])
+    G  = int(instance.Generator_Types.extract_values()[None])
+
+    Scenario_Weight = instance.Scenario_Weight.extract_values()
+    Discount_Rate   = instance.Discount_Rate.value
+    RES_Names       = instance.RES_Names.extract_values()
+    Generator_Names = instance.Generator_Names.extract_values()
+    Fuel_Names      = instance.Fuel_Names.extract_values()
+
+    StartDate       = pd.to_datetime(instance.StartDate())
+    start_year      = StartDate.year
+    start_month     = StartDate.month
+    start_day       = StartDate.day
+    start_hour      = StartDate.hour
+    start_minute    = StartDate.minute
+    start_second    = StartDate.second
+
+    "Generating years-steps tuples list"
+    steps = [i for i in range(1, ST+1)]
+
+    years_steps_list = [1 for i in range(1, ST+1)]
+    s_dur = instance.Step_Duration.value
+    for i in range(1, ST):
+        years_steps_list[i] = years_steps_list[i-1] + s_dur
+    ys_tuples_list = [[] for i in range(1, Y+1)]
+    for y in range(1, Y+1):
+        if len(years_steps_list) == 1:
+            ys_tuples_list[y-1] = (y,1)
+        else:
+            for i in range(len(years_steps_list)-1):
+                if y >= years_steps_list[i] and y < years_steps_list[i+1]:
+                    ys_tuples_list[y-1] = (y, steps[i])
+                elif y >= years_steps_list[-1]:
+                    ys_tuples_list[y-1] = (y, len(steps))
+
+    "Importing energy flows timeseries"
+    RES_Energy_Production       = instance.RES_Energy_Production.get_values()
+    BESS_Outflow                = instance.Battery_Outflow.get_values()
+    BESS_Inflow                 = instance.Battery_Inflow.get_values()
+    if instance.MILP_Formulation.value == 1 and instance.Generator_Partial_Load.value == 1:
+       Generator_Energy_Total      = instance.Generator_Energy_Total.get_values()
+       Generator_Energy_Partial    = instance.Generator_Energy_Partial.get_values()
+       Generator_Partial           = instance.Generator_Partial.get_values()
+       Generator_Full              = instance.Generator_Full.get_values()
+    elif instance.MILP_Formulation.value == 1 and instance.Generator_Partial_Load.value == 0:
+       Generator_Energy_Total = instance.Generator_Energy_Total.get_values()
+    else :
+       Generator_Energy_Production = instance.Generator_Energy_Production.get_values()
+    Curtailment                 = instance.Energy_Curtailment.get_values()
+    Lost_Load                   = instance.Lost_Load.get_values()
+    Electric_Demand             = instance.Energy_Demand.extract_values()
+    Electricity_From_Grid       = instance.Energy_From_Grid.get_values()
+    Electricity_To_Grid         = instance.Energy_To_Grid.get_values()
+
+    BESS_SOC                    = instance.Battery_SOC.get_values()
+    LHV                         = instance.Fuel_LHV.extract_values()
+    Generator_Efficiency        = instance.Generator_Efficiency.extract_values()
+    FUEL_emission               = instance.FUEL_emission.get_values()
+
+    "Creating TimeSeries dictionary"
+    TimeSeries = {}
+
+    for s in range(1,S+1):
+        TimeSeries[s] = {}
+        for y in range(1,Y+1):
+
+           scenario_header  = []
+           flow_header      = []
+           component_header = []
+           unit_header      = []
+
+           TimeSeries[s][y] = pd.DataFrame()
+           DEM = pd.DataFrame([Electric_Demand[(s,y,t)] for t in range(1,P+1)])
+           TimeSeries[s][y] = pd.concat([TimeSeries[s][y], DEM], axis=1)
+           scenario_header  += ['Scenario ' + str(s)]
+           flow_header      += ['Electric Demand']
+           component_header += ['']
+           unit_header      += ['Wh']
+
+           for r in range(1,R+1):
+               RES = pd.DataFrame([RES_Energy_Production[(s,y,r,t)] for t in range(1,P+1)])
+               TimeSeries[s][y] = pd.concat([TimeSeries[s][y], RES], axis=1)
+               scenario_header  += ['Scenario ' + str(s)]
+               flow_header      += ['RES Production']
+               component_header += [RES_Names[r]]
+               unit_header      += ['Wh']
+
+           # Total Energy Production of the generator
+           if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
+               for g in range(1,G+1):
+                   if instance.MILP_Formulation.value:
+                      GEN = pd.DataFrame([Generator_Energy_Total[(s,y,g,t)] for t in range(1,P+1)])
+                   else:
+                      GEN = pd.DataFrame([Generator_Energy_Production[(s,y,g,t)] for t in range(1,P+1)])
+                   TimeSeries[s][y] = pd.concat([TimeSeries[s][y], GEN], axis=1)
+                   scenario_header  += ['Scenario ' + str(s)]
+                   flow_header      += ['Generator Production']
+                   component_header += [Generator_Names[g]]
+                   unit_header      += ['Wh']
+
+               " Partial Load Effect"
+               # Generator Partial Load Production
+               if instance.MILP_Formulation.value == 1 and instance.Generator_Partial_Load.value == 1:
+                  for g in range(1,G+1):
+                      GEN_p = pd.DataFrame([Generator_Energy_Partial[(s,y,g,t)] for t in range(1,P+1)])
+                      TimeSeries[s][y] = pd.concat([TimeSeries[s][y], GEN_p], axis=1)
+                      scenario_header  += ['Scenario ' + str(s)]
+                      flow_header      += ['Generator Partial Load Production']
+                      component_header += [Generator_Names[g]]
+                      unit_header      += ['Wh']
+
+               # Units of Generators in Partial Load (1 o 0)
+               if instance.MILP_Formulation.value == 1 and instance.Generator_Partial_Load.value == 1:
+                  for g in range(1,G+1):
+                      GEN_pu = pd.DataFrame([Generator_Partial[(s,y,g,t)] for t in range(1,P+1)])
+                      TimeSeries[s][y] = pd.concat([TimeSeries[s][y], GEN_pu], axis=1)
+                      scenario_header  += ['Scenario ' + str(s)]
+                      flow_header      += ['Units of Generators in Partial Load']
+                      component_header += [Generator_Names[g]]
+                      unit_header      += ['Wh']
+
+               # Units of Generators in Full Load
+               if instance.MILP_Formulation.value == 1 and instance.Generator_Partial_Load.value == 1:
+                  for g in range(1,G+1):
+                      GEN_fu = pd.DataFrame([Generator_Full[(s,y,g,t)] for t in range(1,P+1)])
+                      TimeSeries[s][y] = pd.concat([TimeSeries[s][y], GEN_fu], axis=1)
+                      scenario_header  += ['Scenario ' + str(s)]
+                      flow_header      += ['Units of Generators in Full Load']
+                      component_header += [Generator_Names[g]]
+                      unit_header      += ['Wh']
+
+           BESS_OUT         = pd.DataFrame([BESS_Outflow[(s,y,t)] for t in range(1,P+1)])
+           BESS_IN          = pd.DataFrame([BESS_Inflow[(s,y,t)] for t in range(1,P+1)])
+           LL               = pd.DataFrame([Lost_Load[(s,y,t)] for t in range(1,P+1)])
+           CURTAIL          = pd.DataFrame([Curtailment[(s,y,t)] for t in range(1,P+1)])
+           EL_FROM_GRID     = pd.DataFrame([Electricity_From_Grid[(s,y,t)] for t in range(1,P+1)])
+           EL_TO_GRID       = pd.DataFrame([Electricity_To_Grid[(s,y,t)] for t in range(1,P+1)])
+           if instance.Model_Components.value == 0 or instance.Model_Components.value == 1:
+               if instance.Grid_Connection.value == 1:
+                   TimeSeries[s][y] = pd.concat([TimeSeries[s][y], BESS_OUT, BESS_IN, LL, CURTAIL, EL_FROM_GRID,EL_TO_GRID], axis=1)
+                   scenario_header  += ['Scenario ' + str(s),'Scenario ' + str(s),'Scenario ' + str(s),'Scenario ' + str(s),'Scenario ' + str(s),'Scenario ' + str(s)]
+                   flow_header      += ['Battery Discharge','Battery Charge','Lost Load','Curtailment','Electricity from grid','Electricity to grid']
+                   component_header += ['','','','','','']
+                   unit_header      += ['Wh','Wh','Wh','Wh','Wh','Wh']
+               if instance.Grid_Connection.value == 0:
+                   TimeSeries[s][y] = pd.concat([TimeSeries[s][y], BESS_OUT, BESS_IN, LL, CURTAIL], axis=1)
+                   scenario_header  += ['Scenario ' + str(s),'Scenario ' + str(s),'Scenario ' + str(s),'Scenario ' + str(s)]
+                   flow_header      += ['Battery Discharge','Battery Charge','Lost Load','Curtailment']
+                   component_header += ['','','','']
+                   unit_header      += ['Wh','Wh','Wh','Wh']
+
+               SOC              = pd.DataFrame([BESS_SOC[(s,y,t)] for t in range(1,P+1)])
+               TimeSeries[s][y] = pd.concat([TimeSeries[s][y], SOC], axis=1)
+               scenario_header  += ['Scenario ' + str(s)]
+               flow_header      += ['Battery SOC']
+               component_header += ['']
+               unit_header      += ['Wh']
+
+           if instance.Model_Components.value == 2:
+               if instance.Grid_Connection.value == 1:
+                   TimeSeries[s][y] = pd.concat([TimeSeries[s][y], LL, CURTAIL, EL_FROM_GRID, EL_TO_GRID], axis=1)
+                   scenario_header  += ['Scenario ' + str(s),'Scenario ' + str(s),'Scenario ' + str(s),'Scenario ' + str(s)]
+                   flow_header      += ['Lost Load','Curtailment','Electricity from grid','Electricity to grid']
+                   component_header += ['','','','']
+                   unit_header      += ['Wh','Wh','Wh','Wh']
+               if instance.Grid_Connection.value == 0:
+                   TimeSeries[s][y] = pd.concat([TimeSeries[s][y], LL, CURTAIL], axis=1)
+                   scenario_header  += ['Scenario ' + str(s),'Scenario ' + str(s)]
+                   flow_header      += ['Lost Load','Curtailment']
+                   component_header += ['','']
+                   unit_header      += ['Wh','Wh']
+
+           if instance.Model_Components.value == 0 or instance.Model_Components.value == 2:
+               for g in range(1,G+1):
+                   if instance.MILP_Formulation.value:
+                      FUEL = pd.DataFrame([Generator_Energy_Total[(s,y,g,t)]/LHV[g]/Generator_Efficiency[g] for t in range(1,P+1)])
+                   else:
+                      FUEL = pd.DataFrame([Generator_Energy_Production[(s,y,g,t)]/LHV[g]/Generator_Efficiency[g] for t in range(1,P+1)])
+                   TimeSeries[s][y] = pd.concat([TimeSeries[s][y], FUEL], axis=1)
+                   scenario_header  += ['Scenario ' + str(s)]
+                   flow_header      += ['Fuel Consumption']
+                   component_header += [Fuel_Names[g]]
+                   unit_header      += ['Lt']
+
+               for g in range(1,G+1):
+                   CO2              = pd.DataFrame([FUEL_emission[(s,y,g,t)] for t in range(1,P+1)])
+                   TimeSeries[s][y] = pd.concat([TimeSeries[s][y], CO2], axis=1)
+                   scenario_header  += ['Scenario ' + str(s)]
+                   flow_header      += ['CO2 emission']
+                   component_header += [Fuel_Names[g]]
+                   unit_header      += ['kg']
+
+           TimeSeries[s][y].columns = pd.MultiIndex.from_arrays([scenario_header, flow_header, component_header, unit_header], names=['','Flow','Component','Unit'])
+           date                     = str(start_year+y-1)+'/'+str(start_month)+'/'+str(start_day)+' '+str(start_hour)+':'+str(start_minute)
+           TimeSeries[s][y].index   = pd.date_range(start=date, periods=P, freq='h')
+
+    return TimeSeries
+
+
+@pytest.mark.parametrize('options', [dict(), dict(MILP_Formulation=1, Generator_Partial_Load=1, Grid_Connection=1),
+                                     dict(Model_Components=1, Grid_Connection=1), dict(Model_Components=2, MILP_Formulation=1)])
+def test_time_series_match_reference(options):
+    instance = solved_instance(**options)
+    with contextlib.redirect_stdout(io.StringIO()):
+        expected = reference_TimeSeries(instance)
+        series = TimeSeries(instance)
+    assert list(series) == list(expected)
+    for s in expected:
+        assert list(series[s]) == list(expected[s])
+        for y in expected[s]:
+            pd.testing.assert_frame_equal(series[s][y], expected[s][y], check_exact=False, rtol=1e-12)
+    assert series.Flows.shape == (2, 4, len(series.Columns), 24)
+
+
+def test_indexed_array_missing_values():
+    values = {(1, 1): 1.0, (1, 2): 2.0, (2, 2): None}
+    np.testing.assert_array_equal(indexed_array(values, np.empty((2, 2))), [[1, 2], [np.nan, np.nan]])
@@ -0,0 +1,124 @@
+import operator
+from collections import defaultdict
+
+import numpy as np
+import pytest
+
+from RE_calculation import calendar_index, typical_year_daily
+
+
+def typical_year_daily_reference(param_daily, date_start, date_end):
+    '''Previous implementation of the Finkelstein-Schafer typical year on the nested lists [param][year][month][day], kept as reference'''
+
+    # the list param_daily is re-ordered and the long-term cumulate is calculated
+    param_daily_ord = [[[]for ii in range(12)]for ii in range(len(param_daily))]
+    cdf_1 = [[defaultdict(list) for ii in range(0,12)]for ii in range(len(param_daily))]
+    phi_1 = [[[[] for ii in range(int(date_end[5:9])-int(date_start[7:11])+1)]for ii in range(12)]for ii in range(len(param_daily))]
+    f_2 = [[[[] for ii in range(int(date_end[5:9])-int(date_start[7:11])+1)]for ii in range(12)]for ii in range(len(param_daily))]
+    fs = [[defaultdict(list) for ii in range(12)]for ii in range(len(param_daily))]
+
+    for ii in range(len(param_daily)):
+        for jj in range(len(param_daily[ii])):
+            for kk in range(len(param_daily[ii][jj])):
+                     param_daily_ord[ii][kk] = sorted(param_daily_ord[ii][kk] + param_daily[ii][jj][kk])
+    for ii in range(len(param_daily_ord)):
+        for jj in range(len(param_daily_ord[ii])):
+            for kk in range(len(param_daily_ord[ii][jj])):
+                cdf_1[ii][jj][str(param_daily_ord[ii][jj][kk])].append((kk+1)/len(param_daily_ord[ii][jj]))
+
+    for ii in range(len(cdf_1)):
+        for jj in range(len(cdf_1[ii])):
+                for kk in range(len(phi_1[ii][jj])):
+                    for yy in range(len(param_daily[ii][kk][jj])):
+                        for key in cdf_1[ii][jj]:
+                            if str(param_daily[ii][kk][jj][yy]) == key and len(cdf_1[ii][jj][key]) == 1:
+                                 phi_1[ii][jj][kk].append(cdf_1[ii][jj][key][0])
+                            elif str(param_daily[ii][kk][jj][yy]) == key and len(cdf_1[ii][jj][key]) > 1:
+                                 phi_1[ii][jj][kk].append(cdf_1[ii][jj][key][0])
+                                 cdf_1[ii][jj][key].pop(0)
+                            else:
+                                 continue
+
+    # the year-specific cumulate is calculated
+    param_daily_ord_2 = [[[] for ii in range(int(date_end[5:9])-int(date_start[7:11])+1)]for ii in range(len(param_daily))]
+    cdf_2 = [[[defaultdict(list) for ii in range(12)] for ii in range(int(date_end[5:9])-int(date_start[7:11])+1)]for ii in range(len(param_daily))]
+
+    for ii in range(len(param_daily)):
+        for jj in range(len(param_daily[ii])):
+            for kk in range(len(param_daily[ii][jj])):
+                param_daily_ord_2[ii][jj].append(sorted(param_daily[ii][jj][kk]))
+
+    for ii in range(len(param_daily_ord_2)):
+        for jj in range(len(param_daily_ord_2[ii])):
+            for kk in range(len(param_daily_ord_2[ii][jj])):
+                for day in range(len(param_daily_ord_2[ii][jj][kk])):
+                    cdf_2[ii][jj][kk][param_daily_ord_2[ii][jj][kk][day]].append((day+1)/(len(param_daily_ord_2[ii][jj][kk])))
+
+    for ii in range(len(cdf_1)):
+        for jj in range(len(cdf_1[ii])):
+                for kk in range(len(f_2[ii][jj])):
+                    for yy in range(len(param_daily[ii][kk][jj])):
+                        for key in cdf_2[ii][kk][jj]:
+                            if (param_daily[ii][kk][jj][yy]) == key and len(cdf_2[ii][kk][jj][key]) == 1:
+                                 f_2[ii][jj][kk].append(cdf_2[ii][kk][jj][key][0])
+                            elif (param_daily[ii][kk][jj][yy]) == key and len(cdf_2[ii][kk][jj][key]) > 1:
+                                 f_2[ii][jj][kk].append(cdf_2[ii][kk][jj][key][0])
+                                 cdf_2[ii][kk][jj][key].pop(0)
+                            else:
+                                 continue
+                    fs[ii][jj][str(kk)] = np.absolute(np.subtract(f_2[ii][jj][kk],phi_1[ii][jj][kk]))
+                    fs[ii][jj][str(kk)] = sum(fs[ii][jj][str(kk)][:])
+
+    sum_prim = [dict() for ii in range(len(fs[0]))]
+    best_prim = [[] for ii in range(12)]
+    for jj in range(len(fs[0])):
+        for key in fs[0][jj]:
+            sum_prim[jj][key] =  fs[0][jj][key] + fs[1][jj][key] + fs[2][jj][key]
+            best_prim[jj] = sorted(sum_prim[jj].items(),key=operator.itemgetter(1))[0:3]
+
+    diff_sec = [dict() for ii in range(12)]
+    long_term_average = [[] for ii in range(12)]
+    best_years = [[] for ii in range(12)]
+    for ii in range(len(param_daily[3])):
+        for jj in range(len(param_daily[3][ii])):
+            long_term_average[jj].append(sum(param_daily[3][ii][jj])/len(param_daily[3][ii][jj]))
+    for ii in range(len(long_term_average)):
+        long_term_average[ii] = sum(long_term_average[ii])/len(long_term_average[ii])
+    for ii in range(len(best_prim)):
+        for jj in range(len(best_prim[ii])):
+            diff_sec[ii][best_prim[ii][jj][0]] = abs(np.mean(param_daily[3][int(best_prim[ii][jj][0])][ii]) - long_term_average[ii])
+        best_years[ii] = min(diff_sec[ii], key=diff_sec[ii].get)
+    return best_years, fs
+
+
+def daily_record(first_year, n_years, rng, decimals=None):
+    '''Random daily values of the 6 daily POWER parameters, as the (values, month_bounds, day_bounds) array data and as nested lists'''
+
+    dates = np.array([int(f'{y}{m:02d}{d:02d}') for y in range(first_year, first_year + n_years) for m in range(1, 13)
+                      for d in range(1, 32) if d <= [31, 29 if y % 4 == 0 else 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31][m-1]])
+    values = rng.gamma(2, 2, size=(6, len(dates)))
+    if decimals is not None:
+        values = values.round(decimals)                                       #many tied values
+    month_bounds, day_bounds = calendar_index(dates, first_year, n_years)
+    nested = [[[values[p, month_bounds[y*12 + m]:month_bounds[y*12 + m + 1]].tolist() for m in range(12)] for y in range(n_years)] for p in range(len(values))]
+    return (values, month_bounds, day_bounds), nested
+
+
+@pytest.mark.parametrize('first_year, n_years, decimals, seed', [
+    (2019, 3, None, 0),                                                       #random data
+    (2012, 5, None, 1),
+    (2019, 3, 0, 2),                                                          #tied values
+    (2016, 7, 1, 3),
+    (1991, 30, 1, 4)])                                                        #30-year record
+def test_best_years_match_reference(first_year, n_years, decimals, seed):
+    param_daily, nested = daily_record(first_year, n_years, np.random.default_rng(seed), decimals)
+    date_start, date_end = f'&start={first_year}0101', f'&end={first_year + n_years - 1}1231'
+
+    best_years, param_typical_daily, fs, diff_sec = typical_year_daily(param_daily, date_start, date_end)
+    reference_best_years, reference_fs = typical_year_daily_reference(nested, date_start, date_end)
+
+    assert best_years == [int(year) for year in reference_best_years]
+    for param in range(len(nested)):
+        for month in range(12):
+            np.testing.assert_allclose(fs[param, month], [reference_fs[param][month][str(year)] for year in range(n_years)], atol=1e-12)
+    assert param_typical_daily.shape == (6, 365)
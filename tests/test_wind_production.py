@@ -0,0 +1,139 @@
+import math
+
+import numpy as np
+
+from RE_calculation import air_density, P_turb, shear_exp, wind_lst
+
+# Previous implementation of the wind production chain on nested [param][month][day][hour] lists, kept as reference
+
+def reference_shear_exp(param_typical_hourly, Z_1, Z_0, Z_rot):
+
+    w_Z1 = param_typical_hourly[0]
+    w_Z0 = param_typical_hourly[1]
+    alpha = [[] for ii in range(len(w_Z1))]       #Hellmann coefficient is evaluated from velocities at 2 and 50 meters on hourly basis
+    U_rotor = [[] for ii in range(len(w_Z1))]
+    for month in range(len(w_Z1)):
+        alpha[month] = [[] for ii in range(len(w_Z1[month]))]
+        U_rotor[month] = [[] for ii in range(len(w_Z1[month]))]
+        for day in range(len(w_Z1[month])):
+            for hour in range(len(w_Z1[month][day])):
+                if w_Z1[month][day][hour] == 0 or w_Z0[month][day][hour] == 0:
+                    alpha[month][day].append(0)
+                else:
+                    alpha[month][day].append((math.log(w_Z1[month][day][hour]) - math.log(w_Z0[month][day][hour]))/(math.log(Z_1)-math.log(Z_0)))
+                    U_rotor[month][day].append(w_Z0[month][day][hour] * (Z_rot/Z_0)**alpha[month][day][hour])
+    # corrects error in wind speed dataset
+    if len(U_rotor[9][21]) < 24:
+        U_rotor[9][21].append(param_typical_hourly[1][9][21][23] * (40/2)**alpha[9][21][23])
+    return U_rotor,alpha
+
+def reference_air_density(Z,param_typical_hourly):
+
+    T2M_hourly = param_typical_hourly[3]
+    DT =  -0.0066 * (Z-2)                               #[°C/m] Change of temperature from measurement height (2 m) to height Z (standard lapse rate expression)
+    P = 101.29 - (0.011837)*Z + (4.793*(10**-7))*Z**2     #[kPa] Pressure at height Z
+    MM = 28.96                                          #[kg/kmol] molar mass of dry air
+    R = 8.314                                           #[kJ/K kmol] gas constant
+    R_molar = R/MM
+    ro_air = [[] for i in range(len(T2M_hourly))]
+    for ii in range(len(T2M_hourly)):
+        ro_air[ii] = [[] for ii in range(len(T2M_hourly[ii]))]
+        for jj in range(len(T2M_hourly[ii])):
+            for kk in range(len(T2M_hourly[ii][jj])):
+                ro_air[ii][jj].append(P/(R_molar*(T2M_hourly[ii][jj][kk] + 273.15 + DT)))       #find air density at hub height
+
+    return ro_air
+
+def reference_wind_lst(U_rotor, wind_direction, ro_air):
+    U_rotor_lst = []
+    wind_direction_lst = []
+    ro_air_lst = []
+    for ii in range(len(U_rotor)):
+        for jj in range(len(U_rotor[ii])):
+            U_rotor_lst.extend(U_rotor[ii][jj])
+            wind_direction_lst.extend(wind_direction[2][ii][jj])
+            ro_air_lst.extend(ro_air[ii][jj])
+    return U_rotor_lst, wind_direction_lst, ro_air_lst
+
+def reference_P_turb(power_curve, WS_rotor_lst, ro_air_lst, surface_area, drivetrain_efficiency):
+    # Ensure power_curve is a numeric array
+    # If power_curve is a list of strings, convert it to a list of floats.
+    fp = np.array([float(pc) for pc in power_curve])
+
+    # Convert range to numpy array for xp
+    xp = np.array(range(0, 30))
+
+    En_wind = []
+    En_WT = []
+    Cp = []
+    for ii in range(len(WS_rotor_lst)):
+        # Ensure WS_rotor_lst[ii] is numeric and convert it if necessary
+        WS_rotor_value = float(WS_rotor_lst[ii])
+
+        # Compute hourly ideal wind energy
+        En_wind.append(0.5 * ro_air_lst[ii] * surface_area * WS_rotor_value**3)
+
+        # Compute hourly energy production using interpolation
+        interpolated_value = np.interp(WS_rotor_value, xp, fp) * 1000
+        En_WT.append(interpolated_value)
+
+        # Compute hourly turbine power coefficient
+        Cp.append(En_WT[ii]/(En_wind[ii])) if En_wind[ii] != 0 else Cp.append(0)
+
+    return En_WT, Cp
+
+
+MONTH_DAYS = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+POWER_CURVE = [0, 0, 0, 0.5, 2, 5, 9, 14, 19, 23, 25, 25, 25, 25, 25, 25, 25, 25, 25, 25, 25, 25, 25, 25, 25, 0, 0, 0, 0, 0]     #[kW] at 0..29 m/s
+
+
+def typical_hourly(seed):
+    """(param, day, hour) array of WS50M, WS2M, WD10M and T2M and the same values as nested [param][month][day][hour] lists."""
+    rng = np.random.default_rng(seed)
+    values = np.stack([rng.uniform(2, 14, (365, 24)), rng.uniform(0.5, 6, (365, 24)), rng.uniform(0, 360, (365, 24)), rng.uniform(-10, 35, (365, 24))])
+    bounds = np.cumsum([0] + MONTH_DAYS)
+    nested = [[param[bounds[m]:bounds[m+1]].tolist() for m in range(12)] for param in values]
+    return values, nested
+
+
+def test_wind_production_matches_reference():
+    values, nested = typical_hourly(0)
+    U_rotor, alpha = shear_exp(values, 50, 2, 40)
+    U_rotor_lst, wind_direction_lst, ro_air_lst = wind_lst(U_rotor, values, air_density(40, values))
+    En_WT, Cp = P_turb(POWER_CURVE, U_rotor_lst, ro_air_lst, 1250, 0.9)
+
+    ref_U_rotor, ref_alpha = reference_shear_exp(nested, 50, 2, 40)
+    ref_U_rotor_lst, ref_wind_direction_lst, ref_ro_air_lst = reference_wind_lst(ref_U_rotor, nested, reference_air_density(40, nested))
+    ref_En_WT, ref_Cp = reference_P_turb(POWER_CURVE, ref_U_rotor_lst, ref_ro_air_lst, 1250, 0.9)
+
+    np.testing.assert_allclose(alpha, np.concatenate([np.ravel(month) for month in ref_alpha]), rtol=1e-12)
+    np.testing.assert_allclose(U_rotor_lst, ref_U_rotor_lst, rtol=1e-12)
+    np.testing.assert_array_equal(wind_direction_lst, ref_wind_direction_lst)
+    np.testing.assert_allclose(ro_air_lst, ref_ro_air_lst, rtol=1e-12)
+    np.testing.assert_allclose(En_WT, ref_En_WT, rtol=1e-12)
+    np.testing.assert_allclose(Cp, ref_Cp, rtol=1e-12)
+
+
+def test_missing_wind_speed_keeps_hours_aligned():
+    values, nested = typical_hourly(1)
+    values[1, 100, 5] = 0                                       #missing WS2M
+    values[0, 200, 17] = 0                                      #missing WS50M
+    U_rotor, alpha = shear_exp(values, 50, 2, 40)
+    valid = np.ones(365*24, dtype=bool)
+    valid[[100*24 + 5, 200*24 + 17]] = False
+
+    assert U_rotor.shape == (365*24,)
+    np.testing.assert_allclose(alpha[~valid], alpha[valid].mean())
+    np.testing.assert_allclose(U_rotor[valid], shear_exp(values[:, valid.reshape(365, 24)], 50, 2, 40)[0])
+
+
+def test_several_power_curves_at_once():
+    values, nested = typical_hourly(2)
+    U_rotor, alpha = shear_exp(values, 50, 2, 40)
+    ro_air = air_density(40, values)
+    curves = np.array([POWER_CURVE, np.array(POWER_CURVE)*2])
+    En_WT, Cp = P_turb(curves, U_rotor, ro_air, np.array([1250, 2500]), 0.9)
+    for k in range(2):
+        single_En_WT, single_Cp = P_turb(curves[k], U_rotor, ro_air, [1250, 2500][k], 0.9)
+        np.testing.assert_allclose(En_WT[k], single_En_WT)
+        np.testing.assert_allclose(Cp[k], single_Cp)